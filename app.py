@@ -11,14 +11,14 @@ if user_site_packages not in sys.path:
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
 
+# Light imports only: OCR/ASR (torch, easyocr, whisper) and the agents
+# (langchain, chromadb, sympy) are imported by their getters on first use.
 try:
-    from utils.ocr import OCRProcessor
-    from utils.audio import AudioProcessor
-    from agents.parser import ParserAgent
-    from agents.router import IntentRouter
-    from agents.solver import SolverAgent
-    from agents.verifier import VerifierAgent
-    from agents.explainer import ExplainerAgent
+    from utils.batch_ocr import BatchOCR, split_problems
+    from utils.warmup import Warmup
+    from agents.engine import MathEngine
+    from agents.pipeline import SPECULATION_STATS
+    from agents.llm_cache import cache_enabled, cache_stats
 except ImportError as e:
     st.error(f"Import Error: {e}")
     st.stop()
@@ -37,29 +37,64 @@ st.set_page_config(
 
 @st.cache_resource
 def get_ocr_processor():
+    from utils.ocr import OCRProcessor
     return OCRProcessor()
 
+@st.cache_resource
+def get_batch_ocr():
+    return BatchOCR()
+
 @st.cache_resource
 def get_audio_processor():
+    from utils.audio import AudioProcessor
     return AudioProcessor()
 
 @st.cache_resource
+def get_engine():
+    # Builds nothing heavy until the agents are first used
+    return MathEngine()
+
+def get_answer_cache():
+    return get_engine().answer_cache
+
 def get_agents():
-    return {
-        "parser": ParserAgent(),
-        "router": IntentRouter(),
-        "solver": SolverAgent(),
-        "verifier": VerifierAgent(),
-        "explainer": ExplainerAgent()
-    }
+    return get_engine().agents
+
+@st.cache_resource
+def get_warmup():
+    return Warmup()
+
+# Resources each input mode needs, preloaded in the background
+WARMUP_TARGETS = {
+    "Text": {"agents": get_agents},
+    "Image": {"agents": get_agents, "ocr": get_ocr_processor},
+    "Audio": {"agents": get_agents, "asr": get_audio_processor},
+}
+
+def warm_up(input_mode):
+    if os.getenv("WARMUP", "1") != "1":
+        return
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    ctx = get_script_run_ctx()
+    warmup = get_warmup()
+    for key, load in WARMUP_TARGETS.get(input_mode, {}).items():
+        warmup.start(key, load, prepare_thread=lambda thread: add_script_run_ctx(thread, ctx))
 
 # --- Pipeline Logic ---
 
-def display_results(result):
+def render_explanation(text):
+    st.subheader("💡 Solution")
+    st.markdown(text)
+
+def display_results(result, explanation_slot=None):
     if result.get("success"):
         st.session_state.final_result = result
-        st.subheader("💡 Solution")
-        st.markdown(result["explanation"])
+        if explanation_slot is not None:
+            # Replace the streamed draft in place
+            with explanation_slot.container():
+                render_explanation(result["explanation"])
+        else:
+            render_explanation(result["explanation"])
         
         st.divider()
         st.markdown("### Technical Steps")
@@ -70,6 +105,9 @@ def display_results(result):
             if result.get("citations"):
                 st.write(f"Sources: {result['citations']}")
             st.json(result['verification'])
+            for call in result.get("tool_calls", []):
+                st.code(call["code"], language="python")
+                st.text(call["output"])
             
     elif result.get("error") == "clarification":
         st.error("Ambiguous Input")
@@ -100,67 +138,115 @@ def display_results(result):
             with st.spinner("Learning..."):
                 agents = get_agents()
                 topic = st.session_state.current_problem_data.get("topic", "General")
-                agents["solver"].learn(
+                outcome = agents["solver"].learn(
                     result["explanation"], # Storing explanation is often better for future retrieval than raw technical steps, or store both.
                     result["solution"], 
                     topic
                 )
-            st.success("Stored in Memory! This will help solve future problems.")
+            if outcome.get("status") == "added":
+                st.success("Stored in Memory! This will help solve future problems.")
+            elif outcome.get("status") == "duplicate":
+                st.info("A near-identical problem is already in memory; its entry was refreshed.")
+            else:
+                st.error(f"Could not store in memory: {outcome.get('error', 'unknown error')}")
             
     with col_b:
         if st.button("❌ Incorrect"):
             st.text_input("Describe error for future improvements:")
 
-def run_solver_pipeline(text_input):
-    agents = get_agents()
+def run_solver_pipeline(text_input, stream=False):
+    """
+    Runs the agent pipeline inside an st.status block. With stream=True the
+    solver output streams inside the status block and the explanation
+    streams into a placeholder below it, which is returned alongside the
+    result so display_results can fill it in place.
+    """
+    status = st.status("Thinking...", expanded=True)
+    explanation_slot = st.empty() if stream else None
     
-    with st.status("Thinking...", expanded=True) as status:
-        # 1. Parsing
-        status.write("Parsing problem...")
-        parsed = agents["parser"].parse(text_input)
-        
-        if parsed.get("needs_clarification"):
-            status.update(label="Clarification Needed", state="error")
-            return {"error": "clarification", "data": parsed}
-            
-        st.session_state.current_problem_data = parsed
-        status.write(f"Problem Parsed: {parsed.get('topic')}")
-        
-        # 2. Routing
-        status.write("Routing...")
-        route = agents["router"].route(parsed)
-        status.write(f"Strategy: {route.get('category')} ({route.get('complexity')})")
+    with status:
+        on_token = None
+        slots = {}
+        if stream:
+            def on_token(stage, text):
+                if stage == "solve":
+                    # Created on first token so it sits under "Solving with RAG..."
+                    if "solve" not in slots:
+                        slots["solve"] = st.empty()
+                    slots["solve"].markdown(text + "▌")
+                else:
+                    with explanation_slot.container():
+                        render_explanation(text + "▌")
         
-        # 3. Solving
-        status.write("Solving with RAG...")
-        solve_result = agents["solver"].solve(parsed)
-        solution = solve_result["solution"]
+        # The pipeline runs on the shared event loop thread; UI callbacks are
+        # relayed back to this script thread.
+        result = get_engine().solve(
+            text_input,
+            on_status=status.write,
+            on_token=on_token,
+            speculative=st.session_state.get("speculative_explain", False)
+        )
         
-        # 4. Verification
-        status.write("Verifying...")
-        verification = agents["verifier"].verify(parsed["problem_text"], solution)
+        if "solve" in slots:
+            # The full solution is shown again under "Technical Steps"
+            slots["solve"].empty()
         
-        if not verification["is_correct"] or verification["confidence"] < 0.8:
-            status.update(label="Verification Alert", state="error")
-            return {
-                "error": "verification_failed",
-                "solution": solution,
-                "verification": verification,
-                "solve_result": solve_result
-            }
+        if result.get("error") == "clarification":
+            status.update(label="Clarification Needed", state="error")
+            return result, explanation_slot
             
-        # 5. Explanation
-        status.write("Generating Explanation...")
-        final_explanation = agents["explainer"].explain(parsed["problem_text"], solution)
+        st.session_state.current_problem_data = result["problem"]
+        status.write(f"Stage timings (s): {result['timings']}")
         
-        status.update(label="Solved!", state="complete")
-        return {
-            "success": True,
-            "solution": solution,
-            "explanation": final_explanation,
-            "verification": verification,
-            "citations": solve_result["citations"]
-        }
+        if result.get("error") == "verification_failed":
+            status.update(label="Verification Alert", state="error")
+        else:
+            status.update(label="Solved!", state="complete")
+        return result, explanation_slot
+
+def solve_and_display(text_input):
+    result, explanation_slot = run_solver_pipeline(
+        text_input, stream=st.session_state.get("stream_responses", False)
+    )
+    display_results(result, explanation_slot)
+
+def display_summary(result):
+    """
+    Compact result view for queued problems (no feedback widgets).
+    """
+    if result.get("success"):
+        render_explanation(result["explanation"])
+    elif result.get("error") == "clarification":
+        st.error(result["data"]["clarification_question"])
+    else:
+        st.warning("⚠️ The verifier is not confident in the solution.")
+        st.markdown(result["solution"])
+
+def extract_batch(files):
+    """
+    OCRs every uploaded image / PDF page and queues the problems found.
+    """
+    queue = []
+    with st.status("Extracting text...", expanded=True) as status:
+        # Pages arrive in completion order
+        for result in get_batch_ocr().iter_results((f.name, f.getvalue()) for f in files):
+            label = f"{result['source']} page {result['page'] + 1}"
+            if result.get("error"):
+                st.error(f"OCR Error ({label}): {result['error']}")
+                continue
+            problems = split_problems(result["text"])
+            status.write(f"{label}: {len(problems)} problem(s)")
+            for text in problems:
+                queue.append({"source": result["source"], "page": result["page"], "text": text})
+        status.update(label=f"Queued {len(queue)} problem(s)", state="complete")
+    queue.sort(key=lambda item: (item["source"], item["page"]))
+    st.session_state.problem_queue = queue
+
+def solve_queue():
+    for i, item in enumerate(st.session_state.problem_queue, 1):
+        with st.expander(f"Problem {i} ({item['source']}, page {item['page'] + 1})", expanded=True):
+            result, _ = run_solver_pipeline(item["text"])
+            display_summary(result)
 
 # --- UI Layout ---
 
@@ -193,6 +279,32 @@ with st.sidebar:
                 st.error("Invalid Key Format")
     
     input_mode = st.radio("Input Mode", ["Text", "Image", "Audio"])
+    warm_up(input_mode)
+    st.toggle(
+        "Stream responses",
+        value=os.getenv("STREAM_RESPONSES", "1") == "1",
+        key="stream_responses",
+        help="Show the solution and explanation as they are generated."
+    )
+    st.toggle(
+        "Speculative explanation",
+        value=os.getenv("SPECULATIVE_EXPLAIN", "0") == "1",
+        key="speculative_explain",
+        help="Draft the explanation while the verifier runs. Faster when verification passes, wasted tokens when it fails."
+    )
+    if SPECULATION_STATS.launched:
+        with st.expander("Speculation stats"):
+            st.json(SPECULATION_STATS.snapshot())
+    if cache_enabled():
+        with st.expander("LLM cache stats"):
+            st.json(cache_stats())
+    if os.getenv("ANSWER_CACHE", "1") == "1":
+        with st.expander("Answer cache stats"):
+            st.json(get_answer_cache().stats())
+    warmup_status = get_warmup().status()
+    if warmup_status:
+        with st.expander("Model warm-up"):
+            st.json(warmup_status)
     st.divider()
     st.info("System Ready")
 
@@ -207,14 +319,31 @@ if input_mode == "Text":
     problem = st.text_area("Enter your math problem here:", height=150, value=st.session_state.extracted_text)
     if st.button("Solve"):
         if problem.strip():
-            result = run_solver_pipeline(problem)
-            display_results(result)
+            solve_and_display(problem)
         else:
             st.warning("Please enter a problem.")
 
 elif input_mode == "Image":
-    uploaded_file = st.file_uploader("Upload an image", type=["jpg", "png", "jpeg"])
-    
+    uploaded_files = st.file_uploader(
+        "Upload images or a PDF worksheet", type=["jpg", "png", "jpeg", "pdf"], accept_multiple_files=True
+    )
+    single_image = len(uploaded_files) == 1 and not uploaded_files[0].name.lower().endswith(".pdf")
+    uploaded_file = uploaded_files[0] if single_image else None
+
+    if uploaded_files and not single_image:
+        st.write(f"{len(uploaded_files)} file(s) uploaded.")
+        if st.button("Extract All"):
+            extract_batch(uploaded_files)
+
+    if st.session_state.get("problem_queue") and not single_image:
+        st.subheader("Queued Problems")
+        for i, item in enumerate(st.session_state.problem_queue):
+            item["text"] = st.text_area(
+                f"Problem {i + 1} ({item['source']}, page {item['page'] + 1})", value=item["text"], key=f"queued_{i}"
+            )
+        if st.button("Solve All"):
+            solve_queue()
+
     if uploaded_file:
         st.image(uploaded_file, caption="Uploaded Problem", use_container_width=True)
         if st.button("Extract Text"):
@@ -225,7 +354,8 @@ elif input_mode == "Image":
                     st.error(f"OCR Error: {result['error']}")
                 else:
                     st.session_state.extracted_text = result["text"]
-                    st.success(f"Extracted (Conf: {result['confidence']:.2f})")
+                    cached = " from cache" if result.get("cached") else ""
+                    st.success(f"Extracted{cached} (Conf: {result['confidence']:.2f})")
                     st.rerun()
 
     if st.session_state.extracted_text:
@@ -233,8 +363,7 @@ elif input_mode == "Image":
         edited_text = st.text_area("Edit text if incorrect:", value=st.session_state.extracted_text, height=150)
         st.session_state.extracted_text = edited_text
         if st.button("Confirm & Solve"):
-             result = run_solver_pipeline(st.session_state.extracted_text)
-             display_results(result)
+             solve_and_display(st.session_state.extracted_text)
 
 elif input_mode == "Audio":
     tab_upload, tab_record = st.tabs(["📂 Upload File", "🎙️ Record Audio"])
@@ -268,7 +397,12 @@ elif input_mode == "Audio":
                     audio_proc = get_audio_processor()
                     # Export to bytes
                     audio_bytes = audio_value.getvalue()
-                    result = audio_proc.process_audio(audio_bytes)
+                    # Partial transcript is shown as each speech chunk finishes
+                    partial = st.empty()
+                    for result in audio_proc.stream_audio(audio_bytes):
+                        if not result["done"]:
+                            partial.markdown(result["text"] + "▌")
+                    partial.empty()
                     if result.get("error"):
                         st.error(f"ASR Error: {result['error']}")
                     else:
@@ -280,8 +414,7 @@ elif input_mode == "Audio":
         edited_text = st.text_area("Edit text if incorrect:", value=st.session_state.extracted_text, height=150)
         st.session_state.extracted_text = edited_text
         if st.button("Confirm & Solve"):
-             result = run_solver_pipeline(st.session_state.extracted_text)
-             display_results(result)
+             solve_and_display(st.session_state.extracted_text)
 
 
 
@@ -0,0 +1,91 @@
+"""
+Per-request audio loading overhead: in-memory decoding vs Whisper's
+temp-file + ffmpeg loader.
+
+    python benchmarks/audio_decode.py [files ...] [--repeat 20] [--transcribe base]
+
+Without files, short synthetic WAV recordings (1, 3 and 10 s, 44.1 kHz
+stereo, like a browser recording) are generated.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.metrics import summarize
+from src.utils.audio import AudioProcessor
+from src.utils.audio_decode import decode_audio
+
+
+def synthetic_wav(seconds, sr=44100):
+    import soundfile as sf
+    t = np.arange(int(seconds * sr)) / sr
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * np.random.default_rng(0).standard_normal(len(t))
+    buffer = io.BytesIO()
+    sf.write(buffer, np.stack([tone, tone], axis=1).astype(np.float32), sr, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def load_inputs(files):
+    if files:
+        inputs = {}
+        for path in files:
+            with open(path, "rb") as file:
+                inputs[os.path.basename(path)] = file.read()
+        return inputs
+    return {f"synthetic_{seconds}s.wav": synthetic_wav(seconds) for seconds in (1, 3, 10)}
+
+
+def time_calls(fn, data, repeat):
+    fn(data)  # warm-up
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        seconds.append((time.perf_counter() - start) * 1000)
+    return summarize(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audio decode overhead per request.")
+    parser.add_argument("files", nargs="*", help="Audio files (default: synthetic recordings).")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per input and path.")
+    parser.add_argument("--transcribe", default=None, help="Also time full transcription with this Whisper model.")
+    parser.add_argument("--json", default=None, help="Write results here.")
+    args = parser.parse_args()
+
+    results = {}
+    for name, data in load_inputs(args.files).items():
+        row = {
+            "memory_ms": time_calls(decode_audio, data, args.repeat),
+            "file_ms": time_calls(AudioProcessor._load_via_file, data, args.repeat),
+        }
+        row["decoder"] = decode_audio(data)[1]
+        results[name] = row
+        print(f"{name:<28} decoder={row['decoder']:<9} memory p50 {row['memory_ms']['p50']:8.2f} ms   "
+              f"file p50 {row['file_ms']['p50']:8.2f} ms")
+
+    if args.transcribe:
+        processor = AudioProcessor(model_size=args.transcribe, cache=False)
+        for name, data in load_inputs(args.files).items():
+            for mode in ("memory", "file"):
+                processor.decode = mode
+                start = time.perf_counter()
+                processor.process_audio(data)
+                results[name][f"transcribe_{mode}_s"] = round(time.perf_counter() - start, 3)
+            print(f"{name:<28} transcribe memory {results[name]['transcribe_memory_s']:.2f}s   "
+                  f"file {results[name]['transcribe_file_s']:.2f}s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Latency and accuracy of each CPU inference profile (threads, int8
+quantization, Whisper model size) for transcription and OCR.
+
+    python benchmarks/inference_profiles.py --audio clips/ --images images/ \
+        [--profiles default,fast,accurate] [--threads 4] [--repeat 1] [--json out.json]
+
+Every audio clip (wav/mp3/m4a/ogg/flac) and image (jpg/png) may have a
+ground-truth transcription next to it with the same name and a .txt
+extension; WER/CER are reported where one exists. Each profile runs in a
+fresh interpreter, since torch's thread pools can only be sized once per
+process. Model loading is timed separately and not counted as latency.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from benchmarks.metrics import cer, summarize, wer
+from src.utils.inference import PROFILES
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".ogg", ".flac")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+# Would override the preset under test
+PROFILE_OVERRIDES = ("WHISPER_MODEL", "WHISPER_AUTO_SIZES", "WHISPER_QUANTIZE", "OCR_QUANTIZE")
+
+
+def list_files(path, extensions):
+    if not path:
+        return []
+    if os.path.isfile(path):
+        return [path]
+    return sorted(
+        os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(extensions)
+    )
+
+
+def ground_truth(path):
+    txt_path = os.path.splitext(path)[0] + ".txt"
+    if not os.path.exists(txt_path):
+        return None
+    with open(txt_path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def measure(process, files, repeat):
+    rows = []
+    for path in files:
+        with open(path, "rb") as file:
+            data = file.read()
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = process(data)
+            seconds.append(time.perf_counter() - start)
+        row = {"file": os.path.basename(path), "seconds": round(min(seconds), 3), "text": result.get("text", "")}
+        for key in ("model", "error"):
+            if result.get(key):
+                row[key] = result[key]
+        reference = ground_truth(path)
+        if reference is not None:
+            row["wer"] = round(wer(reference, row["text"]), 4)
+            row["cer"] = round(cer(reference, row["text"]), 4)
+        rows.append(row)
+    return rows
+
+
+def run_profile(name, audio, images, repeat):
+    """
+    Runs in the child interpreter; returns this profile's report.
+    """
+    from src.utils.inference import InferenceProfile
+    profile = InferenceProfile(name)
+    report = {"profile": repr(profile), "threads": list(profile.apply())}
+
+    if audio:
+        from src.utils.audio import AudioProcessor
+        start = time.perf_counter()
+        processor = AudioProcessor(cache=False, profile=profile)
+        report["audio_load_s"] = round(time.perf_counter() - start, 2)
+        # Load every model size the clips need before timing
+        measure(processor.process_audio, audio, 1)
+        report["audio"] = measure(processor.process_audio, audio, repeat)
+
+    if images:
+        from src.utils.ocr import OCRProcessor
+        start = time.perf_counter()
+        ocr = OCRProcessor(cache=False, profile=profile)
+        report["ocr_load_s"] = round(time.perf_counter() - start, 2)
+        report["ocr"] = measure(ocr.process_image, images, repeat)
+    return report
+
+
+def spawn(name, args):
+    env = {key: value for key, value in os.environ.items() if key not in PROFILE_OVERRIDES}
+    env["MEDIA_CACHE"] = "0"
+    if args.threads:
+        env["INFERENCE_THREADS"] = str(args.threads)
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--repeat", str(args.repeat)]
+    if args.audio:
+        cmd += ["--audio", args.audio]
+    if args.images:
+        cmd += ["--images", args.images]
+    process = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT, env=env)
+    lines = process.stdout.strip().splitlines()
+    if process.returncode != 0 or not lines:
+        return {"error": process.stderr.strip()[-500:]}
+    return json.loads(lines[-1])
+
+
+def summary(rows):
+    result = {"seconds": summarize([row["seconds"] for row in rows])}
+    scored = [row for row in rows if "wer" in row]
+    if scored:
+        result["wer"] = summarize([row["wer"] for row in scored])
+        result["cer"] = summarize([row["cer"] for row in scored])
+    return result
+
+
+def report(name, result):
+    print(f"\n== {name} ==")
+    if result.get("error"):
+        print(f"ERROR {result['error']}")
+        return
+    print(f"{result['profile']}  threads in effect {result['threads']}")
+    for kind in ("audio", "ocr"):
+        if kind not in result:
+            continue
+        print(f"{kind}: models loaded in {result[f'{kind}_load_s']:.2f}s")
+        for row in result[kind]:
+            accuracy = f"  WER {row['wer']:.3f}  CER {row['cer']:.3f}" if "wer" in row else ""
+            model = f"  [{row['model']}]" if "model" in row else ""
+            print(f"  {row['file']:<32} {row['seconds']:7.2f}s{accuracy}{model}"
+                  f"{'  ERROR ' + row['error'] if 'error' in row else ''}")
+        result[f"{kind}_summary"] = summary(result[kind])
+        print(f"  summary: {json.dumps(result[f'{kind}_summary'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and WER/CER per CPU inference profile.")
+    parser.add_argument("--audio", default=None, help="Audio file or directory of clips.")
+    parser.add_argument("--images", default=None, help="Image file or directory of images.")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Comma-separated profile names.")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="INFERENCE_THREADS for every profile (default: the profile's own).")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per file; the fastest is reported.")
+    parser.add_argument("--json", default=None, help="Write results here.")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    audio = list_files(args.audio, AUDIO_EXTENSIONS)
+    images = list_files(args.images, IMAGE_EXTENSIONS)
+    if args.child:
+        print(json.dumps(run_profile(args.child, audio, images, args.repeat)))
+        return
+    if not audio and not images:
+        parser.error("pass --audio and/or --images")
+
+    results = {}
+    for name in args.profiles.split(","):
+        name = name.strip()
+        results[name] = spawn(name, args)
+        report(name, results[name])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import re
+
+
+def edit_distance(reference, hypothesis):
+    """
+    Levenshtein distance between two sequences (strings or token lists).
+    """
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_item in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_item in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_item != hyp_item)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", (text or "").lower()).strip()
+
+
+def cer(reference, hypothesis):
+    """
+    Character error rate after lowercasing and collapsing whitespace.
+    """
+    reference, hypothesis = normalize(reference), normalize(hypothesis)
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    return edit_distance(reference, hypothesis) / len(reference)
+
+
+def wer(reference, hypothesis):
+    """
+    Word error rate after lowercasing and stripping punctuation.
+    """
+    reference = re.findall(r"[\w'^=+\-*/]+", normalize(reference))
+    hypothesis = re.findall(r"[\w'^=+\-*/]+", normalize(hypothesis))
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    return edit_distance(reference, hypothesis) / len(reference)
+
+
+def summarize(values):
+    values = sorted(values)
+    if not values:
+        return {"n": 0}
+    return {
+        "n": len(values),
+        "mean": round(sum(values) / len(values), 4),
+        "p50": round(values[len(values) // 2], 4),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 4),
+    }
@@ -0,0 +1,113 @@
+"""
+Compares OCR latency and accuracy with and without preprocessing.
+
+    python benchmarks/ocr_preprocess.py path/to/images [--repeat 3] [--json out.json]
+
+Every image (jpg/png) may have a ground-truth transcription next to it with
+the same name and a .txt extension; CER/WER are reported where one exists.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.metrics import cer, summarize, wer
+from src.utils.ocr import OCRProcessor
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+# EasyOCR's own defaults, i.e. the behaviour before preprocessing existed
+BASELINE_OPTIONS = {"canvas_size": 2560, "mag_ratio": 1.0, "batch_size": 1}
+
+
+def list_images(path):
+    if os.path.isfile(path):
+        return [path]
+    return sorted(
+        os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def ground_truth(image_path):
+    txt_path = os.path.splitext(image_path)[0] + ".txt"
+    if not os.path.exists(txt_path):
+        return None
+    with open(txt_path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def run_config(ocr, images, repeat):
+    rows = []
+    for image_path in images:
+        with open(image_path, "rb") as file:
+            data = file.read()
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = ocr.process_image(data)
+            seconds.append(time.perf_counter() - start)
+        row = {"image": os.path.basename(image_path), "seconds": min(seconds), "text": result.get("text", "")}
+        if result.get("error"):
+            row["error"] = result["error"]
+        reference = ground_truth(image_path)
+        if reference is not None:
+            row["cer"] = round(cer(reference, row["text"]), 4)
+            row["wer"] = round(wer(reference, row["text"]), 4)
+        rows.append(row)
+    return rows
+
+
+def report(name, rows):
+    print(f"\n== {name} ==")
+    for row in rows:
+        accuracy = f"  CER {row['cer']:.3f}  WER {row['wer']:.3f}" if "cer" in row else ""
+        print(f"{row['image']:<32} {row['seconds']:7.2f}s{accuracy}{'  ERROR ' + row['error'] if 'error' in row else ''}")
+    summary = {"seconds": summarize([row["seconds"] for row in rows])}
+    scored = [row for row in rows if "cer" in row]
+    if scored:
+        summary["cer"] = summarize([row["cer"] for row in scored])
+        summary["wer"] = summarize([row["wer"] for row in scored])
+    print(f"summary: {json.dumps(summary)}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR latency/accuracy before and after preprocessing.")
+    parser.add_argument("images", help="Image file or directory of images.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per image; the fastest is reported.")
+    parser.add_argument("--canvas-size", type=int, default=None, help="canvas_size for the tuned run.")
+    parser.add_argument("--mag-ratio", type=float, default=None, help="mag_ratio for the tuned run.")
+    parser.add_argument("--batch-size", type=int, default=None, help="batch_size for the tuned run.")
+    parser.add_argument("--json", default=None, help="Write per-image results and summaries here.")
+    args = parser.parse_args()
+
+    images = list_images(args.images)
+    if not images:
+        sys.exit(f"No images found in {args.images}")
+
+    # One reader (model load) shared by both configurations; no result
+    # cache, so repeated runs measure OCR itself
+    ocr = OCRProcessor(
+        preprocess=True, canvas_size=args.canvas_size, mag_ratio=args.mag_ratio, batch_size=args.batch_size,
+        cache=False
+    )
+    tuned_preprocessor, tuned_options = ocr.preprocessor, ocr.readtext_options
+
+    ocr.preprocessor, ocr.readtext_options = None, BASELINE_OPTIONS
+    baseline = run_config(ocr, images, args.repeat)
+    ocr.preprocessor, ocr.readtext_options = tuned_preprocessor, tuned_options
+    tuned = run_config(ocr, images, args.repeat)
+
+    results = {
+        "baseline": {"options": BASELINE_OPTIONS, "rows": baseline, "summary": report("baseline", baseline)},
+        "preprocessed": {"options": tuned_options, "rows": tuned, "summary": report("preprocessed", tuned)},
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
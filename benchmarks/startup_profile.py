@@ -0,0 +1,121 @@
+"""
+Startup cost report: wall-clock import time and peak RSS of each heavy
+dependency and of the app's eager (pre-lazy) vs lazy import sets, each
+measured in a fresh interpreter.
+
+    python benchmarks/startup_profile.py [--top 15] [--json out.json]
+
+--top lists the slowest modules by cumulative time from -X importtime for
+the eager set.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# What app.py imported at startup before OCR/ASR/agents became lazy
+EAGER = [
+    "utils.ocr", "utils.audio", "agents.parser", "agents.router", "agents.parse_router", "agents.solver",
+    "agents.symbolic", "agents.verifier", "agents.explainer", "agents.pipeline", "agents.llm_cache",
+    "agents.runtime", "agents.answer_cache",
+]
+# What app.py imports at startup now
+LAZY = [
+    "utils.batch_ocr", "utils.warmup", "agents.engine", "agents.pipeline", "agents.llm_cache",
+]
+DEPENDENCIES = ["streamlit", "torch", "easyocr", "whisper", "langchain_core", "chromadb", "sympy",
+                "sentence_transformers"]
+
+PROBE = r"""
+import json, sys, time
+sys.path[:0] = [{root!r}, {src!r}]
+try:
+    import streamlit
+except ImportError:
+    pass
+def rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+base = rss_mb()
+start = time.perf_counter()
+error = None
+try:
+    for name in {modules!r}:
+        __import__(name)
+except Exception as e:
+    error = repr(e)
+print(json.dumps({{"seconds": time.perf_counter() - start, "rss_mb": rss_mb(), "added_mb": rss_mb() - base, "error": error}}))
+"""
+
+
+def probe(modules, importtime=False):
+    code = PROBE.format(root=ROOT, src=os.path.join(ROOT, "src"), modules=modules)
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    process = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+    lines = process.stdout.strip().splitlines()
+    result = json.loads(lines[-1]) if lines else {"error": process.stderr.strip()[-500:]}
+    return result, process.stderr
+
+
+def slowest_imports(stderr, top):
+    """
+    (cumulative seconds, module) from -X importtime output, top-level
+    packages only.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        # Nested imports are indented past the single leading space
+        name = parts[2][1:]
+        if name.startswith(" ") or "." in name:
+            continue
+        rows.append((int(parts[1]) / 1e6, name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time and RSS profile of app startup.")
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to list.")
+    parser.add_argument("--json", default=None, help="Write results here.")
+    args = parser.parse_args()
+
+    report = {"dependencies": {}, "app": {}}
+    print("Each row: fresh interpreter, with streamlit (if installed) preloaded as the baseline\n")
+    for name in DEPENDENCIES:
+        result, _ = probe([name])
+        report["dependencies"][name] = result
+        print(f"{name:<24} {result.get('seconds', 0):6.2f}s  +{result.get('added_mb', 0):7.1f} MB"
+              f"{'  ' + result['error'] if result.get('error') else ''}")
+
+    print()
+    for label, modules in (("eager (before)", EAGER), ("lazy (now)", LAZY)):
+        result, stderr = probe(modules, importtime=label.startswith("eager"))
+        report["app"][label] = result
+        print(f"app {label:<20} {result.get('seconds', 0):6.2f}s  +{result.get('added_mb', 0):7.1f} MB  "
+              f"peak {result.get('rss_mb', 0):7.1f} MB{'  ' + result['error'] if result.get('error') else ''}")
+        if label.startswith("eager") and args.top:
+            report["slowest_imports"] = slowest_imports(stderr, args.top)
+
+    if report.get("slowest_imports"):
+        print("\nSlowest top-level imports (cumulative, eager set):")
+        for seconds, name in report["slowest_imports"]:
+            print(f"  {name:<30} {seconds:6.2f}s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
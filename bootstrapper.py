@@ -1,56 +1,328 @@
+import argparse
+import concurrent.futures
+import hashlib
+import json
 import os
+import random
 import sys
+import time
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.rag.store import RAGStore
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
+from src.rag.topics import normalize_topic
 from langchain_text_splitters import MarkdownHeaderTextSplitter
 
-def bootstrap():
-    print("Bootstrapping RAG Knowledge Base...")
-    
+# Bump when chunking or chunk metadata changes, so every file is re-split
+# (content-hash IDs then pick up the change) even if its text did not.
+INGEST_VERSION = 2
+
+HEADERS_TO_SPLIT_ON = [
+    ("#", "Header 1"),
+    ("##", "Header 2"),
+    ("###", "Header 3"),
+]
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def chunk_id(doc):
+    """
+    Content-addressed ID: the same text under the same headers and source
+    always maps to the same ID, so re-ingesting it is a no-op.
+    """
+    payload = json.dumps({"content": doc.page_content, "metadata": doc.metadata}, sort_keys=True)
+    return content_hash(payload)
+
+def split_markdown(text, source):
+    markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=HEADERS_TO_SPLIT_ON)
+    md_header_splits = markdown_splitter.split_text(text)
+
+    # Add source and topic metadata; the topic comes from the top-level
+    # folder or file name (e.g. algebra.md, calculus/limits.md), then the title
+    topic = normalize_topic(source.split("/")[0])
+    for split in md_header_splits:
+        split.metadata["source"] = source
+        split.metadata["topic"] = topic if topic != "other" else normalize_topic(split.metadata.get("Header 1"))
+
+    # Identical chunks within a file collapse to one ID
+    chunks = {}
+    for split in md_header_splits:
+        chunks.setdefault(chunk_id(split), split)
+    return chunks
+
+def list_kb_files(kb_path):
+    """
+    Markdown files under kb_path (recursively), as paths relative to it.
+    """
+    files = []
+    for root, _, names in os.walk(kb_path):
+        for name in names:
+            if name.endswith(".md"):
+                rel = os.path.relpath(os.path.join(root, name), kb_path)
+                files.append(rel.replace(os.sep, "/"))
+    return sorted(files)
+
+def read_and_split(kb_path, rel):
+    with open(os.path.join(kb_path, rel), "r", encoding="utf-8") as file:
+        text = file.read()
+    return content_hash(text), split_markdown(text, rel)
+
+def _split_worker(args):
+    # Process-pool entry point; returns plain data to keep pickling cheap
+    kb_path, rel = args
+    digest, chunks = read_and_split(kb_path, rel)
+    return rel, digest, {cid: (doc.page_content, doc.metadata) for cid, doc in chunks.items()}
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {"version": INGEST_VERSION, "files": {}}
+    with open(path, "r", encoding="utf-8") as file:
+        manifest = json.load(file)
+    if manifest.get("version") != INGEST_VERSION:
+        # Keep chunk IDs (for stale deletion) but force every file to re-split
+        for entry in manifest.get("files", {}).values():
+            entry["hash"] = None
+        manifest["version"] = INGEST_VERSION
+    return manifest
+
+def save_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def _kb_path():
     kb_path = os.path.join(os.getcwd(), "data", "knowledge_base")
     if not os.path.exists(kb_path):
         print(f"Knowledge base directory not found: {kb_path}")
+        return None
+    return kb_path
+
+def _is_unchanged(rag, previous, digest):
+    if not previous or previous["hash"] != digest:
+        return False
+    previous_ids = set(previous["chunk_ids"])
+    return rag.existing_ids(previous_ids) == previous_ids
+
+def bootstrap():
+    """
+    Incrementally syncs data/knowledge_base into the vector store.
+
+    Files whose hash matches the manifest are skipped, changed files only
+    embed chunks that are not stored yet, and chunks from edited or deleted
+    sections/files are removed.
+    """
+    print("Bootstrapping RAG Knowledge Base...")
+
+    kb_path = _kb_path()
+    if kb_path is None:
         return
 
-    # Load all markdown files
-    files = [f for f in os.listdir(kb_path) if f.endswith(".md")]
-    all_splits = []
-    
-    headers_to_split_on = [
-        ("#", "Header 1"),
-        ("##", "Header 2"),
-        ("###", "Header 3"),
-    ]
-    check = set()
-    
+    files = list_kb_files(kb_path)
+
+    rag = RAGStore()
+    path = rag.manifest_path
+    manifest = load_manifest(path)
+    previous_files = manifest.get("files", {})
+    new_files = {}
+    counts = {"added": 0, "skipped": 0, "deleted": 0}
+
     for f in files:
-        path = os.path.join(kb_path, f)
-        with open(path, "r", encoding="utf-8") as file:
-            text = file.read()
-            
-        markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
-        md_header_splits = markdown_splitter.split_text(text)
-        
-        # Add source metadata
-        for split in md_header_splits:
-            split.metadata["source"] = f
-            
-        all_splits.extend(md_header_splits)
-        print(f"Processed {f}: {len(md_header_splits)} chunks")
-
-    if not all_splits:
-        print("No documents to add.")
+        digest, chunks = read_and_split(kb_path, f)
+        previous = previous_files.get(f)
+        previous_ids = set(previous["chunk_ids"]) if previous else set()
+
+        # Unchanged file whose chunks are all still stored: nothing to do
+        if _is_unchanged(rag, previous, digest):
+            counts["skipped"] += len(previous_ids)
+            new_files[f] = previous
+            print(f"Unchanged {f}: {len(previous_ids)} chunks")
+            continue
+
+        stored = rag.existing_ids(list(chunks))
+        to_add = [cid for cid in chunks if cid not in stored]
+        stale = previous_ids - set(chunks)
+
+        if to_add:
+            rag.add_documents([chunks[cid] for cid in to_add], ids=to_add)
+        rag.delete_documents(stale)
+
+        counts["added"] += len(to_add)
+        counts["skipped"] += len(chunks) - len(to_add)
+        counts["deleted"] += len(stale)
+        new_files[f] = {"hash": digest, "chunk_ids": sorted(chunks)}
+        print(f"Processed {f}: {len(chunks)} chunks ({len(to_add)} new, {len(stale)} removed)")
+
+    # Files removed from the knowledge base
+    for f, previous in previous_files.items():
+        if f not in new_files:
+            rag.delete_documents(previous["chunk_ids"])
+            counts["deleted"] += len(previous["chunk_ids"])
+            print(f"Removed {f}: {len(previous['chunk_ids'])} chunks")
+
+    manifest["files"] = new_files
+    save_manifest(path, manifest)
+    print(f"Lexical index: {rag.rebuild_lexical_index()} chunks")
+    print(f"Done! Added {counts['added']}, skipped {counts['skipped']}, deleted {counts['deleted']} chunks.")
+    return counts
+
+def embed_with_backoff(rag, texts, max_retries=5):
+    for attempt in range(max_retries):
+        try:
+            return rag.embed_documents(texts, cache=False)
+        except Exception as e:
+            if attempt == max_retries - 1:
+                raise
+            delay = min(60, 2 ** attempt) + random.uniform(0, 1)
+            print(f"Embedding batch failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def bulk_ingest(workers=None, batch_size=64, concurrency=4, write_batch=256, max_retries=5):
+    """
+    Bootstrap for large knowledge bases. Same incremental semantics as
+    bootstrap(), but:
+      - files are read and split in a process pool,
+      - embeddings are requested in batches of batch_size with at most
+        `concurrency` requests in flight, retried with exponential back-off,
+      - vectors are written to Chroma in chunks of write_batch.
+    The manifest is saved as each file completes, so an interrupted run
+    resumes where it stopped (already stored chunk IDs are not re-embedded).
+    """
+    print("Bulk-ingesting RAG Knowledge Base...")
+
+    kb_path = _kb_path()
+    if kb_path is None:
         return
 
-    # Initialize Store and Add
-    print(f"Adding {len(all_splits)} chunks to Vector Store...")
+    files = list_kb_files(kb_path)
     rag = RAGStore()
-    rag.add_documents(all_splits)
-    print("Done! Vector Store populated.")
+    path = rag.manifest_path
+    manifest = load_manifest(path)
+    previous_files = dict(manifest.get("files", {}))
+    # Entries are only replaced once a file is fully stored, so an
+    # interrupted run still knows which old chunks to delete next time.
+    manifest["files"] = dict(previous_files)
+    counts = {"added": 0, "skipped": 0, "deleted": 0}
+
+    pending = []      # (chunk id, text, metadata, file) still to embed
+    remaining = {}    # file -> chunks not yet written
+    completed = {}    # file -> manifest entry once all its chunks are stored
+    stale = {}        # file -> chunk ids to delete once the file completes
+
+    # 1. Split in parallel and plan the work
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [(kb_path, f) for f in files]
+        for rel, digest, chunks in pool.map(_split_worker, jobs, chunksize=8):
+            previous = previous_files.get(rel)
+            if _is_unchanged(rag, previous, digest):
+                counts["skipped"] += len(previous["chunk_ids"])
+                continue
+
+            stored = rag.existing_ids(list(chunks))
+            to_add = [cid for cid in chunks if cid not in stored]
+            counts["skipped"] += len(chunks) - len(to_add)
+            stale[rel] = set(previous["chunk_ids"]) - set(chunks) if previous else set()
+            completed[rel] = {"hash": digest, "chunk_ids": sorted(chunks)}
+            remaining[rel] = len(to_add)
+            for cid in to_add:
+                text, metadata = chunks[cid]
+                pending.append((cid, text, metadata, rel))
+    print(f"Split {len(files)} files in {time.perf_counter() - start:.1f}s: {len(pending)} chunks to embed")
+
+    def finish_file(rel):
+        rag.delete_documents(stale[rel])
+        counts["deleted"] += len(stale[rel])
+        manifest["files"][rel] = completed[rel]
+
+    for rel, left in remaining.items():
+        if left == 0:
+            finish_file(rel)
+
+    # 2. Embed in bounded concurrent batches, 3. write in chunks
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    buffer = []
+    done = 0
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal done
+        if not buffer:
+            return
+        for i in range(0, len(buffer), write_batch):
+            part = buffer[i:i + write_batch]
+            rag.add_embedded(
+                [item[0] for item, _ in part],
+                [item[1] for item, _ in part],
+                [item[2] for item, _ in part],
+                [vector for _, vector in part]
+            )
+        for item, _ in buffer:
+            remaining[item[3]] -= 1
+            if remaining[item[3]] == 0:
+                finish_file(item[3])
+        done += len(buffer)
+        counts["added"] += len(buffer)
+        buffer.clear()
+        save_manifest(path, manifest)
+
+        elapsed = time.perf_counter() - start
+        rate = done / elapsed if elapsed else 0.0
+        eta = (len(pending) - done) / rate if rate else 0.0
+        print(f"{done}/{len(pending)} chunks written ({rate:.1f} chunks/s, ETA {eta:.0f}s)")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        queued = iter(batches)
+        in_flight = {}
+        while True:
+            while len(in_flight) < concurrency:
+                batch = next(queued, None)
+                if batch is None:
+                    break
+                future = executor.submit(embed_with_backoff, rag, [item[1] for item in batch], max_retries)
+                in_flight[future] = batch
+            if not in_flight:
+                break
+            finished, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                batch = in_flight.pop(future)
+                buffer.extend(zip(batch, future.result()))
+            if len(buffer) >= write_batch:
+                flush()
+        flush()
+
+    # Files removed from the knowledge base
+    current = set(files)
+    for f, previous in previous_files.items():
+        if f not in current:
+            rag.delete_documents(previous["chunk_ids"])
+            counts["deleted"] += len(previous["chunk_ids"])
+            del manifest["files"][f]
+
+    save_manifest(path, manifest)
+    print(f"Lexical index: {rag.rebuild_lexical_index()} chunks")
+    print(f"Done! Added {counts['added']}, skipped {counts['skipped']}, deleted {counts['deleted']} chunks.")
+    return counts
 
 if __name__ == "__main__":
-    bootstrap()
+    parser = argparse.ArgumentParser(description="Load data/knowledge_base into the vector store.")
+    parser.add_argument("--bulk", action="store_true", help="Parallel, batched ingestion for large knowledge bases.")
+    parser.add_argument("--workers", type=int, default=None, help="Splitting processes (default: CPU count).")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per embedding request.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Embedding requests in flight.")
+    parser.add_argument("--write-batch", type=int, default=256, help="Chunks per Chroma write.")
+    parser.add_argument("--max-retries", type=int, default=5, help="Attempts per embedding batch.")
+    args = parser.parse_args()
+
+    if args.bulk:
+        bulk_ingest(
+            workers=args.workers,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            write_batch=args.write_batch,
+            max_retries=args.max_retries
+        )
+    else:
+        bootstrap()
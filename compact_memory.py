@@ -0,0 +1,25 @@
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from src.rag.store import RAGStore
+
+def compact(threshold=None, capacity=None):
+    print("Compacting solved-problem memory...")
+    rag = RAGStore()
+    stats = rag.memory.compact(threshold=threshold, capacity=capacity)
+    print(
+        f"Done! {stats['before']} entries -> {stats['after']} "
+        f"({stats['merged']} near-duplicates merged, {stats['evicted']} evicted)."
+    )
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge near-duplicate solved problems and enforce the memory capacity.")
+    parser.add_argument("--threshold", type=float, default=None, help="Cosine similarity for duplicates (default: MEMORY_DEDUP_THRESHOLD).")
+    parser.add_argument("--capacity", type=int, default=None, help="Maximum entries to keep (default: MEMORY_CAPACITY).")
+    args = parser.parse_args()
+    compact(threshold=args.threshold, capacity=args.capacity)
@@ -0,0 +1,213 @@
+"""
+Minimal HTTP service for the agent pipeline (standard library only).
+
+    python serve_api.py [--host 127.0.0.1] [--port 8600]
+
+    GET  /health       {"status": "ok", "agents_loaded": bool}
+    POST /solve        {"problem": "...", "speculative": false}
+                       -> {"status": ..., "result": {...}}
+    POST /solve/batch  {"problems": [{"id": ..., "problem": "..."}, ...]}
+                       -> application/x-ndjson, one {"id", "status", "result"}
+                          line per problem as it finishes
+
+Every request thread shares one MathEngine. At most API_MAX_CONCURRENCY
+problems are solved at once, counting each problem of a batch; requests
+that cannot get a slot for their first problem within API_QUEUE_TIMEOUT
+seconds get 503. When API_TOKEN is set, requests must
+send "Authorization: Bearer <token>".
+"""
+import argparse
+import hmac
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from dotenv import load_dotenv
+
+# Before importing the engine, which reads its settings at import time
+load_dotenv()
+
+from src.agents.engine import MathEngine, result_status
+
+MAX_BODY_BYTES = int(os.getenv("API_MAX_BODY_BYTES", str(1024 * 1024)))
+MAX_BATCH = int(os.getenv("API_MAX_BATCH", "500"))
+
+
+class SolveHandler(BaseHTTPRequestHandler):
+    # Set by serve()
+    engine = None
+    slots = None
+    queue_timeout = None
+    token = None
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "agents_loaded": self.engine.loaded})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path not in ("/solve", "/solve/batch"):
+            self._send_json(404, {"error": "not found"})
+            return
+        body = self._read_json()
+        if body is None:
+            return
+        if self.path == "/solve":
+            self._solve(body)
+        else:
+            self._solve_batch(body)
+
+    def _solve(self, body):
+        text = body.get("problem")
+        if not isinstance(text, str) or not text.strip():
+            self._send_json(400, {"error": "missing 'problem' text"})
+            return
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            self._send_json(503, {"error": "busy"}, headers={"Retry-After": "5"})
+            return
+        try:
+            result = self.engine.solve(text, speculative=body.get("speculative"))
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        finally:
+            self.slots.release()
+        self._send_json(200, {"status": result_status(result), "result": result})
+
+    def _solve_batch(self, body):
+        problems = body.get("problems")
+        if not isinstance(problems, list) or not problems:
+            self._send_json(400, {"error": "'problems' must be a non-empty list"})
+            return
+        if len(problems) > MAX_BATCH:
+            self._send_json(413, {"error": f"at most {MAX_BATCH} problems per batch"})
+            return
+        pairs = []
+        for number, item in enumerate(problems):
+            text = item.get("problem") if isinstance(item, dict) else None
+            if not isinstance(text, str) or not text.strip():
+                self._send_json(400, {"error": f"problems[{number}]: missing 'problem' text"})
+                return
+            pairs.append((item.get("id", number), text))
+
+        # Every problem in flight holds a slot. The first is waited for
+        # (or 503), the rest are taken as slots free up, by the engine's
+        # reader thread as it pulls the next problem.
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            self._send_json(503, {"error": "busy"}, headers={"Retry-After": "5"})
+            return
+        state = {"held": 1, "closed": False}
+        lock = threading.Lock()
+
+        def admitted():
+            yield pairs[0]
+            for pair in pairs[1:]:
+                self.slots.acquire()
+                with lock:
+                    if state["closed"]:
+                        # The batch ended while this thread was waiting
+                        self.slots.release()
+                        return
+                    state["held"] += 1
+                yield pair
+
+        try:
+            # HTTP/1.0 without Content-Length: the body ends when the
+            # connection closes, so lines can be written as they finish.
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            results = self.engine.solve_many(admitted())
+            try:
+                for problem_id, result in results:
+                    with lock:
+                        state["held"] -= 1
+                    self.slots.release()
+                    line = json.dumps({"id": problem_id, "status": result_status(result), "result": result}, default=str)
+                    self.wfile.write(line.encode("utf-8") + b"\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # Client went away; closing the generator cancels the rest
+                results.close()
+        finally:
+            with lock:
+                state["closed"] = True
+                held, state["held"] = state["held"], 0
+            for _ in range(held):
+                self.slots.release()
+
+    def _authorized(self):
+        if not self.token:
+            return True
+        supplied = self.headers.get("Authorization", "")
+        if hmac.compare_digest(supplied.encode("utf-8"), f"Bearer {self.token}".encode("utf-8")):
+            return True
+        self._send_json(401, {"error": "unauthorized"})
+        return False
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+        except ValueError:
+            length = -1
+        if length <= 0 or length > MAX_BODY_BYTES:
+            self._send_json(413 if length > MAX_BODY_BYTES else 400, {"error": "invalid body length"})
+            return None
+        try:
+            body = json.loads(self.rfile.read(length))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._send_json(400, {"error": "invalid JSON"})
+            return None
+        if not isinstance(body, dict):
+            self._send_json(400, {"error": "expected a JSON object"})
+            return None
+        return body
+
+    def _send_json(self, code, payload, headers=None):
+        data = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(host, port, engine=None):
+    SolveHandler.engine = engine or MathEngine()
+    SolveHandler.slots = threading.BoundedSemaphore(int(os.getenv("API_MAX_CONCURRENCY", "8")))
+    SolveHandler.queue_timeout = float(os.getenv("API_QUEUE_TIMEOUT", "30"))
+    SolveHandler.token = os.getenv("API_TOKEN") or None
+    server = ThreadingHTTPServer((host, port), SolveHandler)
+    print(f"Serving the math pipeline on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP endpoint for the agent pipeline.")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"), help="Interface to bind.")
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8600")), help="Port to listen on.")
+    parser.add_argument("--no-warmup", action="store_true", help="Build the agents on the first request instead.")
+    args = parser.parse_args()
+
+    engine = MathEngine()
+    if not args.no_warmup:
+        print("Loading agents...")
+        engine.agents
+    serve(args.host, args.port, engine)
@@ -0,0 +1,148 @@
+"""
+Solves a JSONL file of problems without the UI.
+
+    python solve_batch.py problems.jsonl [-o results.jsonl] [--concurrency 8] [--resume]
+
+Each input line is {"id": ..., "problem": "..."} ("text" is accepted for
+"problem"; a missing id defaults to the line number, and ids that are not
+strings are written as their JSON text, e.g. "7"). One result line per
+problem is written as soon as it finishes, so results arrive in completion
+order, not input order:
+
+    {"id": ..., "status": "solved" | "verification_failed" | "clarification" | "error" | "invalid_input",
+     "result": {...}}
+
+With --resume, ids already in the output file are skipped (unless they
+errored) and new results are appended, so an interrupted run can be
+restarted.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from dotenv import load_dotenv
+
+# Before importing the engine, which reads its settings at import time
+load_dotenv()
+
+from src.agents.engine import DEFAULT_CONCURRENCY, MathEngine, result_status
+
+
+def problem_key(problem_id):
+    """
+    An id as a string, so any JSON id (even a list or object) can be
+    looked up in the resume set.
+    """
+    return problem_id if isinstance(problem_id, str) else json.dumps(problem_id, sort_keys=True)
+
+
+def read_problems(lines, skip, invalid):
+    """
+    (id, text) pairs from JSONL lines. Unusable lines are reported through
+    invalid(id, message) and skipped.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        problem_id, text, error = number, None, None
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            item, error = None, f"invalid JSON: {e}"
+        if item is not None and not isinstance(item, dict):
+            error = "expected a JSON object"
+        elif item is not None:
+            problem_id = item.get("id", number)
+            text = item.get("problem") or item.get("text")
+            if not isinstance(text, str) or not text.strip():
+                error = "missing 'problem' text"
+        problem_id = problem_key(problem_id)
+        if problem_id in skip:
+            continue
+        if error:
+            invalid(problem_id, error)
+            continue
+        yield problem_id, text
+
+def completed_ids(path):
+    """
+    Ids with a result in path. Problems that errored are retried.
+    """
+    ids = set()
+    if not os.path.exists(path):
+        return ids
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+                if record["status"] != "error":
+                    ids.add(problem_key(record["id"]))
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a JSONL file of problems with the agent pipeline.")
+    parser.add_argument("input", help="JSONL file of problems ('-' for stdin).")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file (default: stdout).")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Problems in flight at once (default: ENGINE_CONCURRENCY).")
+    parser.add_argument("--speculative", action="store_true", help="Draft explanations while verifying.")
+    parser.add_argument("--no-answer-cache", action="store_true", help="Ignore verified answers cached earlier.")
+    parser.add_argument("--resume", action="store_true", help="Skip ids already in --output and append.")
+    args = parser.parse_args()
+
+    if args.resume and args.output == "-":
+        parser.error("--resume needs --output")
+    skip = completed_ids(args.output) if args.resume else set()
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "a" if args.resume else "w", encoding="utf-8")
+    counts = {}
+    # Invalid lines are reported from the engine's reader thread as they are read
+    lock = threading.Lock()
+
+    def write(problem_id, status, result):
+        line = json.dumps({"id": problem_id, "status": status, "result": result}, default=str)
+        with lock:
+            sink.write(line + "\n")
+            sink.flush()
+            counts[status] = counts.get(status, 0) + 1
+
+    def invalid(problem_id, message):
+        write(problem_id, "invalid_input", {"error": "invalid_input", "message": message})
+
+    engine = MathEngine(
+        answer_cache=False if args.no_answer_cache else None,
+        speculative=args.speculative or None
+    )
+    start = time.perf_counter()
+    try:
+        problems = read_problems(source, skip, invalid)
+        for problem_id, result in engine.solve_many(problems, concurrency=args.concurrency):
+            write(problem_id, result_status(result), result)
+    except KeyboardInterrupt:
+        print("Interrupted; rerun with --resume to continue.", file=sys.stderr)
+    finally:
+        for stream in (source, sink):
+            if stream not in (sys.stdin, sys.stdout):
+                stream.close()
+
+    elapsed = time.perf_counter() - start
+    done = sum(counts.values())
+    print(
+        f"{done} problem(s) in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.2f}/s)"
+        f"{', ' + str(len(skip)) + ' skipped' if skip else ''}: {json.dumps(counts)}",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
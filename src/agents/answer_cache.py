@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import unicodedata
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.utils.kvcache import SQLiteKV
+
+ANSWER_CACHE_PATH = os.getenv(
+    "ANSWER_CACHE_PATH", os.path.join(os.getcwd(), "data", "cache", "answers.sqlite3")
+)
+
+# OCR / speech artefacts and spelled-out operators
+_REPLACEMENTS = [
+    ("×", "*"), ("·", "*"), ("∗", "*"), ("÷", "/"), ("−", "-"), ("–", "-"), ("—", "-"),
+    ("²", "^2"), ("³", "^3"), ("√", "sqrt"), ("**", "^"),
+]
+_WORD_OPERATORS = [
+    (r"\bis equal to\b", "="), (r"\bequals?\b", "="), (r"\bdivided by\b", "/"), (r"\bover\b", "/"),
+    (r"\bplus\b", "+"), (r"\bminus\b", "-"), (r"\btimes\b", "*"), (r"\bmultiplied by\b", "*"),
+    (r"\bsquared\b", "^2"), (r"\bcubed\b", "^3"), (r"\bto the power of\b", "^"),
+]
+# Thousands separators: a full 1,234,567 grouping that is not inside
+# parentheses/brackets and not part of a comma-separated list, so the
+# point (1,100) and the number 1100 keep different keys
+_THOUSANDS = re.compile(r"(?<![\d.,(\[])(\d{1,3}(?:,\d{3})+)(?![\d)\]]|,\d)")
+
+
+def canonicalize(text):
+    """
+    Normalizes a problem statement so trivially different submissions of the
+    same problem compare equal: case, unicode and OCR/ASR operator noise,
+    number formatting (1,000 / 2.50), implicit multiplication and
+    whitespace. Variable names are kept: a cached solution is written in
+    the original problem's variables.
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    for old, new in _REPLACEMENTS:
+        text = text.replace(old, new)
+    for pattern, new in _WORD_OPERATORS:
+        text = re.sub(pattern, f" {new} ", text)
+
+    # Numbers: drop thousands separators and trailing decimal zeros
+    text = _THOUSANDS.sub(lambda m: m.group(1).replace(",", ""), text)
+    text = re.sub(r"(\d+)\.(\d*?)0+\b", lambda m: m.group(1) + ("." + m.group(2) if m.group(2) else ""), text)
+
+    # Implicit multiplication and whitespace around operators
+    text = re.sub(r"(\d)\s*\*\s*(?=[a-z](?![a-z]))", r"\1", text)
+    text = re.sub(r"\s*([=+\-*/^(),<>])\s*", r"\1", text)
+    text = re.sub(r"\s+", " ", text).strip(" .?!:;")
+    return text
+
+
+# Bumped whenever canonicalize() changes, so old keys can never match
+KEY_VERSION = 2
+
+
+def fingerprint(text):
+    return hashlib.sha256(f"{KEY_VERSION}:{canonicalize(text)}".encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """
+    Verified pipeline results keyed on canonical problem fingerprints.
+
+    Entries record the knowledge base version they were produced with and
+    are treated as misses (and dropped) once the KB changes.
+    """
+    def __init__(self, kb_version=None, path=ANSWER_CACHE_PATH, max_entries=None, ttl=None):
+        if max_entries is None:
+            max_entries = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "20000"))
+        if ttl is None and os.getenv("ANSWER_CACHE_TTL_HOURS"):
+            ttl = float(os.getenv("ANSWER_CACHE_TTL_HOURS")) * 3600
+        self.store = SQLiteKV(path, table="answers", max_entries=max_entries, ttl=ttl)
+        self.kb_version = kb_version or (lambda: "none")
+        self.invalidated = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, text):
+        key = fingerprint(text)
+        value = self.store.get(key)
+        if value is None:
+            return None
+        entry = json.loads(value)
+        if entry["kb_version"] != self.kb_version():
+            self.store.delete(key)
+            with self._lock:
+                self.invalidated += 1
+            return None
+        return entry["result"]
+
+    def store_result(self, texts, result):
+        """
+        Stores a successful result under the fingerprint of every text given
+        (e.g. the raw input and the parsed problem_text).
+        """
+        value = json.dumps({"kb_version": self.kb_version(), "result": result}, default=str)
+        for key in {fingerprint(text) for text in texts if text}:
+            self.store.set(key, value)
+
+    def stats(self):
+        stats = self.store.stats()
+        stats["invalidated"] = self.invalidated
+        return stats
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import queue
+import threading
+
+from .answer_cache import AnswerCache
+from .pipeline import run_pipeline
+from .runtime import CallbackRelay, get_event_loop, run_coroutine
+
+# Problems in flight at once for solve_many / asolve_many
+DEFAULT_CONCURRENCY = int(os.getenv("ENGINE_CONCURRENCY", "8"))
+# End of the problems iterable
+_END = object()
+
+
+def build_agents():
+    """
+    One instance of every pipeline agent. The agent modules (langchain,
+    chromadb, sympy) are imported here, so importing the engine is cheap.
+    """
+    from .parser import ParserAgent
+    from .router import IntentRouter
+    from .parse_router import ParseRouteAgent
+    from .solver import SolverAgent
+    from .symbolic import SymbolicSolver
+    from .verifier import VerifierAgent
+    from .explainer import ExplainerAgent
+    return {
+        "parser": ParserAgent(),
+        "router": IntentRouter(),
+        "parse_router": ParseRouteAgent(),
+        "solver": SolverAgent(),
+        "symbolic": SymbolicSolver(),
+        "verifier": VerifierAgent(),
+        "explainer": ExplainerAgent()
+    }
+
+
+def result_status(result):
+    """
+    "solved", "verification_failed", "clarification" or "error".
+    """
+    if result.get("success"):
+        return "solved"
+    if result.get("error") in ("verification_failed", "clarification"):
+        return result["error"]
+    return "error"
+
+
+class MathEngine:
+    """
+    The parse -> route -> solve -> verify -> explain pipeline without a UI.
+
+    Agents are built on first use and shared by every request. Requests run
+    on the process-wide event loop (see runtime.get_event_loop), so one
+    engine serves any number of threads or coroutines at once.
+    """
+    def __init__(self, agents=None, answer_cache=None, speculative=None, fused_parse=None):
+        self._agents = agents
+        self._agents_lock = threading.Lock()
+
+        if answer_cache is None:
+            answer_cache = os.getenv("ANSWER_CACHE", "1") == "1"
+        # Entries are invalidated whenever the knowledge base is re-ingested.
+        # Resolved on lookup, so creating the cache does not load the agents.
+        self.answer_cache = (
+            AnswerCache(kb_version=lambda: self.agents["solver"].rag.kb_version())
+            if answer_cache is True else (answer_cache or None)
+        )
+        if speculative is None:
+            speculative = os.getenv("SPECULATIVE_EXPLAIN", "0") == "1"
+        self.speculative = speculative
+        if fused_parse is None:
+            fused_parse = os.getenv("PARSE_MODE", "fused") == "fused"
+        self.fused_parse = fused_parse
+
+    @property
+    def agents(self):
+        with self._agents_lock:
+            if self._agents is None:
+                self._agents = build_agents()
+            return self._agents
+
+    @property
+    def loaded(self):
+        return self._agents is not None
+
+    async def asolve(self, text, on_status=None, on_token=None, speculative=None):
+        """
+        Runs the pipeline for one problem; see pipeline.run_pipeline for the
+        callbacks and the result dict.
+        """
+        # Building the agents takes seconds; keep it off the event loop
+        agents = self._agents if self.loaded else await asyncio.to_thread(lambda: self.agents)
+        return await run_pipeline(
+            agents,
+            text,
+            on_status=on_status,
+            speculative=self.speculative if speculative is None else speculative,
+            on_token=on_token,
+            answer_cache=self.answer_cache,
+            fused_parse=self.fused_parse
+        )
+
+    def solve(self, text, on_status=None, on_token=None, speculative=None):
+        """
+        Blocking asolve. Callbacks run on the calling thread.
+        """
+        relay = CallbackRelay()
+        return run_coroutine(
+            self.asolve(text, on_status=relay.wrap(on_status), on_token=relay.wrap(on_token), speculative=speculative),
+            relay
+        )
+
+    async def asolve_many(self, problems, concurrency=None):
+        """
+        Solves (problem_id, text) pairs with at most `concurrency` in flight
+        and yields (problem_id, result) as each finishes. problems is read
+        lazily, only as slots free up, and in a worker thread, so a slow
+        source (stdin, a network stream) never blocks the shared event
+        loop. A problem that raises yields an {"error": "exception"}
+        result instead of stopping the batch.
+        """
+        concurrency = max(concurrency or DEFAULT_CONCURRENCY, 1)
+        problems = iter(problems)
+        pending = set()
+
+        async def one(problem_id, text):
+            try:
+                return problem_id, await self.asolve(text)
+            except Exception as e:
+                return problem_id, {"error": "exception", "message": f"{type(e).__name__}: {e}"}
+
+        # The next problem being read, concurrently with the ones in flight
+        reading = None
+        exhausted = False
+        try:
+            while True:
+                if reading is None and not exhausted and len(pending) < concurrency:
+                    reading = asyncio.ensure_future(asyncio.to_thread(next, problems, _END))
+                if reading is None and not pending:
+                    return
+                waiting = pending | {reading} if reading is not None else pending
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                if reading in done:
+                    done.discard(reading)
+                    problem, reading = reading.result(), None
+                    if problem is _END:
+                        exhausted = True
+                    else:
+                        pending.add(asyncio.ensure_future(one(*problem)))
+                pending -= done
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if reading is not None:
+                reading.cancel()
+
+    def solve_many(self, problems, concurrency=None):
+        """
+        Blocking asolve_many: a generator yielding (problem_id, result) on
+        the calling thread in completion order. Closing it early cancels the
+        problems still in flight.
+        """
+        results = queue.Queue()
+        finished = object()
+
+        async def produce():
+            try:
+                async for item in self.asolve_many(problems, concurrency):
+                    results.put(item)
+            finally:
+                results.put(finished)
+
+        future = asyncio.run_coroutine_threadsafe(produce(), get_event_loop())
+        try:
+            while True:
+                item = results.get()
+                if item is finished:
+                    break
+                yield item
+        except BaseException:
+            future.cancel()
+            raise
+        # Re-raises anything that stopped the batch (e.g. a bad problems iterable)
+        future.result()
@@ -1,10 +1,10 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from .llm import get_llm
+from .llm import get_llm, stream_text, astream_text
 
 class ExplainerAgent:
-    def __init__(self):
-        self.llm = get_llm()
+    def __init__(self, use_cache=True):
+        self.llm = get_llm(agent="explainer", use_cache=use_cache)
         
         self.prompt = ChatPromptTemplate.from_template(
             """
@@ -27,8 +27,34 @@ class ExplainerAgent:
         )
         self.chain = self.prompt | self.llm | StrOutputParser()
 
-    def explain(self, problem_text: str, solution_text: str, citations: list = []):
-        return self.chain.invoke({
+    def _inputs(self, problem_text: str, solution_text: str):
+        return {
             "problem": problem_text,
             "solution": solution_text
-        })
+        }
+
+    def explain(self, problem_text: str, solution_text: str, citations: list = []):
+        return self.chain.invoke(self._inputs(problem_text, solution_text))
+
+    async def aexplain(self, problem_text: str, solution_text: str, citations: list = [], on_token=None):
+        """
+        If on_token is given, the explanation is streamed and on_token is
+        called with the accumulated text after every chunk.
+        """
+        if on_token is None:
+            return await self.chain.ainvoke(self._inputs(problem_text, solution_text))
+        explanation = ""
+        async for chunk in self.astream(problem_text, solution_text):
+            explanation += chunk
+            on_token(explanation)
+        return explanation
+
+    def stream(self, problem_text: str, solution_text: str):
+        """
+        Yields explanation text chunks as the model produces them.
+        """
+        yield from stream_text(self.prompt, self.llm, self._inputs(problem_text, solution_text))
+
+    async def astream(self, problem_text: str, solution_text: str):
+        async for chunk in astream_text(self.prompt, self.llm, self._inputs(problem_text, solution_text)):
+            yield chunk
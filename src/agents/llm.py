@@ -1,15 +1,56 @@
 import os
+import threading
+import httpx
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.outputs import ChatGeneration
 from dotenv import load_dotenv
 
 from langchain_groq import ChatGroq
 
+from .llm_cache import cache_enabled, get_response_cache
+
 load_dotenv()
 
-def get_llm():
+# Process-wide registry: one client per (provider, model), all sharing one
+# keep-alive HTTP connection pool.
+_clients = {}
+_clients_lock = threading.Lock()
+_http_clients = None
+_http_lock = threading.Lock()
+
+def get_http_clients():
+    """
+    Returns the shared (httpx.Client, httpx.AsyncClient) pair used by every
+    LLM client. Pool size, keep-alive and timeouts come from LLM_POOL_* and
+    LLM_TIMEOUT. httpx clients are safe to share between threads; the async
+    client must only be used from the shared event loop (see runtime.py).
+    """
+    global _http_clients
+    with _http_lock:
+        if _http_clients is None:
+            limits = httpx.Limits(
+                max_connections=int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20")),
+                max_keepalive_connections=int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "10")),
+                keepalive_expiry=float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "60"))
+            )
+            timeout = httpx.Timeout(
+                float(os.getenv("LLM_TIMEOUT", "60")),
+                connect=float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+            )
+            _http_clients = (
+                httpx.Client(limits=limits, timeout=timeout),
+                httpx.AsyncClient(limits=limits, timeout=timeout)
+            )
+        return _http_clients
+
+def select_model():
     """
-    Returns the configured LLM based on environment variables.
+    Returns (provider, model) based on environment variables.
     Defaults to Groq if key is present, then OpenAI, then Gemini.
     """
     openai_key = os.getenv("OPENAI_API_KEY")
@@ -17,13 +58,97 @@ def get_llm():
     groq_key = os.getenv("GROQ_API_KEY")
 
     if groq_key:
-        return ChatGroq(model_name="llama-3.3-70b-versatile", temperature=0)
+        return "groq", "llama-3.3-70b-versatile"
     elif openai_key and openai_key.startswith("sk-"):
         # Use OpenAI GPT-4o by default for best reasoning
-        return ChatOpenAI(model="gpt-4o", temperature=0)
+        return "openai", "gpt-4o"
     elif gemini_key:
-        return ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0)
+        return "google", "gemini-1.5-flash"
     else:
         # Fallback for testing/running without keys immediately if needed (Mock?)
         # For now, raise error or return None, but better to fail fast.
         raise ValueError("No valid API Key found. Please check your .env file.")
+
+def _build_client(provider, model):
+    timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+    max_retries = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    if provider == "google":
+        # The Gemini client manages its own transport
+        return ChatGoogleGenerativeAI(model=model, temperature=0, timeout=timeout, max_retries=max_retries)
+
+    http_client, http_async_client = get_http_clients()
+    if provider == "groq":
+        return ChatGroq(
+            model_name=model, temperature=0, timeout=timeout, max_retries=max_retries,
+            http_client=http_client, http_async_client=http_async_client
+        )
+    return ChatOpenAI(
+        model=model, temperature=0, timeout=timeout, max_retries=max_retries,
+        http_client=http_client, http_async_client=http_async_client
+    )
+
+def get_client(provider, model):
+    key = (provider, model)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = _build_client(provider, model)
+        return _clients[key]
+
+def get_llm(agent: str = None, use_cache: bool = True):
+    """
+    Returns the configured LLM (see select_model) from the shared client
+    registry, so all agents reuse the same SDK client and connection pool.
+
+    Responses go through the shared disk cache unless use_cache is False or
+    the agent is listed in LLM_CACHE_BYPASS.
+    """
+    provider, model = select_model()
+    cache = get_response_cache() if use_cache and cache_enabled(agent) else False
+    # Shallow copy: the cache setting is per agent, the SDK client is shared
+    return get_client(provider, model).model_copy(update={"cache": cache})
+
+def _cache_key(llm, messages):
+    # Same (prompt, llm_string) pair BaseChatModel uses for invoke, so
+    # streamed and invoked calls share cache entries.
+    return dumps(messages), llm._get_llm_string()
+
+def stream_text(prompt, llm, inputs):
+    """
+    Streams the text of `prompt | llm` for inputs. LangChain's stream path
+    skips the model cache, so hits are replayed here as a single chunk and
+    fresh responses are written back once complete.
+    """
+    cache = llm.cache if isinstance(llm.cache, BaseCache) else None
+    messages = prompt.invoke(inputs).to_messages()
+    if cache is not None:
+        key, llm_string = _cache_key(llm, messages)
+        hit = cache.lookup(key, llm_string)
+        if hit:
+            yield hit[0].text
+            return
+
+    text = ""
+    for chunk in (llm | StrOutputParser()).stream(messages):
+        text += chunk
+        yield chunk
+
+    if cache is not None:
+        cache.update(key, llm_string, [ChatGeneration(message=AIMessage(content=text))])
+
+async def astream_text(prompt, llm, inputs):
+    cache = llm.cache if isinstance(llm.cache, BaseCache) else None
+    messages = (await prompt.ainvoke(inputs)).to_messages()
+    if cache is not None:
+        key, llm_string = _cache_key(llm, messages)
+        hit = await cache.alookup(key, llm_string)
+        if hit:
+            yield hit[0].text
+            return
+
+    text = ""
+    async for chunk in (llm | StrOutputParser()).astream(messages):
+        text += chunk
+        yield chunk
+
+    if cache is not None:
+        await cache.aupdate(key, llm_string, [ChatGeneration(message=AIMessage(content=text))])
@@ -0,0 +1,59 @@
+"""
+LLM response cache settings and the process-wide cache. LangChain is only
+imported when the cache itself is built (see response_cache), so the app
+can check cache_enabled() and show cache_stats() at startup for free.
+"""
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.utils.kvcache import SQLiteKV
+
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH", os.path.join(os.getcwd(), "data", "cache", "llm_cache.sqlite3")
+)
+RESPONSE_TABLE = "llm_responses"
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_enabled(agent=None):
+    """
+    LLM_CACHE=0 disables caching globally; LLM_CACHE_BYPASS is a comma
+    separated list of agent names (e.g. "verifier,explainer") that skip it.
+    """
+    if os.getenv("LLM_CACHE", "1") != "1":
+        return False
+    bypass = {name.strip() for name in os.getenv("LLM_CACHE_BYPASS", "").split(",") if name.strip()}
+    return agent not in bypass
+
+
+def get_response_cache():
+    """
+    Returns the process-wide LLMResponseCache, creating it on first use.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from .response_cache import LLMResponseCache
+
+            ttl_hours = os.getenv("LLM_CACHE_TTL_HOURS")
+            _cache = LLMResponseCache(
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+                ttl=float(ttl_hours) * 3600 if ttl_hours else None
+            )
+        return _cache
+
+
+def cache_stats():
+    """
+    Stats of the response cache; read straight from SQLite (no hit/miss
+    counts) if this process has not built the cache yet.
+    """
+    with _cache_lock:
+        if _cache is not None:
+            return _cache.stats()
+    return SQLiteKV(LLM_CACHE_PATH, table=RESPONSE_TABLE).stats()
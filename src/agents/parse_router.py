@@ -0,0 +1,73 @@
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
+from .llm import get_llm
+from .parser import MathProblem, parse_failure
+from .router import RoutingDecision
+
+class ParsedRoute(MathProblem, RoutingDecision):
+    """
+    MathProblem and RoutingDecision fields in one object.
+    """
+
+ROUTE_FIELDS = tuple(RoutingDecision.model_fields)
+
+class ParseRouteAgent:
+    """
+    Parses and routes a problem in a single LLM call. Returns the same
+    (parsed, route) dicts that ParserAgent.parse and IntentRouter.route
+    produce separately.
+    """
+    def __init__(self, use_cache=True):
+        self.llm = get_llm(agent="parse_router", use_cache=use_cache)
+        self.parser = JsonOutputParser(pydantic_object=ParsedRoute)
+
+        self.prompt = ChatPromptTemplate.from_template(
+            """
+            You are a rigorous Math Problem Parser and Tutor Router.
+            Convert raw, potentially messy text (from OCR/Speech) into a structured math problem object
+            and decide the best strategy to solve it.
+
+            Analyze the input for:
+            1. Core problem statement (clean up typos).
+            2. Mathematical Topic (Algebra, Probability, Calculus, Linear Algebra).
+            3. Variables and Constraints.
+            4. AMBIGUITY: If the problem is missing AMBIGUOUS or INCOMPLETE information (e.g. "Solve for x" but no equation, or "Find the limit" but no function), set 'needs_clarification' to True and generate a specific question.
+
+            Then determine:
+            5. Broad Category (map to: algebra, calculus, probability, linear_algebra, other).
+            6. Complexity (Simple calculation vs Multi-step reasoning).
+            7. Recommended Tools (Always include 'rag' for formula retrieval. Use 'python_repl' for complex calculations).
+
+            Input Text:
+            {input_text}
+
+            Format Instructions:
+            {format_instructions}
+            """
+        )
+
+        self.chain = self.prompt | self.llm | self.parser
+
+    def _inputs(self, text: str):
+        return {
+            "input_text": text,
+            "format_instructions": self.parser.get_format_instructions()
+        }
+
+    @staticmethod
+    def _split(result: dict):
+        route = {field: result.get(field) for field in ROUTE_FIELDS}
+        parsed = {key: value for key, value in result.items() if key not in ROUTE_FIELDS}
+        return parsed, route
+
+    def parse_and_route(self, text: str):
+        try:
+            return self._split(self.chain.invoke(self._inputs(text)))
+        except Exception as e:
+            return parse_failure(text, e), None
+
+    async def aparse_and_route(self, text: str):
+        try:
+            return self._split(await self.chain.ainvoke(self._inputs(text)))
+        except Exception as e:
+            return parse_failure(text, e), None
@@ -13,9 +13,19 @@ class MathProblem(BaseModel):
     needs_clarification: bool = Field(description="True if the input is ambiguous or missing information, else False.")
     clarification_question: Optional[str] = Field(description="Question to ask user if needs_clarification is True.")
 
+def parse_failure(text: str, e: Exception):
+    return {
+        "problem_text": text,
+        "needs_clarification": True,
+        "clarification_question": f"Parsing failed. Error: {str(e)}. Please clean up the text.",
+        "topic": "Unknown",
+        "variables": [],
+        "constraints": []
+    }
+
 class ParserAgent:
-    def __init__(self):
-        self.llm = get_llm()
+    def __init__(self, use_cache=True):
+        self.llm = get_llm(agent="parser", use_cache=use_cache)
         self.parser = JsonOutputParser(pydantic_object=MathProblem)
         
         self.prompt = ChatPromptTemplate.from_template(
@@ -39,18 +49,20 @@ class ParserAgent:
         
         self.chain = self.prompt | self.llm | self.parser
 
+    def _inputs(self, text: str):
+        return {
+            "input_text": text,
+            "format_instructions": self.parser.get_format_instructions()
+        }
+
     def parse(self, text: str):
         try:
-            return self.chain.invoke({
-                "input_text": text,
-                "format_instructions": self.parser.get_format_instructions()
-            })
+            return self.chain.invoke(self._inputs(text))
+        except Exception as e:
+            return parse_failure(text, e)
+
+    async def aparse(self, text: str):
+        try:
+            return await self.chain.ainvoke(self._inputs(text))
         except Exception as e:
-            return {
-                "problem_text": text,
-                "needs_clarification": True,
-                "clarification_question": f"Parsing failed. Error: {str(e)}. Please clean up the text.",
-                "topic": "Unknown",
-                "variables": [],
-                "constraints": []
-            }
+            return parse_failure(text, e)
@@ -0,0 +1,317 @@
+import asyncio
+import threading
+import time
+
+# Minimum verifier confidence before a solution is explained to the student.
+CONFIDENCE_THRESHOLD = 0.8
+
+
+class StageTimer:
+    """
+    Records wall-clock seconds per pipeline stage. Stages that overlap
+    (e.g. routing and retrieval) are timed independently, so their sum
+    can exceed the reported total.
+    """
+    def __init__(self):
+        self.timings = {}
+        self._start = time.perf_counter()
+
+    async def run(self, stage, coro):
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.timings[stage] = round(time.perf_counter() - start, 3)
+
+    def finish(self):
+        self.timings["total"] = round(time.perf_counter() - self._start, 3)
+        return self.timings
+
+
+class SpeculationStats:
+    """
+    Process-wide counters for speculative explanation, so the latency saved
+    on verified runs can be weighed against the tokens thrown away on
+    failed ones. Token counts are approximations (~4 characters per token).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.launched = 0
+            self.used = 0
+            self.discarded = 0
+            self.cancelled_in_flight = 0
+            self.seconds_saved = 0.0
+            self.wasted_prompt_tokens = 0
+            self.wasted_completion_tokens = 0
+
+    def record_used(self, seconds_saved):
+        with self._lock:
+            self.launched += 1
+            self.used += 1
+            self.seconds_saved += max(seconds_saved, 0.0)
+
+    def record_discarded(self, prompt_tokens, completion_tokens, in_flight):
+        with self._lock:
+            self.launched += 1
+            self.discarded += 1
+            if in_flight:
+                self.cancelled_in_flight += 1
+            self.wasted_prompt_tokens += prompt_tokens
+            self.wasted_completion_tokens += completion_tokens
+
+    def snapshot(self):
+        with self._lock:
+            wasted = self.wasted_prompt_tokens + self.wasted_completion_tokens
+            return {
+                "launched": self.launched,
+                "used": self.used,
+                "discarded": self.discarded,
+                "cancelled_in_flight": self.cancelled_in_flight,
+                "pass_rate": round(self.used / self.launched, 3) if self.launched else None,
+                "seconds_saved": round(self.seconds_saved, 3),
+                "wasted_prompt_tokens": self.wasted_prompt_tokens,
+                "wasted_completion_tokens": self.wasted_completion_tokens,
+                "wasted_tokens_per_second_saved": round(wasted / self.seconds_saved, 1) if self.seconds_saved else None
+            }
+
+
+SPECULATION_STATS = SpeculationStats()
+
+
+def approx_tokens(text: str):
+    return len(text or "") // 4
+
+
+def is_verified(verification: dict):
+    return verification.get("is_correct") and verification.get("confidence", 0) >= CONFIDENCE_THRESHOLD
+
+
+async def run_pipeline(agents: dict, text_input: str, on_status=None, speculative=False, on_token=None,
+                       answer_cache=None, fused_parse=False):
+    """
+    Async version of the parse -> route -> solve -> verify -> explain flow.
+
+    Routing does not feed into solving, so the router call runs concurrently
+    with RAG retrieval (which itself runs the memory and knowledge base
+    lookups concurrently). With speculative=True the explanation is drafted
+    while verification runs and dropped if verification fails. Returns the
+    same result dicts as the serial pipeline, plus per-stage timings under
+    "timings".
+
+    on_token(stage, text) switches the solver and explainer to streaming and
+    receives the accumulated text for stage "solve" or "explain" as it
+    grows. Speculative explanation tokens are held back until verification
+    passes.
+
+    With an AnswerCache, the raw input and then the parsed problem text are
+    looked up before any further LLM call, and verified results are stored.
+
+    With fused_parse=True, agents["parse_router"] parses and routes in one
+    LLM call and only retrieval is left for step 2.
+
+    Problems the route marks as simple algebra/calculus are first tried on
+    agents["symbolic"] (a SymbolicSolver), if present; the LLM solver (and,
+    in fused mode, retrieval) only runs when SymPy gives up. The parsed
+    problem and route are handed to the verifier so answers to simple
+    problems can be checked exactly.
+    """
+    notify = on_status or (lambda message: None)
+    stream_to = _stream_callback(on_token)
+    timer = StageTimer()
+
+    hit = _lookup(answer_cache, text_input, timer)
+    if hit is not None:
+        return _cache_hit(hit, timer, notify)
+
+    # 1. Parsing (and routing, when fused)
+    route = None
+    if fused_parse:
+        notify("Parsing and routing problem...")
+        parsed, route = await timer.run("parse_route", agents["parse_router"].aparse_and_route(text_input))
+    else:
+        notify("Parsing problem...")
+        parsed = await timer.run("parse", agents["parser"].aparse(text_input))
+
+    if parsed.get("needs_clarification"):
+        return {"error": "clarification", "data": parsed, "timings": timer.finish()}
+
+    notify(f"Problem Parsed: {parsed.get('topic')}")
+
+    hit = _lookup(answer_cache, parsed["problem_text"], timer)
+    if hit is not None:
+        return _cache_hit(hit, timer, notify)
+
+    # 2. Routing + Retrieval (overlapped)
+    retrieved = None
+    if route is None:
+        notify("Routing and retrieving context...")
+        route, retrieved = await asyncio.gather(
+            timer.run("route", agents["router"].aroute(parsed)),
+            timer.run("retrieve", agents["solver"].aretrieve_context(parsed))
+        )
+    notify(f"Strategy: {route.get('category')} ({route.get('complexity')})")
+
+    # 3. Solving: symbolic fast path for simple problems, else the LLM
+    solve_result = await _solve_symbolically(agents, parsed, route, timer)
+    if solve_result is not None:
+        notify("Solved symbolically.")
+        if on_token is not None:
+            on_token("solve", solve_result["solution"])
+    else:
+        if retrieved is None:
+            notify("Retrieving context...")
+            retrieved = await timer.run("retrieve", agents["solver"].aretrieve_context(parsed))
+        notify("Solving with RAG...")
+        solve_result = await timer.run(
+            "solve", agents["solver"].asolve(
+                parsed, retrieved, on_token=stream_to("solve"), tools=route.get("recommended_tools")
+            )
+        )
+    solution = solve_result["solution"]
+
+    problem_text = parsed["problem_text"]
+
+    if speculative:
+        verification, final_explanation, speculation = await _verify_and_explain_speculatively(
+            agents, timer, parsed, route, solution, notify, stream_to("explain")
+        )
+    else:
+        # 4. Verification
+        notify("Verifying...")
+        verification = await timer.run("verify", agents["verifier"].averify(problem_text, solution, parsed, route))
+        final_explanation = None
+        speculation = None
+
+    if not is_verified(verification):
+        return {
+            "error": "verification_failed",
+            "problem": parsed,
+            "route": route,
+            "solution": solution,
+            "verification": verification,
+            "solve_result": solve_result,
+            "speculation": speculation,
+            "timings": timer.finish()
+        }
+
+    # 5. Explanation
+    if final_explanation is None:
+        notify("Generating Explanation...")
+        final_explanation = await timer.run(
+            "explain", agents["explainer"].aexplain(problem_text, solution, on_token=stream_to("explain"))
+        )
+
+    result = {
+        "success": True,
+        "problem": parsed,
+        "route": route,
+        "solution": solution,
+        "explanation": final_explanation,
+        "verification": verification,
+        "citations": solve_result["citations"]
+    }
+    if solve_result.get("tool_calls"):
+        result["tool_calls"] = solve_result["tool_calls"]
+    if answer_cache is not None:
+        answer_cache.store_result([text_input, problem_text], result)
+    result["speculation"] = speculation
+    result["timings"] = timer.finish()
+    return result
+
+
+def _lookup(answer_cache, text, timer):
+    if answer_cache is None:
+        return None
+    start = time.perf_counter()
+    hit = answer_cache.lookup(text)
+    timer.timings["cache"] = round(timer.timings.get("cache", 0) + time.perf_counter() - start, 3)
+    return hit
+
+
+def _cache_hit(hit, timer, notify):
+    notify("Found a verified answer for this problem in the cache.")
+    result = dict(hit)
+    result["cached"] = True
+    result["timings"] = timer.finish()
+    return result
+
+
+async def _solve_symbolically(agents, parsed, route, timer):
+    symbolic = agents.get("symbolic")
+    if symbolic is None or not symbolic.accepts(route):
+        return None
+    try:
+        return await timer.run(
+            "symbolic", asyncio.wait_for(asyncio.to_thread(symbolic.solve, parsed), symbolic.timeout)
+        )
+    except asyncio.TimeoutError:
+        return None
+
+
+def _stream_callback(on_token):
+    def stream_to(stage):
+        if on_token is None:
+            return None
+        return lambda text: on_token(stage, text)
+    return stream_to
+
+
+async def _verify_and_explain_speculatively(agents, timer, parsed, route, solution, notify, on_token=None):
+    """
+    Starts the explanation alongside verification. If verification fails the
+    explanation is cancelled (or discarded, if it already finished) and its
+    approximate token cost is booked in SPECULATION_STATS.
+    """
+    notify("Verifying (drafting explanation in parallel)...")
+    problem_text = parsed["problem_text"]
+    explainer = agents["explainer"]
+    start = time.perf_counter()
+
+    # Streamed tokens stay hidden until the explanation is known to be kept.
+    released = False
+    def gated(text):
+        if released:
+            on_token(text)
+
+    explain_task = asyncio.create_task(timer.run(
+        "explain",
+        explainer.aexplain(problem_text, solution, on_token=gated if on_token else None)
+    ))
+
+    try:
+        verification = await timer.run("verify", agents["verifier"].averify(problem_text, solution, parsed, route))
+    except BaseException:
+        explain_task.cancel()
+        await asyncio.gather(explain_task, return_exceptions=True)
+        raise
+
+    if not is_verified(verification):
+        in_flight = not explain_task.done()
+        explain_task.cancel()
+        outcome = (await asyncio.gather(explain_task, return_exceptions=True))[0]
+        completed = outcome if isinstance(outcome, str) else ""
+        prompt_tokens = approx_tokens(explainer.prompt.format(problem=problem_text, solution=solution))
+        completion_tokens = approx_tokens(completed)
+        SPECULATION_STATS.record_discarded(prompt_tokens, completion_tokens, in_flight)
+        return verification, None, {
+            "used": False,
+            "cancelled_in_flight": in_flight,
+            "wasted_prompt_tokens": prompt_tokens,
+            "wasted_completion_tokens": completion_tokens
+        }
+
+    released = True
+    if not explain_task.done():
+        notify("Verified. Finishing explanation...")
+    final_explanation = await explain_task
+    overlapped = time.perf_counter() - start
+    seconds_saved = timer.timings["verify"] + timer.timings["explain"] - overlapped
+    SPECULATION_STATS.record_used(seconds_saved)
+    return verification, final_explanation, {
+        "used": True,
+        "seconds_saved": round(seconds_saved, 3)
+    }
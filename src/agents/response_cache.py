@@ -0,0 +1,47 @@
+import hashlib
+import json
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from .llm_cache import LLM_CACHE_PATH, RESPONSE_TABLE, SQLiteKV
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Disk-backed LangChain cache for model responses.
+
+    LangChain passes the rendered prompt and an llm_string that encodes the
+    provider type, model name and sampling params, so entries are keyed on
+    provider + model + prompt. All agents use temperature=0, which makes a
+    cached response interchangeable with a fresh one.
+    """
+    def __init__(self, path=LLM_CACHE_PATH, max_entries=5000, ttl=None):
+        self.store = SQLiteKV(path, table=RESPONSE_TABLE, max_entries=max_entries, ttl=ttl)
+
+    @staticmethod
+    def _key(prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        value = self.store.get(self._key(prompt, llm_string))
+        if value is None:
+            return None
+        generations = []
+        for item in json.loads(value):
+            try:
+                generations.append(loads(item))
+            except Exception:
+                generations.append(Generation(text=item))
+        return generations
+
+    def update(self, prompt, llm_string, return_val):
+        value = json.dumps([dumps(gen) for gen in return_val])
+        self.store.set(self._key(prompt, llm_string), value)
+
+    def clear(self, **kwargs):
+        self.store.clear()
+
+    def stats(self):
+        return self.store.stats()
@@ -9,8 +9,8 @@ class RoutingDecision(BaseModel):
     recommended_tools: list[str] = Field(description="List of tools recommended (e.g., 'rag', 'calculator', 'python_repl').")
 
 class IntentRouter:
-    def __init__(self):
-        self.llm = get_llm()
+    def __init__(self, use_cache=True):
+        self.llm = get_llm(agent="router", use_cache=use_cache)
         self.parser = JsonOutputParser(pydantic_object=RoutingDecision)
         
         self.prompt = ChatPromptTemplate.from_template(
@@ -32,9 +32,15 @@ class IntentRouter:
         )
         self.chain = self.prompt | self.llm | self.parser
 
-    def route(self, problem_data: dict):
-        return self.chain.invoke({
+    def _inputs(self, problem_data: dict):
+        return {
             "topic": problem_data.get("topic", "Unknown"),
             "problem_text": problem_data.get("problem_text", ""),
             "format_instructions": self.parser.get_format_instructions()
-        })
+        }
+
+    def route(self, problem_data: dict):
+        return self.chain.invoke(self._inputs(problem_data))
+
+    async def aroute(self, problem_data: dict):
+        return await self.chain.ainvoke(self._inputs(problem_data))
@@ -0,0 +1,73 @@
+import asyncio
+import concurrent.futures
+import queue
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop():
+    """
+    Returns the process-wide event loop, running on a daemon thread.
+
+    The pooled httpx.AsyncClient keeps connections bound to the loop that
+    opened them, so every session runs its async pipeline here instead of
+    creating (and closing) a fresh loop per request with asyncio.run.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True)
+            thread.start()
+        return _loop
+
+
+class CallbackRelay:
+    """
+    Queues callback calls made on the shared loop thread so they run on the
+    caller's thread instead (Streamlit only accepts UI writes from the
+    script thread).
+    """
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def wrap(self, callback):
+        if callback is None:
+            return None
+        return lambda *args: self._queue.put((callback, args))
+
+    def drain(self, timeout=0.0):
+        try:
+            callback, args = self._queue.get(timeout=timeout) if timeout else self._queue.get_nowait()
+        except queue.Empty:
+            return
+        callback(*args)
+        while True:
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+
+def run_coroutine(coro, relay: CallbackRelay = None, poll_interval=0.05):
+    """
+    Runs coro on the shared loop and blocks until it finishes, dispatching
+    relayed callbacks on the calling thread meanwhile. If the caller is
+    interrupted (e.g. a Streamlit rerun), the coroutine is cancelled.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    try:
+        while not future.done():
+            if relay is not None:
+                relay.drain(timeout=poll_interval)
+            else:
+                concurrent.futures.wait([future], timeout=poll_interval)
+    except BaseException:
+        future.cancel()
+        raise
+    if relay is not None:
+        relay.drain()
+    return future.result()
@@ -1,16 +1,33 @@
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
-from .llm import get_llm
+from langchain_core.messages import AIMessage, HumanMessage
+from .llm import get_llm, stream_text, astream_text
+import asyncio
+import re
 import sys
 import os
 
 # Adjust path for RAG import if needed
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from src.rag.store import RAGStore
+from src.tools.python_repl import get_repl, format_result
+
+CODE_BLOCK = re.compile(r"```(?:python|py)?[ \t]*\n(.*?)```", re.DOTALL)
+# Code runs allowed per solution before the model must answer
+MAX_TOOL_CALLS = int(os.getenv("PYTHON_REPL_MAX_CALLS", "3"))
+
+def tool_request(reply: str):
+    """
+    The code a reply asks to run, or None if it is a final solution.
+    """
+    match = CODE_BLOCK.search(reply)
+    if match is None or "final answer" in reply.lower() or "\\boxed" in reply:
+        return None
+    return match.group(1)
 
 class SolverAgent:
-    def __init__(self):
-        self.llm = get_llm()
+    def __init__(self, use_cache=True):
+        self.llm = get_llm(agent="solver", use_cache=use_cache)
         self.rag = RAGStore()
         
         self.prompt = ChatPromptTemplate.from_template(
@@ -35,50 +52,213 @@ class SolverAgent:
         )
         self.chain = self.prompt | self.llm | StrOutputParser()
 
-    def solve(self, problem_data: dict):
-        # Retrieve context
-        problem_text = problem_data.get("problem_text", "")
-        topic = problem_data.get("topic", "")
-        
+        # Same task, with the python_repl tool available mid-solution
+        self.tool_prompt = ChatPromptTemplate.from_messages([
+            ("human", self.prompt.messages[0].prompt.template + """
+            Tools:
+            You can run Python to do or check calculations (sympy as sp, numpy as np and math are loaded).
+            To run code, reply with ONLY one ```python code block and nothing else; its output will be sent back.
+            You have at most {max_tool_calls} runs. Once done, write the full solution with no code block.
+            """),
+            MessagesPlaceholder("scratchpad")
+        ])
+        self.tool_chain = self.tool_prompt | self.llm | StrOutputParser()
+
+    @staticmethod
+    def _query(problem_data: dict):
         # Combine text and topic for better retrieval
-        query = f"{topic}: {problem_text}"
-        
-        # 1. Check Memory first
+        return f"{problem_data.get('topic', '')}: {problem_data.get('problem_text', '')}"
+
+    @staticmethod
+    def _build_context(mem_docs, docs):
         memory_context = ""
-        try:
-            mem_docs = self.rag.retrieve_memory(query, k=1)
-            if mem_docs:
-                memory_context = f"\n[SIMILAR PAST PROBLEM]:\n{mem_docs[0].page_content}\n"
-        except Exception:
-            pass # No memory yet
-            
-        try:
-            docs = self.rag.retrieve(query, k=2)
-            context = "\n\n".join([d.page_content for d in docs])
-            citations = [d.metadata.get("source", "unknown") for d in docs]
-        except Exception as e:
+        if mem_docs:
+            memory_context = f"\n[SIMILAR PAST PROBLEM]:\n{mem_docs[0].page_content}\n"
+
+        if docs is None:
             context = "No context available (Retrieval Error)."
             citations = []
-            
+        else:
+            context = "\n\n".join([d.page_content for d in docs])
+            citations = [d.metadata.get("source", "unknown") for d in docs]
+
         # Combine Memory + Knowledge Base
         full_context = f"{memory_context}\n\n[KNOWLEDGE BASE]:\n{context}"
-            
-        solution = self.chain.invoke({
-            "context": full_context,
-            "problem": problem_text,
-            "constraints": ", ".join(problem_data.get("constraints", []))
-        })
-        
+        return {"context": full_context, "citations": citations}
+
+    def retrieve_context(self, problem_data: dict):
+        query = self._query(problem_data)
+        topic = problem_data.get("topic")
+
+        # Embed once; both collections are searched with the same vector.
+        # Without one, memory is skipped and the KB falls back to BM25.
+        embedding = self.rag.try_embed_query(query)
+
+        # 1. Check Memory first
+        try:
+            mem_docs = []
+            if embedding is not None:
+                mem_docs = self.rag.retrieve_memory(query, k=1, embedding=embedding, topic=topic)
+        except Exception:
+            mem_docs = [] # No memory yet
+
+        try:
+            mode = None if embedding is not None else "lexical"
+            docs = self.rag.retrieve(query, k=2, embedding=embedding, mode=mode, topic=topic)
+        except Exception:
+            docs = None
+
+        return self._build_context(mem_docs, docs)
+
+    async def aretrieve_context(self, problem_data: dict):
+        """
+        Same as retrieve_context, but runs the memory and knowledge base
+        lookups concurrently.
+        """
+        query = self._query(problem_data)
+        topic = problem_data.get("topic")
+        embedding = await self.rag.atry_embed_query(query)
+
+        if embedding is not None:
+            mem_docs, docs = await asyncio.gather(
+                self.rag.aretrieve_memory(query, k=1, embedding=embedding, topic=topic),
+                self.rag.aretrieve(query, k=2, embedding=embedding, topic=topic),
+                return_exceptions=True
+            )
+        else:
+            mem_docs = []
+            try:
+                docs = await self.rag.aretrieve(query, k=2, mode="lexical", topic=topic)
+            except Exception:
+                docs = None
+        if isinstance(mem_docs, Exception):
+            mem_docs = []
+        if isinstance(docs, Exception):
+            docs = None
+        return self._build_context(mem_docs, docs)
+
+    def _inputs(self, problem_data: dict, retrieved: dict):
         return {
+            "context": retrieved["context"],
+            "problem": problem_data.get("problem_text", ""),
+            "constraints": ", ".join(problem_data.get("constraints", []))
+        }
+
+    def _result(self, solution, retrieved: dict, tool_calls=None):
+        result = {
             "solution": solution,
-            "context_used": full_context,
-            "citations": citations
+            "context_used": retrieved["context"],
+            "citations": retrieved["citations"]
         }
+        if tool_calls is not None:
+            result["tool_calls"] = tool_calls
+        return result
+
+    @staticmethod
+    def _use_tools(tools):
+        if not (tools and "python_repl" in tools and os.getenv("PYTHON_REPL", "1") == "1"):
+            return False
+        # Stop offering the tool once the sandbox has refused to start
+        return not get_repl().unavailable
+
+    def _tool_inputs(self, problem_data: dict, retrieved: dict):
+        inputs = self._inputs(problem_data, retrieved)
+        inputs["max_tool_calls"] = MAX_TOOL_CALLS
+        inputs["scratchpad"] = []
+        return inputs
+
+    @staticmethod
+    def _record(inputs, calls, reply, code, output):
+        calls.append({"code": code, "output": output})
+        inputs["scratchpad"] += [AIMessage(content=reply), HumanMessage(content=f"Output:\n{output}")]
+
+    @staticmethod
+    def _out_of_runs(inputs):
+        inputs["scratchpad"].append(
+            HumanMessage(content="No more code runs are available. Write the final solution now.")
+        )
+
+    def solve_with_tools(self, problem_data: dict, retrieved: dict):
+        """
+        Lets the model run python_repl snippets mid-solution. Returns the
+        final solution and the [{"code", "output"}] calls made.
+        """
+        inputs = self._tool_inputs(problem_data, retrieved)
+        calls = []
+        for _ in range(MAX_TOOL_CALLS):
+            reply = self.tool_chain.invoke(inputs)
+            code = tool_request(reply)
+            if code is None:
+                return reply, calls
+            self._record(inputs, calls, reply, code, format_result(get_repl().run(code)))
+        self._out_of_runs(inputs)
+        return self.tool_chain.invoke(inputs), calls
+
+    async def asolve_with_tools(self, problem_data: dict, retrieved: dict):
+        inputs = self._tool_inputs(problem_data, retrieved)
+        calls = []
+        for _ in range(MAX_TOOL_CALLS):
+            reply = await self.tool_chain.ainvoke(inputs)
+            code = tool_request(reply)
+            if code is None:
+                return reply, calls
+            self._record(inputs, calls, reply, code, format_result(await get_repl().arun(code)))
+        self._out_of_runs(inputs)
+        return await self.tool_chain.ainvoke(inputs), calls
+
+    def solve(self, problem_data: dict, retrieved: dict = None, tools=None):
+        if retrieved is None:
+            retrieved = self.retrieve_context(problem_data)
+        if self._use_tools(tools):
+            solution, calls = self.solve_with_tools(problem_data, retrieved)
+            return self._result(solution, retrieved, calls)
+        solution = self.chain.invoke(self._inputs(problem_data, retrieved))
+        return self._result(solution, retrieved)
+
+    async def asolve(self, problem_data: dict, retrieved: dict = None, on_token=None, tools=None):
+        """
+        If on_token is given, the solution is streamed and on_token is called
+        with the accumulated text after every chunk. If tools includes
+        "python_repl", the model may run code first; the tool loop is not
+        streamed and on_token receives the final solution once.
+        """
+        if retrieved is None:
+            retrieved = await self.aretrieve_context(problem_data)
+        if self._use_tools(tools):
+            solution, calls = await self.asolve_with_tools(problem_data, retrieved)
+            if on_token is not None:
+                on_token(solution)
+            return self._result(solution, retrieved, calls)
+        if on_token is None:
+            solution = await self.chain.ainvoke(self._inputs(problem_data, retrieved))
+        else:
+            solution = ""
+            async for chunk in self.astream(problem_data, retrieved):
+                solution += chunk
+                on_token(solution)
+        return self._result(solution, retrieved)
+
+    def stream(self, problem_data: dict, retrieved: dict = None):
+        """
+        Yields solution text chunks as the model produces them.
+        """
+        if retrieved is None:
+            retrieved = self.retrieve_context(problem_data)
+        yield from stream_text(self.prompt, self.llm, self._inputs(problem_data, retrieved))
+
+    async def astream(self, problem_data: dict, retrieved: dict = None):
+        if retrieved is None:
+            retrieved = await self.aretrieve_context(problem_data)
+        async for chunk in astream_text(self.prompt, self.llm, self._inputs(problem_data, retrieved)):
+            yield chunk
 
     def learn(self, problem_text, solution_text, topic):
+        """
+        Stores a verified solution; returns the memory's outcome
+        ({"status": "added" | "duplicate", ...}) or {"status": "error"}.
+        """
         try:
-            self.rag.add_to_memory(problem_text, solution_text, topic)
-            return True
+            return self.rag.add_to_memory(problem_text, solution_text, topic)
         except Exception as e:
             print(f"Memory Error: {e}")
-            return False
+            return {"status": "error", "error": str(e)}
@@ -0,0 +1,635 @@
+import os
+import re
+import sys
+
+import sympy as sp
+from sympy.parsing.sympy_parser import (
+    convert_xor,
+    implicit_multiplication_application,
+    parse_expr,
+    standard_transformations,
+)
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.rag.topics import normalize_topic
+
+# Route categories / complexities the fast path is tried on
+SYMBOLIC_TOPICS = ("algebra", "calculus")
+SYMBOLIC_COMPLEXITY = ("simple",)
+# Seconds the pipeline waits for SymPy before falling back to the LLM
+SYMBOLIC_TIMEOUT = float(os.getenv("SYMBOLIC_TIMEOUT", "2"))
+# Longest expression (characters) handed to SymPy
+MAX_EXPRESSION_LENGTH = 200
+
+TRANSFORMATIONS = standard_transformations + (implicit_multiplication_application, convert_xor)
+LOCALS = {"e": sp.E, "ln": sp.log, "pi": sp.pi, "oo": sp.oo, "inf": sp.oo, "infinity": sp.oo}
+
+FUNCTIONS = ("asin", "acos", "atan", "sinh", "cosh", "tanh", "sin", "cos", "tan", "sec", "csc", "cot",
+             "exp", "log", "ln", "sqrt", "pi")
+_SYMBOLS = [
+    ("×", "*"), ("·", "*"), ("÷", "/"), ("−", "-"), ("–", "-"), ("²", "^2"), ("³", "^3"),
+    ("√", "sqrt"), ("π", "pi"), ("∞", "oo"), ("→", "->"), ("≥", ">="), ("≤", "<="),
+]
+# A run of numbers, single-letter variables, known functions and operators
+_ATOM = r"(?:\d+(?:\.\d+)?|(?<![A-Za-z])(?:%s|[A-Za-z])(?![A-Za-z])|[+\-*/^().=])" % "|".join(FUNCTIONS)
+MATH_SPAN = re.compile(r"%s(?:\s*%s)*" % (_ATOM, _ATOM))
+
+LIMIT_CLAUSE = re.compile(
+    r"\bas\s+([a-z])\s*(?:->|approaches|tends to|goes to)\s*([-+]?\s*(?:oo|inf(?:inity)?|[\w.]+))([+-])?",
+    re.IGNORECASE
+)
+BOUNDS_CLAUSE = re.compile(r"\bfrom\s+([-+]?[\w.]+)\s+to\s+([-+]?[\w.]+)", re.IGNORECASE)
+RESPECT_CLAUSE = re.compile(r"\b(?:with respect to|w\.?r\.?t\.?)\s+([a-z])\b", re.IGNORECASE)
+DIFFERENTIAL = re.compile(r"\bd(?!o\b)([a-z])\b|d/d([a-z])")
+
+DERIVATIVE_WORDS = ("derivative", "differentiate", "d/d")
+INTEGRAL_WORDS = ("integral", "integrate", "antiderivative", "∫")
+LIMIT_WORDS = ("limit", "lim ")
+UNEVALUATED = (sp.Integral, sp.Limit, sp.Derivative, sp.Piecewise, sp.AccumBounds)
+UNSUPPORTED = (sp.Abs, sp.Piecewise, sp.floor, sp.ceiling, sp.sign)
+
+# Only plain requests are read: once the expression and the kind's clauses
+# are removed, nothing but these words (and the variable) may be left.
+# Anything else ("area", "circle", "what is 2x") means the problem asks for
+# something the reader does not model, so it is left to the LLM.
+REQUEST_WORDS = {
+    "find", "solve", "compute", "calculate", "evaluate", "determine", "what", "is", "are", "the", "of", "a",
+    "an", "for", "please", "value", "values", "exact", "all", "real", "given", "if", "following", "function",
+    "expression", "then",
+}
+KIND_WORDS = {
+    "equation": {"equation", "root", "roots", "solution", "solutions", "zero", "zeros", "satisfies", "satisfy",
+                 "that", "which", "unknown"},
+    "derivative": {"derivative", "derivatives", "differentiate", "first", "with", "respect", "to"},
+    "integral": {"integral", "integrate", "antiderivative", "indefinite", "definite"},
+    "limit": {"limit", "lim"},
+}
+# "at x = 3", "when x = 3": a value at a point, not the general result
+EVALUATION_POINT = re.compile(r"\b(?:at|when|where|with|if|for)\s+[a-z]\s*=(?!=)", re.IGNORECASE)
+HIGHER_ORDER = re.compile(
+    r"\b(?:second|third|fourth|fifth|higher|nth|n-th|\d+(?:st|nd|rd|th))\b|''|\bd\s*\^\s*\d|d²", re.IGNORECASE
+)
+ABSOLUTE = re.compile(r"\||\babs\b|absolute|piecewise|floor|ceil", re.IGNORECASE)
+# "where x is positive", "given x > 0": must match the parsed constraints
+CONSTRAINT_CLAUSE = re.compile(
+    r"[,;]?\s*\b(?:where|given(?:\s+that)?|such\s+that|with|assuming)\s+([a-z])\s*(?:is\s+)?"
+    r"(?:(?:strictly\s+)?(?:positive|negative|non-?negative|non-?positive)\b|(?:>=|<=|>|<)\s*[-+]?\d+(?:\.\d+)?)",
+    re.IGNORECASE
+)
+
+
+def normalize_math(text):
+    for old, new in _SYMBOLS:
+        text = text.replace(old, new)
+    return text.replace("**", "^")
+
+
+def parse_math(text):
+    """
+    Parses a plain-text expression ("3x^2 + 2x", "sin x / x") with implicit
+    multiplication. Returns None if SymPy cannot read it.
+    """
+    text = normalize_math(text).strip(" .,:;?")
+    if not text or len(text) > MAX_EXPRESSION_LENGTH:
+        return None
+    try:
+        return parse_expr(text, local_dict=LOCALS, transformations=TRANSFORMATIONS, evaluate=True)
+    except Exception:
+        return None
+
+
+def parse_equation(text):
+    """
+    "lhs = rhs" as lhs - rhs, a plain expression as-is, or None.
+    """
+    sides = normalize_math(text).split("=")
+    if len(sides) > 2:
+        return None
+    parts = [parse_math(side) for side in sides]
+    if any(part is None for part in parts):
+        return None
+    return parts[0] - parts[1] if len(parts) == 2 else parts[0]
+
+
+def math_spans(text):
+    """
+    Candidate expressions in a sentence, longest first. Runs without an
+    operator or a digit ("a", "I") are skipped as ordinary words.
+    """
+    spans = [m.group(0).strip() for m in MATH_SPAN.finditer(text)]
+    spans = [s for s in spans if re.search(r"[+\-*/^=()]|\d", s)]
+    return sorted(spans, key=len, reverse=True)
+
+
+def _latex(value):
+    return sp.latex(value)
+
+
+def _natural(value):
+    """
+    The shortest of a few canonical forms of value, for showing to students.
+    simplify() alone turns e.g. e^x sin x + e^x cos x into
+    sqrt(2) e^x sin(x + pi/4), so forms that bring in functions the
+    expanded value does not have are skipped.
+    """
+    expanded = sp.expand(value)
+    functions = expanded.atoms(sp.Function)
+    forms = [expanded, sp.factor(value), sp.cancel(value), sp.simplify(value)]
+    return min((form for form in forms if form.atoms(sp.Function) <= functions), key=sp.count_ops)
+
+
+def _is_clean(value):
+    return not (value.has(*UNEVALUATED) or value.has(sp.nan, sp.zoo))
+
+
+def _expression(text, allowed, variable=None, equation=False):
+    """
+    (expression, variable, span) for the longest readable expression in
+    text. Fails if it has symbols other than the variable and the parsed
+    variables. Outside equations "f(x) = ..." is read as its right-hand
+    side.
+    """
+    for span in math_spans(text):
+        if equation:
+            expr = parse_equation(span)
+        else:
+            expr = parse_math(span.split("=")[-1])
+        if expr is None or not expr.free_symbols:
+            continue
+        names = {s.name for s in expr.free_symbols}
+        if variable is None:
+            if len(names) != 1:
+                return None
+            variable = names.pop()
+        elif variable not in names or not names <= allowed | {variable}:
+            return None
+        return expr, sp.Symbol(variable), span
+    return None
+
+
+def _variable(text):
+    match = RESPECT_CLAUSE.search(text) or DIFFERENTIAL.search(text)
+    if match is None:
+        return None, text
+    variable = next(group for group in match.groups() if group)
+    return variable, text[:match.start()] + " " + text[match.end():]
+
+
+def _only_request(text, kind, variable):
+    """
+    True if text (the problem minus its expression and clauses) is nothing
+    but request words.
+    """
+    text = re.sub(r"(?<=[A-Za-z])-(?=[A-Za-z])", "", text)
+    if re.search(r"[\d=+\-*/^<>\\]", text):
+        return False
+    allowed = REQUEST_WORDS | KIND_WORDS[kind] | {variable}
+    return all(word in allowed for word in re.findall(r"[a-z]+", text.lower()))
+
+
+def read_problem(problem_data: dict):
+    """
+    Reads a parsed problem into {"kind", "expr", "x", ...} where kind is
+    "equation" (expr = 0, "constraints" on x), "derivative", "integral"
+    (optional "bounds") or "limit" ("point", "direction").
+
+    Returns None unless the text is a plain request of that kind with
+    nothing else asked: no evaluation point, higher-order derivative,
+    absolute value or question about another quantity.
+    """
+    text = normalize_math(problem_data.get("problem_text", ""))
+    lowered = text.lower()
+    if ABSOLUTE.search(text) or EVALUATION_POINT.search(text) or "\\" in text:
+        return None
+    allowed = {v for v in problem_data.get("variables", []) or [] if isinstance(v, str) and len(v) == 1}
+    problem = {}
+    constraint_clauses = []
+
+    if any(word in lowered for word in DERIVATIVE_WORDS):
+        if HIGHER_ORDER.search(text):
+            return None
+        problem["kind"] = "derivative"
+        variable, text = _variable(text)
+        text = re.sub(r"d/d[a-z]", " ", text)
+    elif any(word in lowered for word in INTEGRAL_WORDS):
+        problem["kind"] = "integral"
+        bounds = BOUNDS_CLAUSE.search(text)
+        if bounds:
+            lower, upper = parse_math(bounds.group(1)), parse_math(bounds.group(2))
+            if lower is None or upper is None:
+                return None
+            problem["bounds"] = (lower, upper)
+            text = text[:bounds.start()] + " " + text[bounds.end():]
+        variable, text = _variable(text)
+    elif any(word in lowered for word in LIMIT_WORDS):
+        problem["kind"] = "limit"
+        clause = LIMIT_CLAUSE.search(text)
+        if clause is None:
+            return None
+        variable = clause.group(1)
+        point = parse_math(clause.group(2).replace(" ", ""))
+        if point is None or point.free_symbols:
+            return None
+        problem["point"] = point
+        problem["direction"] = clause.group(3) or "+-"
+        text = text[:clause.start()] + " " + text[clause.end():]
+    elif "=" in text:
+        problem["kind"] = "equation"
+        variable = None
+        constraint_clauses = CONSTRAINT_CLAUSE.findall(text)
+        text = CONSTRAINT_CLAUSE.sub(" ", text)
+    else:
+        return None
+
+    found = _expression(text, allowed, variable, equation=problem["kind"] == "equation")
+    if found is None:
+        return None
+    expr, x, span = found
+    if expr.has(*UNSUPPORTED) or not _only_request(text.replace(span, " ", 1), problem["kind"], x.name):
+        return None
+    problem["expr"], problem["x"] = expr, x
+
+    if problem["kind"] == "equation":
+        constraints = _constraints(problem_data, x)
+        # A condition stated in the text must have been parsed, or the
+        # roots could not be filtered by it
+        if constraints is None or (constraint_clauses and not constraints):
+            return None
+        if any(name != x.name for name in constraint_clauses):
+            return None
+        problem["constraints"] = constraints
+    return problem
+
+
+def satisfies(value, constraints, x):
+    return all(bool(constraint.subs(x, value)) for constraint in constraints)
+
+
+def simple_route(route):
+    """
+    True for routes the symbolic solver is tried on.
+    """
+    return bool(route) and (normalize_topic(route.get("category")) in SYMBOLIC_TOPICS
+                            and str(route.get("complexity", "")).lower() in SYMBOLIC_COMPLEXITY)
+
+
+def real_solutions(expr, x):
+    """
+    Real roots of expr = 0, excluding roots of a cleared numerator that make
+    a denominator vanish.
+    """
+    solutions = [s for s in sp.solve(expr, x) if _is_clean(s) and s.is_real]
+    return [s for s in solutions if sp.simplify(expr.subs(x, s)) == 0]
+
+
+def limit_value(problem):
+    expr, x, point = problem["expr"], problem["x"], problem["point"]
+    if point.is_finite:
+        return sp.limit(expr, x, point, dir=problem["direction"])
+    return sp.limit(expr, x, point)
+
+
+class SymbolicSolver:
+    """
+    Deterministic SymPy solver for simple algebra and calculus problems
+    (linear/quadratic equations, derivatives, integrals, limits).
+
+    solve() returns a solver-shaped result with the steps taken and a boxed
+    answer, or None whenever the problem text cannot be read with
+    confidence, so the caller falls back to the LLM.
+    """
+    def __init__(self, timeout=SYMBOLIC_TIMEOUT):
+        self.timeout = timeout
+
+    def accepts(self, route):
+        return os.getenv("SYMBOLIC_SOLVER", "1") == "1" and simple_route(route)
+
+    def solve(self, problem_data: dict):
+        try:
+            problem = read_problem(problem_data)
+            outcome = getattr(self, f"_{problem['kind']}")(problem) if problem else None
+        except Exception:
+            outcome = None
+        if outcome is None:
+            return None
+
+        steps, answer = outcome
+        return {
+            "solution": self._format(steps, answer),
+            "steps": steps,
+            "answer": answer,
+            "engine": "sympy",
+            "context_used": "",
+            "citations": []
+        }
+
+    @staticmethod
+    def _format(steps, answer):
+        lines = [f"{i}. {step}" for i, step in enumerate(steps, 1)]
+        lines.append(f"\nFinal Answer: $\\boxed{{{answer}}}$")
+        return "\n".join(lines)
+
+    # --- Problem kinds ---
+
+    def _equation(self, problem):
+        expr, x = problem["expr"], problem["x"]
+        poly = sp.Poly(sp.together(expr).as_numer_denom()[0], x) if expr.is_rational_function(x) else None
+        if poly is None or poly.degree() not in (1, 2):
+            return None
+
+        steps = [f"Move every term to one side: ${_latex(sp.expand(poly.as_expr()))} = 0$."]
+        if poly.degree() == 1:
+            a, b = poly.all_coeffs()
+            steps.append(f"Isolate ${x}$: ${x} = -\\frac{{{_latex(b)}}}{{{_latex(a)}}}$.")
+        else:
+            a, b, c = poly.all_coeffs()
+            disc = sp.expand(b ** 2 - 4 * a * c)
+            steps.append(f"Identify $a = {_latex(a)}$, $b = {_latex(b)}$, $c = {_latex(c)}$.")
+            steps.append(f"Discriminant: $b^2 - 4ac = {_latex(disc)}$.")
+            steps.append(f"Quadratic formula: ${x} = \\frac{{-b \\pm \\sqrt{{b^2 - 4ac}}}}{{2a}}$.")
+
+        # Complex roots ("no real solution") are left to the LLM
+        solutions = real_solutions(expr, x)
+        constraints = problem.get("constraints") or []
+        if constraints:
+            solutions = [s for s in solutions if satisfies(s, constraints, x)]
+            steps.append(f"Keep the roots satisfying {', '.join(f'${_latex(c)}$' for c in constraints)}.")
+        if not solutions:
+            return None
+        answer = ", ".join(f"{x} = {_latex(s)}" for s in solutions)
+        steps.append(f"Solutions: ${answer}$.")
+        return steps, answer
+
+    def _derivative(self, problem):
+        expr, x = problem["expr"], problem["x"]
+        derivative = sp.diff(expr, x)
+        simplified = _natural(derivative)
+        if not _is_clean(simplified):
+            return None
+        steps = [
+            f"Differentiate $f({x}) = {_latex(expr)}$ with respect to ${x}$.",
+            f"Apply the differentiation rules term by term: $f'({x}) = {_latex(derivative)}$."
+        ]
+        if simplified != derivative:
+            steps.append(f"Simplify: $f'({x}) = {_latex(simplified)}$.")
+        return steps, f"f'({x}) = {_latex(simplified)}"
+
+    def _integral(self, problem):
+        expr, x = problem["expr"], problem["x"]
+        antiderivative = sp.integrate(expr, x)
+        if not _is_clean(antiderivative):
+            return None
+        steps = [f"Find an antiderivative of ${_latex(expr)}$: $F({x}) = {_latex(antiderivative)}$."]
+        if "bounds" not in problem:
+            return steps, f"{_latex(antiderivative)} + C"
+
+        lower, upper = problem["bounds"]
+        value = _natural(sp.integrate(expr, (x, lower, upper)))
+        if not _is_clean(value) or value.free_symbols:
+            return None
+        steps.append(
+            f"Evaluate $F({_latex(upper)}) - F({_latex(lower)}) = {_latex(value)}$."
+        )
+        return steps, _latex(value)
+
+    def _limit(self, problem):
+        expr, x, point = problem["expr"], problem["x"], problem["point"]
+        value = limit_value(problem)
+        if not _is_clean(value):
+            return None
+        steps = [f"Consider $\\lim_{{{x} \\to {_latex(point)}}} {_latex(expr)}$."]
+        direct = expr.subs(x, point) if point.is_finite else None
+        if direct is not None and _is_clean(direct) and direct.is_finite:
+            steps.append(f"The function is continuous there, so substitute ${x} = {_latex(point)}$ directly.")
+        else:
+            steps.append("Direct substitution is indeterminate; simplify the expression before taking the limit.")
+        steps.append(f"The limit equals ${_latex(value)}$.")
+        return steps, _latex(value)
+
+
+# --- Answer checking ---
+
+BOXED = re.compile(r"\\boxed\s*\{")
+FINAL_ANSWER = re.compile(r"final answer\s*(?:is)?\s*[:=]?\s*(.+)", re.IGNORECASE)
+_LATEX_WORDS = [
+    (r"\\[dt]frac", r"\\frac"), (r"\\left|\\right|\\displaystyle|\\[,;!]|\$|\\\(|\\\)", " "),
+    (r"\\cdot|\\times", "*"), (r"\\infty", "oo"), (r"\\pi", "pi"), (r"\\ln", "ln"),
+    (r"\\(a?(?:sin|cos|tan)h?|sec|csc|cot|exp|log)", r"\1"), (r"\\text\s*\{([^{}]*)\}", r" \1 "),
+    (r"\+\s*C\b", ""),
+]
+
+
+def _group(text, start):
+    """
+    Index just past the brace group opening at text[start] ("{").
+    """
+    depth = 0
+    for i in range(start, len(text)):
+        depth += {"{": 1, "}": -1}.get(text[i], 0)
+        if depth == 0:
+            return i + 1
+    return None
+
+
+def latex_to_text(text):
+    """
+    Rewrites the LaTeX that solutions typically box (\\frac, \\sqrt, \\cdot,
+    ^{...}) as plain text parse_math understands.
+    """
+    for pattern, new in _LATEX_WORDS:
+        text = re.sub(pattern, new, text)
+    for command, template in (("\\frac", "(({0})/({1}))"), ("\\sqrt", "sqrt({0})")):
+        while command in text:
+            start = text.index(command)
+            first = text.find("{", start)
+            end = _group(text, first) if first != -1 else None
+            if end is None:
+                return None
+            args = [text[first + 1:end - 1]]
+            if command == "\\frac":
+                second_end = _group(text, end) if text[end:end + 1] == "{" else None
+                if second_end is None:
+                    return None
+                args.append(text[end + 1:second_end - 1])
+                end = second_end
+            text = text[:start] + template.format(*args) + text[end:]
+    if "\\" in text:
+        return None
+    return text.replace("{", "(").replace("}", ")")
+
+
+def final_answer(solution_text):
+    """
+    The last \\boxed{...} in a solution, else the text after "Final Answer",
+    or None.
+    """
+    boxes = list(BOXED.finditer(solution_text or ""))
+    if boxes:
+        start = boxes[-1].end() - 1
+        end = _group(solution_text, start)
+        if end is not None:
+            return solution_text[start + 1:end - 1].strip()
+    matches = FINAL_ANSWER.findall(solution_text or "")
+    return matches[-1].strip(" .*") if matches else None
+
+
+def answer_values(answer, x):
+    """
+    Claimed values of x in an answer like "x = 2, x = 3", "x = 2 or 3",
+    "x = \\frac{1 \\pm \\sqrt{5}}{2}" or "\\{2, 3\\}". None if unreadable.
+    """
+    answer = answer.replace("\\{", "").replace("\\}", "")
+    answer = re.sub(r"\\in\b", "=", answer)
+    if "\\pm" in answer:
+        plus, minus = answer_values(answer.replace("\\pm", "+"), x), answer_values(answer.replace("\\pm", "-"), x)
+        return plus + minus if plus is not None and minus is not None else None
+    text = latex_to_text(answer)
+    if text is None:
+        return None
+    text = re.sub(r"\b%s\s*=" % re.escape(str(x)), " ", text)
+    values = []
+    for part in re.split(r",|;|\band\b|\bor\b", text):
+        if not part.strip():
+            continue
+        value = parse_math(part)
+        if value is None or value.free_symbols:
+            return None
+        values.append(value)
+    return values or None
+
+
+def answer_expression(answer, x):
+    """
+    The expression in an answer like "f'(x) = 2x" or "\\frac{x^3}{3} + C".
+    """
+    text = latex_to_text(answer)
+    if text is None:
+        return None
+    value = parse_math(text.split("=")[-1])
+    if value is None or not value.free_symbols <= {x}:
+        return None
+    return value
+
+
+def _same(a, b):
+    difference = sp.simplify(a - b)
+    if difference == 0:
+        return True
+    if difference.free_symbols:
+        return False
+    return abs(complex(difference.evalf())) < 1e-9
+
+
+def _constraints(problem_data, x):
+    """
+    Parsed constraints on x (e.g. "x > 0"), or None if any is unreadable.
+    """
+    relations = []
+    for constraint in problem_data.get("constraints", []) or []:
+        relation = parse_math(constraint)
+        if relation is None or not isinstance(relation, sp.core.relational.Relational):
+            return None
+        if relation.free_symbols <= {x}:
+            relations.append(relation)
+    return relations
+
+
+class SymbolicVerifier:
+    """
+    Checks a solution's final answer against the problem with SymPy:
+    equation answers are substituted back (and compared with the full real
+    solution set), derivatives, integrals and limits are recomputed.
+
+    check() returns a VerificationResult-shaped dict, or None when the
+    problem or the answer cannot be read, so the LLM verifier decides.
+    Unlike the solver it is not limited to simple routes: whether the
+    problem text and the final answer parse is the only gate, so LLM
+    solutions to problems routed as hard are checked too.
+    """
+    def __init__(self, timeout=SYMBOLIC_TIMEOUT):
+        self.timeout = timeout
+
+    def accepts(self, route=None):
+        return os.getenv("SYMBOLIC_VERIFIER", "1") == "1"
+
+    def check(self, problem_data: dict, solution_text: str):
+        if os.getenv("SYMBOLIC_VERIFIER", "1") != "1":
+            return None
+        try:
+            problem = read_problem(problem_data)
+            answer = final_answer(solution_text)
+            if problem is None or answer is None:
+                return None
+            return getattr(self, f"_{problem['kind']}")(problem, answer, problem_data)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _result(is_correct, critique, correction=""):
+        return {
+            "is_correct": is_correct,
+            "confidence": 1.0,
+            "critique": critique,
+            "correction": correction,
+            "method": "symbolic"
+        }
+
+    def _equation(self, problem, answer, problem_data):
+        expr, x = problem["expr"], problem["x"]
+        claimed = answer_values(answer, x)
+        if claimed is None:
+            return None
+        wrong = [v for v in claimed if not _same(expr.subs(x, v), 0)]
+        if wrong:
+            return self._result(False, f"Substituting {x} = {', '.join(map(str, wrong))} does not satisfy the equation.",
+                                ", ".join(f"{x} = {s}" for s in real_solutions(expr, x)))
+
+        constraints = problem["constraints"]
+        violating = [v for v in claimed if not satisfies(v, constraints, x)]
+        expected = [s for s in real_solutions(expr, x) if satisfies(s, constraints, x)]
+        correction = ", ".join(f"{x} = {s}" for s in expected)
+        if violating:
+            return self._result(False, f"{x} = {', '.join(map(str, violating))} violates the constraints.", correction)
+        missing = [s for s in expected if not any(_same(s, v) for v in claimed)]
+        if missing:
+            return self._result(False, f"Missing solution(s): {', '.join(f'{x} = {s}' for s in missing)}.", correction)
+        return self._result(True, "Every claimed solution satisfies the equation and none are missing.")
+
+    def _derivative(self, problem, answer, problem_data):
+        expr, x = problem["expr"], problem["x"]
+        claimed = answer_expression(answer, x)
+        if claimed is None:
+            return None
+        expected = sp.diff(expr, x)
+        if _same(claimed, expected):
+            return self._result(True, "The derivative matches the symbolic derivative.")
+        return self._result(False, "The derivative does not match the symbolic derivative.", str(_natural(expected)))
+
+    def _integral(self, problem, answer, problem_data):
+        expr, x = problem["expr"], problem["x"]
+        claimed = answer_expression(answer, x)
+        if claimed is None:
+            return None
+        if "bounds" in problem:
+            expected = sp.integrate(expr, (x, *problem["bounds"]))
+            if not _is_clean(expected) or claimed.free_symbols:
+                return None
+            if _same(claimed, expected):
+                return self._result(True, "The value matches the evaluated definite integral.")
+            return self._result(False, "The value does not match the evaluated definite integral.", str(_natural(expected)))
+        # Antiderivatives may differ by a constant: differentiate instead
+        if _same(sp.diff(claimed, x), expr):
+            return self._result(True, "Differentiating the answer gives back the integrand.")
+        return self._result(False, "Differentiating the answer does not give back the integrand.",
+                            f"{sp.integrate(expr, x)} + C")
+
+    def _limit(self, problem, answer, problem_data):
+        claimed = answer_expression(answer, problem["x"])
+        if claimed is None or claimed.free_symbols:
+            return None
+        expected = limit_value(problem)
+        if not _is_clean(expected):
+            return None
+        if claimed == expected or (expected.is_finite and _same(claimed, expected)):
+            return self._result(True, "The value matches the computed limit.")
+        return self._result(False, "The value does not match the computed limit.", str(expected))
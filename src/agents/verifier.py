@@ -2,6 +2,8 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from .llm import get_llm
+from .symbolic import SymbolicVerifier
+import asyncio
 
 class VerificationResult(BaseModel):
     is_correct: bool = Field(description="True if the solution is correct, False otherwise.")
@@ -10,8 +12,15 @@ class VerificationResult(BaseModel):
     correction: str = Field(description="If incorrect, provide the corrected final answer or step.")
 
 class VerifierAgent:
-    def __init__(self):
-        self.llm = get_llm()
+    """
+    Checks solutions programmatically (SymbolicVerifier) whenever the
+    problem and final answer can be decided exactly, and with the LLM
+    otherwise. A symbolic confirmation is final; a symbolic rejection is
+    handed to the LLM as a note, since reading the problem is heuristic.
+    """
+    def __init__(self, use_cache=True):
+        self.llm = get_llm(agent="verifier", use_cache=use_cache)
+        self.symbolic = SymbolicVerifier()
         self.parser = JsonOutputParser(pydantic_object=VerificationResult)
         
         self.prompt = ChatPromptTemplate.from_template(
@@ -25,6 +34,9 @@ class VerifierAgent:
             Proposed Solution:
             {solution}
             
+            Automated check (it may have misread the problem; weigh it, do not just repeat it):
+            {symbolic_note}
+            
             Check for:
             1. Logical errors.
             2. Calculation mistakes.
@@ -37,9 +49,41 @@ class VerifierAgent:
         )
         self.chain = self.prompt | self.llm | self.parser
 
-    def verify(self, problem_text: str, solution_text: str):
-        return self.chain.invoke({
+    def _inputs(self, problem_text: str, solution_text: str, checked: dict = None):
+        note = "None."
+        if checked is not None:
+            note = f"SymPy disagrees with the final answer: {checked['critique']}"
+            if checked.get("correction"):
+                note += f" It computed: {checked['correction']}"
+        return {
             "problem": problem_text,
             "solution": solution_text,
+            "symbolic_note": note,
             "format_instructions": self.parser.get_format_instructions()
-        })
+        }
+
+    @staticmethod
+    def _problem(problem_text: str, problem_data: dict = None):
+        return problem_data or {"problem_text": problem_text}
+
+    def verify(self, problem_text: str, solution_text: str, problem_data: dict = None, route: dict = None):
+        checked = None
+        if self.symbolic.accepts(route):
+            checked = self.symbolic.check(self._problem(problem_text, problem_data), solution_text)
+        if checked is not None and checked["is_correct"]:
+            return checked
+        return self.chain.invoke(self._inputs(problem_text, solution_text, checked))
+
+    async def averify(self, problem_text: str, solution_text: str, problem_data: dict = None, route: dict = None):
+        checked = None
+        if self.symbolic.accepts(route):
+            try:
+                checked = await asyncio.wait_for(
+                    asyncio.to_thread(self.symbolic.check, self._problem(problem_text, problem_data), solution_text),
+                    self.symbolic.timeout
+                )
+            except asyncio.TimeoutError:
+                checked = None
+        if checked is not None and checked["is_correct"]:
+            return checked
+        return await self.chain.ainvoke(self._inputs(problem_text, solution_text, checked))
@@ -0,0 +1,191 @@
+import array
+import hashlib
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.utils.inference import configure_threads, get_profile
+from src.utils.kvcache import SQLiteKV
+
+DEFAULT_LOCAL_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH", os.path.join(os.getcwd(), "data", "cache", "embeddings.sqlite3")
+)
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    Offline embeddings with sentence-transformers on CPU.
+
+    The model is loaded on first use and shared by every instance in the
+    process. Encoding is batched. Torch's thread pools are process-wide and
+    sized once by configure_threads, shared with OCR/ASR: num_threads (or
+    LOCAL_EMBEDDING_THREADS) only applies if the embedder is the first to
+    load a model, otherwise the inference profile's threads are used.
+    """
+    _models = {}
+    _lock = threading.Lock()
+
+    def __init__(self, model_name=None, batch_size=None, num_threads=None):
+        self.model_name = model_name or os.getenv("LOCAL_EMBEDDING_MODEL", DEFAULT_LOCAL_MODEL)
+        self.batch_size = batch_size or int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+        self.num_threads = num_threads or int(os.getenv("LOCAL_EMBEDDING_THREADS") or 0) or None
+
+    def _model(self):
+        with LocalEmbeddings._lock:
+            model = LocalEmbeddings._models.get(self.model_name)
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+
+                if self.num_threads:
+                    configure_threads(self.num_threads)
+                else:
+                    get_profile().apply()
+                print(f"Loading local embedding model: {self.model_name}...")
+                model = SentenceTransformer(self.model_name, device="cpu")
+                LocalEmbeddings._models[self.model_name] = model
+            return model
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        vectors = self._model().encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Memoizes another Embeddings object.
+
+    Vectors are keyed on the embedding model id, whether the text was
+    embedded as a query or a document (some backends embed the two
+    differently) and a hash of the text, and kept in an in-process LRU. An optional SQLite tier (disk=True) keeps them
+    across restarts, so repeated queries skip the embedding call entirely.
+    """
+    def __init__(self, inner, max_entries=None, disk=None):
+        self.inner = inner
+        self.model_id = embedding_id(inner)
+        self.max_entries = max_entries or int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+        if disk is None:
+            disk = os.getenv("EMBEDDING_CACHE_DISK", "1") == "1"
+        self.disk = SQLiteKV(EMBEDDING_CACHE_PATH, table="embeddings", max_entries=100000) if disk else None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text, kind):
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_id}:{kind}:{digest}"
+
+    def _get(self, key):
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+        if self.disk is not None:
+            blob = self.disk.get(key)
+            if blob is not None:
+                # Stored as doubles, so both tiers return the same floats
+                vector = array.array("d", blob).tolist()
+                self._remember(key, vector)
+                with self._lock:
+                    self.hits += 1
+                return vector
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _put(self, key, vector):
+        self._remember(key, vector)
+        if self.disk is not None:
+            self.disk.set(key, array.array("d", vector).tobytes())
+
+    def embed_documents(self, texts):
+        keys = [self._key(text, "d") for text in texts]
+        vectors = [self._get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            fresh = self.inner.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                self._put(keys[i], vector)
+                vectors[i] = vector
+        return vectors
+
+    def embed_query(self, text):
+        key = self._key(text, "q")
+        vector = self._get(key)
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self._put(key, vector)
+        return vector
+
+    async def aembed_query(self, text):
+        key = self._key(text, "q")
+        vector = self._get(key)
+        if vector is None:
+            vector = await self.inner.aembed_query(text)
+            self._put(key, vector)
+        return vector
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_id,
+            "memory_entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None
+        }
+
+
+def _unwrap(embeddings):
+    return embeddings.inner if isinstance(embeddings, CachedEmbeddings) else embeddings
+
+
+def embedding_id(embeddings):
+    """
+    Stable "<backend>:<model>" identifier for an embeddings object.
+    """
+    embeddings = _unwrap(embeddings)
+    if isinstance(embeddings, LocalEmbeddings):
+        return f"local:{embeddings.model_name}"
+    model = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None) or "unknown"
+    backend = type(embeddings).__name__.replace("Embeddings", "").lower()
+    return f"{backend}:{model}"
+
+
+def collection_name(base, embeddings):
+    """
+    Chroma collection name for an embedding backend. API backends keep the
+    original names; local models get their own collection so vectors of
+    different dimensions never share one.
+    """
+    embeddings = _unwrap(embeddings)
+    if isinstance(embeddings, LocalEmbeddings):
+        slug = re.sub(r"[^a-zA-Z0-9]+", "-", embeddings.model_name.split("/")[-1]).strip("-").lower()
+        return f"{base}_local_{slug}"
+    return base
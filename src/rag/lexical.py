@@ -0,0 +1,122 @@
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+from langchain_core.documents import Document
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "find", "for", "from", "how", "if", "in", "is",
+    "it", "of", "on", "or", "that", "the", "then", "this", "to", "what", "when", "where", "which",
+    "with"
+}
+
+
+def tokenize(text):
+    """
+    Lowercased alphanumeric tokens with stopwords dropped and plurals folded
+    ("derivatives" -> "derivative", "probabilities" -> "probability").
+    """
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """
+    In-process Okapi BM25 index over knowledge base chunks, persisted as
+    JSON next to the Chroma database.
+    """
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs = {}
+        self.postings = defaultdict(dict)
+        self.avg_length = 0.0
+
+    def build(self, ids, texts, metadatas):
+        self.docs = {}
+        self.postings = defaultdict(dict)
+        for doc_id, text, metadata in zip(ids, texts, metadatas):
+            counts = Counter(tokenize(text))
+            self.docs[doc_id] = {"text": text, "metadata": metadata or {}, "length": sum(counts.values())}
+            for term, tf in counts.items():
+                self.postings[term][doc_id] = tf
+        self.avg_length = sum(d["length"] for d in self.docs.values()) / len(self.docs) if self.docs else 0.0
+        return self
+
+    def search(self, query, k=3, filter=None):
+        """
+        Returns [(doc_id, score)] best first. filter is an exact-match dict
+        on metadata, like Chroma's.
+        """
+        scores = defaultdict(float)
+        n = len(self.docs)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                length = self.docs[doc_id]["length"]
+                norm = tf + self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+                scores[doc_id] += idf * tf * (self.k1 + 1) / norm
+
+        if filter:
+            scores = {
+                doc_id: score for doc_id, score in scores.items()
+                if all(self.docs[doc_id]["metadata"].get(key) == value for key, value in filter.items())
+            }
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def documents(self, query, k=3, filter=None):
+        return [
+            Document(page_content=self.docs[doc_id]["text"], metadata=self.docs[doc_id]["metadata"], id=doc_id)
+            for doc_id, _ in self.search(query, k=k, filter=filter)
+        ]
+
+    def __len__(self):
+        return len(self.docs)
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"k1": self.k1, "b": self.b, "docs": self.docs}, file)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        index = cls(k1=data["k1"], b=data["b"])
+        ids = list(data["docs"])
+        return index.build(
+            ids,
+            [data["docs"][doc_id]["text"] for doc_id in ids],
+            [data["docs"][doc_id]["metadata"] for doc_id in ids]
+        )
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuses several best-first lists of Documents. Documents are matched on
+    source + content, and each list contributes 1 / (k + rank).
+    """
+    scores = defaultdict(float)
+    docs = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = (doc.metadata.get("source"), doc.page_content)
+            scores[key] += 1.0 / (k + rank + 1)
+            docs.setdefault(key, doc)
+    ordered = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [docs[key] for key in ordered]
@@ -0,0 +1,193 @@
+import os
+import time
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .topics import normalize_topic
+
+# Cosine similarity above which a new solved problem counts as a duplicate
+DEDUP_THRESHOLD = float(os.getenv("MEMORY_DEDUP_THRESHOLD", "0.95"))
+# Maximum stored problems; 0 disables eviction
+MEMORY_CAPACITY = int(os.getenv("MEMORY_CAPACITY", "2000"))
+# lfu (fewest hits first, then oldest use) or lru (oldest use first)
+EVICTION_POLICY = os.getenv("MEMORY_EVICTION_POLICY", "lfu").lower()
+
+
+def _cosine(a, b):
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(a @ b) / denom if denom else 0.0
+
+
+class SolvedProblemMemory:
+    """
+    Bounded store of verified solutions on top of the math_memory Chroma
+    collection.
+
+    Inserts that are near-duplicates of an existing entry only bump that
+    entry. Every retrieval updates the hit count and last-used time, which
+    drive LFU/LRU eviction once the collection exceeds its capacity.
+    """
+    def __init__(self, store, embeddings, capacity=MEMORY_CAPACITY, policy=EVICTION_POLICY,
+                 threshold=DEDUP_THRESHOLD):
+        self.store = store
+        self.embeddings = embeddings
+        self.capacity = capacity
+        self.policy = policy
+        self.threshold = threshold
+
+    @property
+    def collection(self):
+        return self.store._collection
+
+    def add(self, problem_text, solution_text, topic):
+        """
+        Returns {"status": "added" | "duplicate", "id": ...}; added entries
+        also report how many older entries were evicted to make room.
+        """
+        content = f"Problem: {problem_text}\nSolution: {solution_text}"
+        embedding = self.embeddings.embed_documents([content])[0]
+        now = time.time()
+
+        nearest = self.collection.query(
+            query_embeddings=[embedding], n_results=1, include=["embeddings", "metadatas"]
+        )
+        if nearest["ids"] and nearest["ids"][0]:
+            match_id = nearest["ids"][0][0]
+            similarity = _cosine(embedding, nearest["embeddings"][0][0])
+            if similarity >= self.threshold:
+                metadata = dict(nearest["metadatas"][0][0] or {})
+                metadata["duplicates"] = int(metadata.get("duplicates", 0)) + 1
+                metadata["last_used"] = now
+                self.collection.update(ids=[match_id], metadatas=[metadata])
+                return {"status": "duplicate", "id": match_id, "similarity": round(similarity, 4)}
+
+        doc_id = str(uuid.uuid4())
+        self.collection.add(
+            ids=[doc_id],
+            embeddings=[embedding],
+            documents=[content],
+            metadatas=[{
+                "source": "user_memory",
+                "topic": normalize_topic(topic),
+                "topic_label": topic or "",
+                "hits": 0,
+                "duplicates": 0,
+                "created": now,
+                "last_used": now
+            }]
+        )
+        # A new entry has no hits yet, so LFU would pick it first; it only
+        # competes for its place once it has had a chance to be retrieved.
+        evicted = self.evict(protect={doc_id})
+        return {"status": "added", "id": doc_id, "evicted": evicted}
+
+    def search(self, embedding, k=1, filter=None, touch=True):
+        """
+        Nearest stored problems as Documents. With touch=True their hit
+        counts and last-used times are updated.
+        """
+        results = self.collection.query(
+            query_embeddings=[embedding], n_results=k, where=filter, include=["documents", "metadatas"]
+        )
+        ids = results["ids"][0] if results["ids"] else []
+        docs = [
+            Document(page_content=text, metadata=dict(metadata or {}), id=doc_id)
+            for doc_id, text, metadata in zip(ids, results["documents"][0], results["metadatas"][0])
+        ] if ids else []
+        if touch:
+            self.touch(docs)
+        return docs
+
+    def touch(self, docs):
+        """
+        Records a retrieval of docs (Documents returned by search).
+        """
+        if not docs:
+            return
+        now = time.time()
+        updated = []
+        for doc in docs:
+            metadata = dict(doc.metadata)
+            metadata["hits"] = int(metadata.get("hits", 0)) + 1
+            metadata["last_used"] = now
+            updated.append(metadata)
+        self.collection.update(ids=[doc.id for doc in docs], metadatas=updated)
+
+    def _eviction_order(self, ids, metadatas):
+        def last_used(metadata):
+            return float(metadata.get("last_used", metadata.get("created", 0)))
+
+        entries = list(zip(ids, [m or {} for m in metadatas]))
+        if self.policy == "lru":
+            entries.sort(key=lambda entry: last_used(entry[1]))
+        else:
+            entries.sort(key=lambda entry: (int(entry[1].get("hits", 0)), last_used(entry[1])))
+        return [doc_id for doc_id, _ in entries]
+
+    def evict(self, capacity=None, protect=()):
+        """
+        Deletes entries beyond capacity according to the eviction policy,
+        never ids in protect. Returns the number of entries removed.
+        """
+        capacity = self.capacity if capacity is None else capacity
+        if not capacity:
+            return 0
+        excess = self.collection.count() - capacity
+        if excess <= 0:
+            return 0
+        data = self.collection.get(include=["metadatas"])
+        order = self._eviction_order(data["ids"], data["metadatas"])
+        victims = [doc_id for doc_id in order if doc_id not in protect][:excess]
+        if victims:
+            self.collection.delete(ids=victims)
+        return len(victims)
+
+    def compact(self, threshold=None, capacity=None):
+        """
+        Offline pass: merges near-duplicate entries (keeping the most used
+        one and summing hit counts), then applies the capacity limit.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        data = self.collection.get(include=["embeddings", "metadatas"])
+        ids = data["ids"]
+        if not ids:
+            return {"before": 0, "merged": 0, "evicted": 0, "after": 0}
+
+        vectors = np.asarray(data["embeddings"], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        metadatas = [dict(m or {}) for m in data["metadatas"]]
+
+        # Most used entries first, so they survive as the representative
+        order = sorted(range(len(ids)), key=lambda i: int(metadatas[i].get("hits", 0)), reverse=True)
+        removed = set()
+        updates = {}
+        for i in order:
+            if i in removed:
+                continue
+            similar = np.nonzero(vectors @ vectors[i] >= threshold)[0]
+            for j in map(int, similar):
+                if j == i or j in removed:
+                    continue
+                removed.add(j)
+                keeper = updates.setdefault(i, metadatas[i])
+                keeper["hits"] = int(keeper.get("hits", 0)) + int(metadatas[j].get("hits", 0))
+                keeper["duplicates"] = int(keeper.get("duplicates", 0)) + 1 + int(metadatas[j].get("duplicates", 0))
+                keeper["last_used"] = max(float(keeper.get("last_used", 0)), float(metadatas[j].get("last_used", 0)))
+
+        if updates:
+            self.collection.update(ids=[ids[i] for i in updates], metadatas=list(updates.values()))
+        if removed:
+            self.collection.delete(ids=[ids[j] for j in removed])
+
+        evicted = self.evict(capacity)
+        return {
+            "before": len(ids),
+            "merged": len(removed),
+            "evicted": evicted,
+            "after": self.collection.count()
+        }
@@ -1,55 +1,267 @@
+import asyncio
+import concurrent.futures
+import hashlib
 import os
 from langchain_community.vectorstores import Chroma
 from langchain_openai import OpenAIEmbeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from dotenv import load_dotenv
 
+from .embeddings import CachedEmbeddings, LocalEmbeddings, collection_name
+from .lexical import BM25Index, reciprocal_rank_fusion
+from .topics import normalize_topic
+from .memory import SolvedProblemMemory
+
 load_dotenv()
 
 PERSIST_DIRECTORY = os.path.join(os.getcwd(), "data", "chroma_db")
 
+# hybrid (BM25 + vectors, fused), dense, or lexical
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+# Seconds to wait for a query embedding before falling back to BM25 only
+EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "5"))
+
+_embed_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="embed")
+
 def get_embeddings():
-    if os.getenv("OPENAI_API_KEY"):
+    """
+    EMBEDDING_BACKEND selects openai, google or local. The default (auto)
+    prefers OpenAI, then Gemini, and falls back to the local
+    sentence-transformers model when neither key is set (e.g. Groq-only).
+    """
+    backend = os.getenv("EMBEDDING_BACKEND", "auto").lower()
+    if backend == "openai" or (backend == "auto" and os.getenv("OPENAI_API_KEY")):
         return OpenAIEmbeddings(model="text-embedding-3-small")
-    elif os.getenv("GOOGLE_API_KEY"):
+    elif backend == "google" or (backend == "auto" and os.getenv("GOOGLE_API_KEY")):
         return GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+    elif backend in ("auto", "local"):
+        return LocalEmbeddings()
     else:
-        raise ValueError("No API Key for Embeddings")
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
 
 class RAGStore:
     def __init__(self):
-        self.embeddings = get_embeddings()
+        # One cached embedder serves both collections
+        self.embeddings = CachedEmbeddings(get_embeddings())
         self.vectorstore = Chroma(
             persist_directory=PERSIST_DIRECTORY,
             embedding_function=self.embeddings,
-            collection_name="math_knowledge"
+            collection_name=collection_name("math_knowledge", self.embeddings)
         )
         # Memory Store for solved problems
         self.memory_store = Chroma(
             persist_directory=PERSIST_DIRECTORY,
             embedding_function=self.embeddings,
-            collection_name="math_memory"
+            collection_name=collection_name("math_memory", self.embeddings)
         )
+        self.memory = SolvedProblemMemory(self.memory_store, self.embeddings)
+        self._lexical = None
+        self._lexical_mtime = None
     
-    def add_documents(self, docs):
+    def add_documents(self, docs, ids=None):
         """
         Docs: List of LangChain Document objects
+        Ids: Optional stable IDs (one per doc); re-adding an ID overwrites it
+        """
+        self.vectorstore.add_documents(docs, ids=ids)
+
+    def embed_documents(self, texts, cache=True):
+        """
+        cache=False skips the embedding cache (bulk ingestion would only
+        fill it with vectors that are never queried again).
+        """
+        embedder = self.embeddings if cache else self.embeddings.inner
+        return embedder.embed_documents(texts)
+
+    def add_embedded(self, ids, texts, metadatas, embeddings):
+        """
+        Writes precomputed vectors straight to the knowledge base collection.
+        """
+        self.vectorstore._collection.upsert(
+            ids=list(ids), documents=list(texts), metadatas=list(metadatas), embeddings=list(embeddings)
+        )
+
+    def delete_documents(self, ids):
+        if ids:
+            self.vectorstore.delete(ids=list(ids))
+
+    def existing_ids(self, ids):
+        """
+        Returns the subset of ids already stored in the knowledge base.
+        """
+        ids = list(ids)
+        found = set()
+        # Chunked to stay under SQLite's bound-parameter limit on large KBs
+        for start in range(0, len(ids), 500):
+            found.update(self.vectorstore.get(ids=ids[start:start + 500], include=[])["ids"])
+        return found
+
+    @property
+    def collection_name(self):
+        return self.vectorstore._collection.name
+
+    @property
+    def manifest_path(self):
+        # One ingest manifest per collection, since each embedding backend has its own
+        return os.path.join(PERSIST_DIRECTORY, f"kb_manifest_{self.collection_name}.json")
+
+    def kb_version(self):
+        """
+        Hash of the ingest manifest; changes whenever bootstrap adds, edits
+        or removes knowledge base content.
+        """
+        try:
+            with open(self.manifest_path, "rb") as file:
+                return hashlib.sha256(file.read()).hexdigest()[:16]
+        except OSError:
+            return "none"
+
+    def embed_query(self, query):
+        return self.embeddings.embed_query(query)
+
+    async def aembed_query(self, query):
+        return await self.embeddings.aembed_query(query)
+
+    def try_embed_query(self, query):
+        """
+        Embeds query, or returns None if the embedding service fails or takes
+        longer than EMBEDDING_TIMEOUT.
         """
-        self.vectorstore.add_documents(docs)
+        future = _embed_executor.submit(self.embed_query, query)
+        try:
+            return future.result(timeout=EMBEDDING_TIMEOUT)
+        except Exception:
+            return None
 
-    def retrieve(self, query, k=3):
-        return self.vectorstore.similarity_search(query, k=k)
+    async def atry_embed_query(self, query):
+        try:
+            return await asyncio.wait_for(self.aembed_query(query), EMBEDDING_TIMEOUT)
+        except Exception:
+            return None
+
+    @property
+    def lexical_index_path(self):
+        return os.path.join(PERSIST_DIRECTORY, f"bm25_{self.collection_name}.json")
+
+    def lexical_index(self):
+        """
+        The persisted BM25 index, reloaded whenever bootstrap rewrites it.
+        None if it has not been built yet.
+        """
+        path = self.lexical_index_path
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        if self._lexical is None or mtime != self._lexical_mtime:
+            self._lexical = BM25Index.load(path)
+            self._lexical_mtime = mtime
+        return self._lexical
+
+    def rebuild_lexical_index(self):
+        """
+        Rebuilds the BM25 index from the knowledge base collection, so it
+        always covers exactly the chunks that have been embedded.
+        """
+        data = self.vectorstore.get(include=["documents", "metadatas"])
+        index = BM25Index().build(data["ids"], data["documents"], data["metadatas"])
+        index.save(self.lexical_index_path)
+        return len(index)
+
+    def _lexical_plan(self, mode):
+        mode = mode or RETRIEVAL_MODE
+        index = self.lexical_index() if mode != "dense" else None
+        return mode, index
+
+    @staticmethod
+    def _partition(topic):
+        """
+        Chroma/BM25 metadata filter for a parser topic, or None when the
+        topic has no partition.
+        """
+        topic = normalize_topic(topic)
+        return None if topic == "other" else {"topic": topic}
+
+    @staticmethod
+    def _top_up(partitioned, k, global_docs):
+        # Too few hits inside the partition: fill up with global results
+        seen = {(d.metadata.get("source"), d.page_content) for d in partitioned}
+        extra = [d for d in global_docs if (d.metadata.get("source"), d.page_content) not in seen]
+        return (partitioned + extra)[:k]
+
+    def _search(self, query, k, embedding, index, filter):
+        if embedding is None:
+            return index.documents(query, k=k, filter=filter) if index else []
+        fetch_k = max(k * 4, 10) if index else k
+        dense = self.vectorstore.similarity_search_by_vector(embedding, k=fetch_k, filter=filter)
+        if index is None:
+            return dense[:k]
+        lexical = index.documents(query, k=fetch_k, filter=filter)
+        return reciprocal_rank_fusion([dense, lexical])[:k]
+
+    async def _asearch(self, query, k, embedding, index, filter):
+        if embedding is None:
+            return index.documents(query, k=k, filter=filter) if index else []
+        fetch_k = max(k * 4, 10) if index else k
+        dense = await self.vectorstore.asimilarity_search_by_vector(embedding, k=fetch_k, filter=filter)
+        if index is None:
+            return dense[:k]
+        lexical = index.documents(query, k=fetch_k, filter=filter)
+        return reciprocal_rank_fusion([dense, lexical])[:k]
+
+    def retrieve(self, query, k=3, embedding=None, mode=None, topic=None):
+        """
+        Pass a precomputed embedding to reuse one query vector across
+        retrieve and retrieve_memory. mode overrides RETRIEVAL_MODE; in
+        hybrid mode a slow or failing embedding service degrades to BM25
+        results instead of an error. With a topic, only that partition is
+        searched unless it returns fewer than k chunks.
+        """
+        mode, index = self._lexical_plan(mode)
+        if mode == "lexical":
+            embedding = None
+        elif embedding is None:
+            embedding = self.try_embed_query(query) if index else self.embed_query(query)
+
+        filter = self._partition(topic)
+        docs = self._search(query, k, embedding, index, filter)
+        if filter and len(docs) < k:
+            docs = self._top_up(docs, k, self._search(query, k, embedding, index, None))
+        return docs
+
+    async def aretrieve(self, query, k=3, embedding=None, mode=None, topic=None):
+        mode, index = self._lexical_plan(mode)
+        if mode == "lexical":
+            embedding = None
+        elif embedding is None:
+            embedding = await (self.atry_embed_query(query) if index else self.aembed_query(query))
+
+        filter = self._partition(topic)
+        docs = await self._asearch(query, k, embedding, index, filter)
+        if filter and len(docs) < k:
+            docs = self._top_up(docs, k, await self._asearch(query, k, embedding, index, None))
+        return docs
     
     def add_to_memory(self, problem_text, solution_text, topic):
-        from langchain_core.documents import Document
-        doc = Document(
-            page_content=f"Problem: {problem_text}\nSolution: {solution_text}",
-            metadata={"source": "user_memory", "topic": topic}
-        )
-        self.memory_store.add_documents([doc])
+        """
+        Stores a solved problem unless a near-duplicate is already stored.
+        """
+        return self.memory.add(problem_text, solution_text, topic)
         
-    def retrieve_memory(self, query, k=1):
-        return self.memory_store.similarity_search(query, k=k)
+    def retrieve_memory(self, query, k=1, embedding=None, topic=None):
+        if embedding is None:
+            embedding = self.embed_query(query)
+        filter = self._partition(topic)
+        docs = self.memory.search(embedding, k=k, filter=filter, touch=False)
+        if filter and len(docs) < k:
+            docs = self._top_up(docs, k, self.memory.search(embedding, k=k, touch=False))
+        self.memory.touch(docs)
+        return docs
+
+    async def aretrieve_memory(self, query, k=1, embedding=None, topic=None):
+        if embedding is None:
+            embedding = await self.aembed_query(query)
+        return await asyncio.to_thread(self.retrieve_memory, query, k, embedding, topic)
     
     def as_retriever(self):
         return self.vectorstore.as_retriever()
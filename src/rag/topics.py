@@ -0,0 +1,30 @@
+import re
+
+# Canonical partitions, matching the router's categories
+TOPICS = ("algebra", "calculus", "probability", "linear_algebra")
+
+TOPIC_KEYWORDS = {
+    "linear_algebra": ("linear algebra", "matrix", "matrices", "vector", "determinant", "eigen"),
+    "calculus": ("calculus", "derivative", "differentiat", "integra", "limit", "series expansion"),
+    "probability": ("probabilit", "statistic", "bayes", "combinatoric", "permutation", "combination", "expected value"),
+    "algebra": ("algebra", "equation", "quadratic", "polynomial", "logarithm", "progression", "inequalit"),
+}
+
+
+def normalize_topic(topic):
+    """
+    Maps a free-form topic ("Algebra", "Differential Calculus", "linear
+    algebra", "algebra.md") to one of TOPICS, or "other".
+    """
+    if not topic:
+        return "other"
+    text = re.sub(r"[^a-z]+", " ", str(topic).lower()).strip()
+    if text.endswith(" md"):
+        text = text[:-3]
+    slug = text.replace(" ", "_")
+    if slug in TOPICS:
+        return slug
+    for canonical, keywords in TOPIC_KEYWORDS.items():
+        if any(keyword in text for keyword in keywords):
+            return canonical
+    return "other"
@@ -0,0 +1,497 @@
+import ast
+import asyncio
+import builtins
+import contextlib
+import ctypes
+import io
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, timeouts still apply
+    resource = None
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Modules snippets may import; everything else raises ImportError
+ALLOWED_MODULES = frozenset({
+    "math", "cmath", "fractions", "decimal", "statistics", "itertools", "functools", "collections",
+    "random", "operator", "numbers", "sympy", "numpy", "mpmath",
+})
+# Imported once per worker so calls don't pay for them
+PRELOAD_MODULES = ("math", "fractions", "sympy", "numpy")
+# getattr & co. would turn blocked attribute names into plain strings
+BLOCKED_BUILTINS = ("open", "exec", "eval", "compile", "input", "breakpoint", "exit", "quit", "help",
+                    "memoryview", "globals", "vars", "getattr", "setattr", "delattr")
+# Attribute (and from-import) names that lead from the allowed modules to
+# other modules, files or processes, e.g. sympy.utilities.misc.os or numpy.load
+BLOCKED_ATTRIBUTES = frozenset({
+    "os", "sys", "subprocess", "socket", "_socket", "ctypes", "ctypeslib", "builtins", "importlib",
+    "shutil", "pathlib", "io", "pickle", "marshal", "signal", "resource", "posix", "nt", "gc",
+    "inspect", "threading", "multiprocessing", "system", "popen", "open", "preview",
+    "load", "loadtxt", "genfromtxt", "fromfile", "fromregex", "tofile", "save", "savez",
+    "savez_compressed", "savetxt", "memmap", "DataSource", "attrgetter", "methodcaller",
+    "import_module", "importtools", "external",
+})
+MAX_OUTPUT_CHARS = 4000
+
+# Run by each worker interpreter; argv[1] is its JSON config
+_BOOTSTRAP = (
+    "import json, sys; config = json.loads(sys.argv[1]); sys.path[:] = config['path']; "
+    "from src.tools.python_repl import _main; _main(config)"
+)
+_CLONE_NEWNET = 0x40000000
+_CLONE_NEWUSER = 0x10000000
+_PR_SET_NO_NEW_PRIVS = 38
+# Landlock (linux/landlock.h); the syscall numbers are the same on every architecture
+_SYS_LANDLOCK_CREATE_RULESET, _SYS_LANDLOCK_ADD_RULE, _SYS_LANDLOCK_RESTRICT_SELF = 444, 445, 446
+_LANDLOCK_CREATE_RULESET_VERSION = 1
+_LANDLOCK_RULE_PATH_BENEATH = 1
+_FS_READ_FILE, _FS_READ_DIR = 1 << 2, 1 << 3
+_FS_READ = _FS_READ_FILE | _FS_READ_DIR
+# write_file, remove_dir, remove_file, make_dir, make_reg; never devices
+_FS_WRITE = (1 << 1) | (1 << 4) | (1 << 5) | (1 << 7) | (1 << 8)
+_FS_TRUNCATE = 1 << 14
+# Every filesystem right each ABI version knows (execute is bit 0)
+_FS_RIGHTS_BY_ABI = {1: (1 << 13) - 1, 2: (1 << 14) - 1, 3: (1 << 15) - 1, 4: (1 << 15) - 1, 5: (1 << 16) - 1}
+_NET_TCP = (1 << 0) | (1 << 1)
+_SCOPE_ALL = (1 << 0) | (1 << 1)
+
+
+def _limit_output(text):
+    if len(text) <= MAX_OUTPUT_CHARS:
+        return text
+    return text[:MAX_OUTPUT_CHARS] + f"\n... ({len(text) - MAX_OUTPUT_CHARS} characters truncated)"
+
+
+def _restricted_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name.split(".")[0] not in ALLOWED_MODULES:
+        raise ImportError(f"import of '{name}' is not allowed in the sandbox")
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+def _sandbox_builtins():
+    allowed = {name: getattr(builtins, name) for name in dir(builtins) if name not in BLOCKED_BUILTINS}
+    allowed["__import__"] = _restricted_import
+    return allowed
+
+
+def _is_blocked(name):
+    return name.startswith("__") and name.endswith("__") or name in BLOCKED_ATTRIBUTES
+
+
+def check_code(tree):
+    """
+    Raises PermissionError if the parsed snippet names a dunder (the way
+    from any object to __subclasses__(), __globals__ and so every loaded
+    module) or one of BLOCKED_ATTRIBUTES, as a name, an attribute, an
+    imported name or a match-pattern keyword.
+    """
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute):
+            names = [node.attr]
+        elif isinstance(node, ast.Name):
+            names = [node.id]
+        elif isinstance(node, ast.alias):
+            names = node.name.split(".") + [node.asname or ""]
+        elif isinstance(node, ast.MatchClass):
+            names = node.kwd_attrs
+        else:
+            continue
+        for name in names:
+            if _is_blocked(name):
+                raise PermissionError(f"access to '{name}' is not allowed in the sandbox")
+
+
+def _isolate_network():
+    """
+    Moves the worker into a new network namespace, which has no interfaces
+    but a downed loopback, so no host can be reached. Needs root or
+    unprivileged user namespaces, and (for the latter) must run before any
+    thread is started. Raises OSError if neither works.
+    """
+    if not sys.platform.startswith("linux"):
+        raise OSError("network namespaces need Linux")
+    try:
+        _unshare(_CLONE_NEWNET)
+    except OSError:
+        _unshare(_CLONE_NEWUSER | _CLONE_NEWNET)
+
+
+def _unshare(flags):
+    if hasattr(os, "unshare"):  # Python 3.12+
+        os.unshare(flags)
+        return
+    _syscall(ctypes.CDLL(None, use_errno=True).unshare, flags)
+
+
+def _syscall(function, *args):
+    result = function(*args)
+    if result < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return result
+
+
+class _RulesetAttr(ctypes.Structure):
+    _fields_ = [("handled_access_fs", ctypes.c_uint64), ("handled_access_net", ctypes.c_uint64),
+                ("scoped", ctypes.c_uint64)]
+
+
+class _PathBeneathAttr(ctypes.Structure):
+    _pack_ = 1
+    _fields_ = [("allowed_access", ctypes.c_uint64), ("parent_fd", ctypes.c_int32)]
+
+
+def _readable_paths():
+    """
+    Where the interpreter may still import from: sys.path and the install
+    prefixes, minus the project itself (.env, data/) and its ancestors.
+    """
+    paths = set()
+    for path in sys.path + [sys.prefix, sys.base_prefix, sys.exec_prefix]:
+        path = os.path.abspath(path) if path else None
+        if not path or not os.path.exists(path):
+            continue
+        if path == ROOT or ROOT.startswith(path.rstrip(os.sep) + os.sep):
+            continue
+        paths.add(path)
+    return sorted(paths)
+
+
+def _isolate_filesystem(writable):
+    """
+    Landlock ruleset: read-only access to _readable_paths(), read-write
+    access to writable, nothing anywhere else, and no execve at all. Where
+    the kernel's Landlock ABI allows, TCP bind/connect and signals to
+    processes outside the sandbox are denied as well. Raises OSError if
+    Landlock is unavailable.
+    """
+    if not sys.platform.startswith("linux"):
+        raise OSError("Landlock needs Linux")
+    libc = ctypes.CDLL(None, use_errno=True)
+    libc.syscall.restype = ctypes.c_long
+    abi = _syscall(libc.syscall, _SYS_LANDLOCK_CREATE_RULESET, None, ctypes.c_size_t(0),
+                   ctypes.c_uint32(_LANDLOCK_CREATE_RULESET_VERSION))
+    handled = _FS_RIGHTS_BY_ABI[min(abi, max(_FS_RIGHTS_BY_ABI))]
+    write = _FS_WRITE | (_FS_TRUNCATE if abi >= 3 else 0)
+    attr = _RulesetAttr(handled, _NET_TCP if abi >= 4 else 0, _SCOPE_ALL if abi >= 6 else 0)
+    size = 8 if abi < 4 else 16 if abi < 6 else 24
+    ruleset = _syscall(libc.syscall, _SYS_LANDLOCK_CREATE_RULESET, ctypes.byref(attr), ctypes.c_size_t(size),
+                       ctypes.c_uint32(0))
+    try:
+        rules = [(path, _FS_READ) for path in _readable_paths()] + [(writable, _FS_READ | write)]
+        for path, access in rules:
+            if not os.path.isdir(path):
+                access = _FS_READ_FILE
+            fd = os.open(path, os.O_PATH | os.O_CLOEXEC)
+            try:
+                rule = _PathBeneathAttr(access, fd)
+                _syscall(libc.syscall, _SYS_LANDLOCK_ADD_RULE, ctypes.c_int(ruleset),
+                         ctypes.c_int(_LANDLOCK_RULE_PATH_BENEATH), ctypes.byref(rule), ctypes.c_uint32(0))
+            finally:
+                os.close(fd)
+        _syscall(libc.prctl, _PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0)
+        _syscall(libc.syscall, _SYS_LANDLOCK_RESTRICT_SELF, ctypes.c_int(ruleset), ctypes.c_uint32(0))
+    finally:
+        os.close(ruleset)
+
+
+def _set_memory_limit(memory_mb):
+    if resource is None or not memory_mb:
+        return
+    limit = memory_mb * 1024 * 1024
+    with contextlib.suppress(ValueError, OSError):
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _set_cpu_limit(cpu_seconds):
+    """
+    RLIMIT_CPU counts the worker's whole lifetime, so the soft limit is
+    moved to "CPU used so far + cpu_seconds" before every call. Exceeding it
+    kills the worker with SIGXCPU.
+    """
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + int(cpu_seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    with contextlib.suppress(ValueError, OSError):
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def execute(code, namespace):
+    """
+    Runs code in namespace, returning (stdout, repr of the trailing
+    expression or None). Exceptions propagate.
+    """
+    tree = ast.parse(code, mode="exec")
+    check_code(tree)
+    last = tree.body.pop() if tree.body and isinstance(tree.body[-1], ast.Expr) else None
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        exec(compile(tree, "<sandbox>", "exec"), namespace)
+        value = eval(compile(ast.Expression(last.value), "<sandbox>", "eval"), namespace) if last else None
+    return stdout.getvalue(), None if value is None else repr(value)
+
+
+def _worker(requests, replies, cpu_seconds, memory_mb):
+    def send(message):
+        replies.write(json.dumps(message) + "\n")
+        replies.flush()
+
+    # No snippet runs unless both isolations are in place
+    try:
+        # Before the preloads start numpy's threads
+        _isolate_network()
+    except OSError as e:
+        send({"ready": False, "error": f"network isolation unavailable: {e}"})
+        return
+    preloaded = {}
+    for name in PRELOAD_MODULES:
+        with contextlib.suppress(ImportError):
+            preloaded[name] = __import__(name)
+    try:
+        _isolate_filesystem(os.getcwd())
+    except OSError as e:
+        send({"ready": False, "error": f"filesystem isolation unavailable: {e}"})
+        return
+    _set_memory_limit(memory_mb)
+    send({"ready": True})
+
+    safe_builtins = _sandbox_builtins()
+    for line in requests:
+        code = json.loads(line)
+        if code is None:
+            return
+
+        namespace = {"__builtins__": safe_builtins, "__name__": "__sandbox__", **preloaded}
+        if "sympy" in preloaded:
+            namespace["sp"] = preloaded["sympy"]
+        if "numpy" in preloaded:
+            namespace["np"] = preloaded["numpy"]
+
+        _set_cpu_limit(cpu_seconds)
+        start = time.perf_counter()
+        try:
+            stdout, value = execute(code, namespace)
+            reply = {"ok": True, "stdout": _limit_output(stdout), "result": value and _limit_output(value)}
+        except MemoryError:
+            reply = {"ok": False, "error": "MemoryError: memory limit exceeded"}
+        except BaseException as e:
+            lines = traceback.format_exception_only(type(e), e)
+            reply = {"ok": False, "error": _limit_output("".join(lines).strip())}
+        reply["seconds"] = round(time.perf_counter() - start, 4)
+        send(reply)
+
+
+def _main(config):
+    """
+    Worker entry point. Requests and replies are JSON lines on stdin and
+    the original stdout; fd 1 itself is pointed at devnull so stray writes
+    from native code cannot corrupt the replies.
+    """
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    requests = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+    _worker(requests, replies, config["cpu_seconds"], config["memory_mb"])
+
+
+def _worker_env(cwd):
+    """
+    A worker's whole environment: none of the parent's variables (API keys
+    live there) beyond what the interpreter needs to start.
+    """
+    env = {"PATH": os.defpath, "HOME": cwd, "TMPDIR": cwd, "TEMP": cwd, "TMP": cwd}
+    if "SYSTEMROOT" in os.environ:  # Windows
+        env["SYSTEMROOT"] = os.environ["SYSTEMROOT"]
+    return env
+
+
+class _Worker:
+    def __init__(self, cpu_seconds, memory_mb):
+        # Empty, private working directory, removed with the worker
+        self.cwd = tempfile.mkdtemp(prefix="python_repl_")
+        config = {"path": [ROOT] + sys.path, "cpu_seconds": cpu_seconds, "memory_mb": memory_mb}
+        self.process = subprocess.Popen(
+            [sys.executable, "-c", _BOOTSTRAP, json.dumps(config)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            cwd=self.cwd, env=_worker_env(self.cwd), encoding="utf-8"
+        )
+        self._replies = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+        self.ready = False
+        # Why the worker refused to start, e.g. no network isolation
+        self.error = None
+
+    def _read(self):
+        with contextlib.suppress(ValueError, OSError):
+            for line in self.process.stdout:
+                self._replies.put(json.loads(line))
+        self._replies.put(None)
+
+    def send(self, message):
+        self.process.stdin.write(json.dumps(message) + "\n")
+        self.process.stdin.flush()
+
+    def recv(self, timeout):
+        """
+        The next reply; raises queue.Empty after timeout seconds and
+        EOFError once the worker has exited.
+        """
+        reply = self._replies.get(timeout=timeout)
+        if reply is None:
+            self._replies.put(None)
+            raise EOFError("sandbox worker exited")
+        return reply
+
+    def wait_ready(self, timeout):
+        try:
+            if not self.ready:
+                message = self.recv(timeout)
+                self.ready = bool(message.get("ready"))
+                self.error = message.get("error")
+        except (queue.Empty, EOFError, AttributeError):
+            self.ready = False
+        return self.ready
+
+    def kill(self):
+        with contextlib.suppress(Exception):
+            self.process.kill()
+            self.process.wait(1)
+        for stream in (self.process.stdin, self.process.stdout):
+            with contextlib.suppress(Exception):
+                stream.close()
+        shutil.rmtree(self.cwd, ignore_errors=True)
+
+
+class PythonREPL:
+    """
+    Pool of pre-warmed sandbox processes for model-generated Python/SymPy
+    snippets.
+
+    Every worker is a fresh interpreter started with an empty environment
+    (no API keys) in an empty temporary directory. It moves into its own
+    network namespace, imports sympy/numpy once and then locks itself
+    down with Landlock: no execve, no files outside the Python
+    installation and its directory (so not the project, .env included).
+    It runs under an address-space limit. A worker that cannot isolate
+    itself refuses to start, and the pool then reports every call as
+    unavailable (see unavailable); this is Linux only.
+
+    Each call gets a fresh namespace, a CPU-time limit and a wall-clock
+    timeout; a worker that times out or dies is killed and replaced in the
+    background. Imports are restricted to ALLOWED_MODULES, file/eval
+    builtins are removed and check_code rejects dunder and module-reaching
+    names. Those in-process filters can be bypassed by anything that
+    reaches an importer (sympy.external.import_module, ...); the OS-level
+    isolation is what contains a hostile snippet.
+    """
+    def __init__(self, workers=None, timeout=None, cpu_seconds=None, memory_mb=None, startup_timeout=60):
+        self.workers = workers or int(os.getenv("PYTHON_REPL_WORKERS", "2"))
+        self.timeout = timeout or float(os.getenv("PYTHON_REPL_TIMEOUT", "10"))
+        self.cpu_seconds = cpu_seconds or float(os.getenv("PYTHON_REPL_CPU_SECONDS", "5"))
+        self.memory_mb = memory_mb if memory_mb is not None else int(os.getenv("PYTHON_REPL_MEMORY_MB", "1024"))
+        self.startup_timeout = startup_timeout
+        # Set once a worker refuses to start for lack of isolation
+        self.unavailable = None
+        self._idle = queue.Queue()
+        self._closed = False
+        for _ in range(self.workers):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        return _Worker(self.cpu_seconds, self.memory_mb)
+
+    def _replace(self, worker):
+        worker.kill()
+        if not self._closed:
+            self._idle.put(self._spawn())
+
+    def run(self, code, timeout=None):
+        """
+        Returns {"ok": bool, "stdout", "result" | "error", "seconds"}.
+        """
+        if self._closed:
+            raise RuntimeError("PythonREPL is closed")
+        if self.unavailable:
+            return {"ok": False, "error": f"sandbox unavailable: {self.unavailable}", "seconds": 0.0}
+        timeout = timeout or self.timeout
+        worker = self._idle.get()
+        if not worker.wait_ready(self.startup_timeout):
+            if worker.error:
+                # Would fail the same way every time; do not respawn
+                self.unavailable = worker.error
+                self._idle.put(worker)
+                return {"ok": False, "error": f"sandbox unavailable: {worker.error}", "seconds": 0.0}
+            self._replace(worker)
+            return {"ok": False, "error": "sandbox worker failed to start", "seconds": 0.0}
+
+        start = time.perf_counter()
+        try:
+            worker.send(code)
+            reply = worker.recv(timeout)
+            self._idle.put(worker)
+            return reply
+        except queue.Empty:
+            error = f"TimeoutError: execution exceeded {timeout:g}s"
+        except (EOFError, OSError):
+            # Killed by the CPU/memory limit
+            error = "execution aborted: CPU or memory limit exceeded"
+        threading.Thread(target=self._replace, args=(worker,), daemon=True).start()
+        return {"ok": False, "error": error, "seconds": round(time.perf_counter() - start, 4)}
+
+    async def arun(self, code, timeout=None):
+        return await asyncio.to_thread(self.run, code, timeout)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            with contextlib.suppress(Exception):
+                worker.send(None)
+            worker.kill()
+
+
+def format_result(reply):
+    """
+    Tool output as shown to the model.
+    """
+    if not reply["ok"]:
+        return f"Error: {reply['error']}"
+    parts = [reply["stdout"].rstrip()] if reply.get("stdout") else []
+    if reply.get("result") is not None:
+        parts.append(reply["result"])
+    return "\n".join(parts) or "(no output)"
+
+
+_repl = None
+_repl_lock = threading.Lock()
+
+
+def get_repl():
+    """
+    Returns the process-wide PythonREPL, starting its workers on first use.
+    """
+    global _repl
+    with _repl_lock:
+        if _repl is None:
+            _repl = PythonREPL()
+        return _repl
@@ -1,36 +1,179 @@
 import whisper
 import tempfile
+import threading
+import time
 import os
 
+from .audio_decode import SAMPLE_RATE, AudioDecodeError, decode_audio
+from .inference import get_profile, quantize_linear
+from .media_cache import MediaCache, media_cache_enabled
+from .vad import speech_chunks
+
 class AudioProcessor:
-    def __init__(self, model_size="base"):
-        # Load whisper model
-        # Available models: tiny, base, small, medium, large
-        print(f"Loading Whisper model: {model_size}...")
-        self.model = whisper.load_model(model_size)
+    def __init__(self, model_size=None, cache=None, profile=None):
+        # Threads, precision and model size come from the inference profile
+        self.profile = profile or get_profile()
+        self.profile.apply()
+
+        # Available models: tiny, base, small, medium, large, or "auto" to
+        # pick one per clip by duration (see the profile's whisper_sizes)
+        self.model_size = model_size or self.profile.whisper_model
+        self._models = {}
+        self._models_lock = threading.Lock()
+        # Load the model for short recordings, the common case, up front
+        self.model = self.model_for(0)[1]
+        # "memory" decodes uploads in-process, anything else goes through
+        # Whisper's ffmpeg file loader; the two can differ slightly
+        self.decode = os.getenv("AUDIO_DECODE", "memory")
+
+        # Transcripts for byte-identical uploads are served from disk
+        if cache is None:
+            cache = media_cache_enabled()
+        self.cache = MediaCache("asr_results") if cache is True else (cache or None)
+
+    def model_for(self, seconds):
+        """
+        (size, Whisper model) for a clip of this many seconds. Each size is
+        loaded (and quantized, if the profile says so) once.
+        """
+        size = self.profile.whisper_size(seconds) if self.model_size == "auto" else self.model_size
+        with self._models_lock:
+            if size not in self._models:
+                print(f"Loading Whisper model: {size}...")
+                model = whisper.load_model(size)
+                if self.profile.quantize_whisper and model.device.type == "cpu":
+                    model = quantize_linear(model)
+                self._models[size] = model
+            return size, self._models[size]
+
+    @property
+    def settings(self):
+        """
+        Everything besides the audio bytes that changes the transcript.
+        """
+        model = self.model_size
+        if model == "auto":
+            model = f"auto:{self.profile.whisper_sizes}"
+        return {
+            "engine": f"whisper-{getattr(whisper, '__version__', 'unknown')}",
+            "model": model,
+            "quantize": self.profile.quantize_whisper,
+            "decode": self.decode
+        }
+
+    def load(self, audio_bytes):
+        """
+        16 kHz mono float32 samples and the decoder used. Uploads are
+        decoded in memory; Whisper's own temp-file + ffmpeg loader is only
+        the fallback.
+        """
+        if self.decode == "memory":
+            try:
+                return decode_audio(audio_bytes)
+            except AudioDecodeError:
+                pass
+        return self._load_via_file(audio_bytes), "file"
+
+    @staticmethod
+    def _load_via_file(audio_bytes):
+        # Whisper requires a file path usually, or specific handling
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
+            tmp_file.write(audio_bytes)
+            tmp_path = tmp_file.name
+        try:
+            return whisper.load_audio(tmp_path)
+        finally:
+            # Cleanup
+            os.remove(tmp_path)
 
     def process_audio(self, audio_bytes):
         """
         Process audio bytes and return text transcription.
         """
+        if self.cache is not None:
+            cached = self.cache.get(audio_bytes, self.settings)
+            if cached is not None:
+                return cached
+
         try:
-            # Whisper requires a file path usually, or specific handling
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-                tmp_file.write(audio_bytes)
-                tmp_path = tmp_file.name
+            audio, decoder = self.load(audio_bytes)
+            size, model = self.model_for(len(audio) / SAMPLE_RATE)
 
             # Transcribe
-            result = self.model.transcribe(tmp_path)
-            
-            # Cleanup
-            os.remove(tmp_path)
-            
-            return {
+            result = model.transcribe(audio)
+
+            transcript = {
                 "text": result["text"],
-                "language": result.get("language", "unknown")
+                "language": result.get("language", "unknown"),
+                "decoder": decoder,
+                "model": size
             }
+            if self.cache is not None:
+                self.cache.set(audio_bytes, self.settings, transcript)
+            return transcript
         except Exception as e:
             return {
                 "text": "",
                 "error": str(e)
             }
+
+    def stream_audio(self, audio_bytes):
+        """
+        Transcribes a recording chunk by chunk. Voice-activity detection
+        drops silence and groups speech into chunks of at most one Whisper
+        window, so only one chunk is decoded by the model at a time.
+
+        Yields {"text": transcript so far, "chunk", "start", "end",
+        "done": False} per chunk, then a final {"done": True, ...} with the
+        full transcript and how much audio was skipped.
+        """
+        # VAD chunking can transcribe differently from a single pass
+        settings = {**self.settings, "mode": "vad"}
+        if self.cache is not None:
+            cached = self.cache.get(audio_bytes, settings)
+            if cached is not None:
+                cached["done"] = True
+                yield cached
+                return
+
+        try:
+            audio, decoder = self.load(audio_bytes)
+            size, model = self.model_for(len(audio) / SAMPLE_RATE)
+        except Exception as e:
+            yield {"text": "", "error": str(e), "done": True}
+            return
+
+        start_time = time.perf_counter()
+        texts = []
+        language = None
+        speech_seconds = 0.0
+        try:
+            for start, end, chunk in speech_chunks(audio):
+                speech_seconds += len(chunk) / SAMPLE_RATE
+                # The previous chunk's tail keeps terms and spelling consistent
+                prompt = " ".join(texts)[-200:] or None
+                result = model.transcribe(chunk, language=language, initial_prompt=prompt)
+                language = language or result.get("language")
+                chunk_text = result["text"].strip()
+                if chunk_text:
+                    texts.append(chunk_text)
+                yield {"text": " ".join(texts), "chunk": chunk_text, "start": start, "end": end, "done": False}
+        except Exception as e:
+            yield {"text": " ".join(texts), "error": str(e), "done": True}
+            return
+
+        transcript = {
+            "text": " ".join(texts),
+            "language": language or "unknown",
+            "decoder": decoder,
+            "model": size
+        }
+        if self.cache is not None:
+            self.cache.set(audio_bytes, settings, transcript)
+        yield {
+            **transcript,
+            "done": True,
+            "audio_seconds": round(len(audio) / SAMPLE_RATE, 2),
+            "speech_seconds": round(speech_seconds, 2),
+            "seconds": round(time.perf_counter() - start_time, 2)
+        }
@@ -0,0 +1,78 @@
+import io
+import shutil
+import subprocess
+from math import gcd
+
+import numpy as np
+
+# Whisper's expected input: 16 kHz mono float32 in [-1, 1]
+SAMPLE_RATE = 16000
+
+
+class AudioDecodeError(Exception):
+    pass
+
+
+def to_mono(samples):
+    return samples.mean(axis=1) if samples.ndim == 2 else samples
+
+
+def resample(samples, orig_sr, target_sr=SAMPLE_RATE):
+    """
+    Polyphase resampling (scipy), or linear interpolation without scipy.
+    """
+    if orig_sr == target_sr or not len(samples):
+        return samples.astype(np.float32, copy=False)
+    try:
+        from scipy.signal import resample_poly
+        divisor = gcd(int(orig_sr), int(target_sr))
+        resampled = resample_poly(samples, target_sr // divisor, orig_sr // divisor)
+    except ImportError:
+        duration = len(samples) / orig_sr
+        target_times = np.arange(int(duration * target_sr)) / target_sr
+        resampled = np.interp(target_times, np.arange(len(samples)) / orig_sr, samples)
+    return resampled.astype(np.float32, copy=False)
+
+
+def decode_soundfile(data):
+    """
+    WAV/FLAC/OGG (and MP3 with libsndfile >= 1.1) decoded in-process.
+    """
+    import soundfile as sf
+    samples, sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    return resample(to_mono(samples), sr)
+
+
+def decode_ffmpeg(data, sr=SAMPLE_RATE):
+    """
+    Anything ffmpeg reads (M4A/AAC, ...), piped through stdin/stdout, so
+    nothing touches the disk.
+    """
+    if shutil.which("ffmpeg") is None:
+        raise AudioDecodeError("ffmpeg not found")
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", "pipe:0",
+        "-f", "f32le", "-ac", "1", "-ar", str(sr), "-loglevel", "error", "pipe:1"
+    ]
+    process = subprocess.run(cmd, input=data, capture_output=True)
+    if process.returncode != 0:
+        raise AudioDecodeError(process.stderr.decode("utf-8", "replace").strip() or "ffmpeg failed")
+    return np.frombuffer(process.stdout, dtype=np.float32).copy()
+
+
+def decode_audio(data):
+    """
+    Returns (16 kHz mono float32 samples, decoder name). soundfile is tried
+    first; ffmpeg is only spawned for formats it cannot read.
+    """
+    errors = []
+    for name, decoder in (("soundfile", decode_soundfile), ("ffmpeg", decode_ffmpeg)):
+        try:
+            samples = decoder(data)
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+            continue
+        if len(samples):
+            return samples, name
+        errors.append(f"{name}: no samples decoded")
+    raise AudioDecodeError("; ".join(errors))
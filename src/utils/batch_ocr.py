@@ -0,0 +1,179 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .inference import configure_threads, default_threads
+
+# Rasterization resolution for PDF pages
+PDF_DPI = int(os.getenv("OCR_PDF_DPI", "200"))
+# Torch threads per OCR worker (at most); the pool gets this process's
+# share of the cores (see inference.default_threads) // this many workers
+THREADS_PER_WORKER = int(os.getenv("OCR_THREADS_PER_WORKER", "2"))
+
+# "1.", "2)", "Q3", "Problem 4:" at the start of the text, a line or a
+# sentence (OCR output joins lines with spaces)
+PROBLEM_MARKER = re.compile(
+    r"(?:^|\n|(?<=[.?!])\s)\s*(?:(?:problem|question|q)\s*\d+[.:)]?|\d{1,3}[.)])\s+", re.IGNORECASE
+)
+
+_worker_ocr = None
+
+
+def default_workers():
+    configured = os.getenv("OCR_WORKERS")
+    if configured:
+        return int(configured)
+    return max(1, default_threads() // max(THREADS_PER_WORKER, 1))
+
+
+def worker_threads(workers):
+    """
+    Torch threads per worker: OCR_THREADS_PER_WORKER, or less if this
+    process's share of the cores cannot give every worker that many.
+    """
+    return max(1, min(THREADS_PER_WORKER, default_threads() // max(workers, 1)))
+
+
+def is_pdf(name, data):
+    return name.lower().endswith(".pdf") or data[:5] == b"%PDF-"
+
+
+def pdf_page_count(path):
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def render_pdf_page(path, index, dpi=PDF_DPI):
+    """
+    One PDF page as a PIL image.
+    """
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(path)
+    try:
+        page = pdf[index]
+        return page.render(scale=dpi / 72).to_pil()
+    finally:
+        pdf.close()
+
+
+def _init_worker(ocr_kwargs, threads):
+    """
+    Pool initializer: one EasyOCR reader per worker process, reused for
+    every page it handles.
+    """
+    global _worker_ocr
+    # Before OCRProcessor applies the per-process profile, which would
+    # give every worker the whole box
+    configure_threads(max(threads, 1), 1)
+    from .ocr import OCRProcessor
+    _worker_ocr = OCRProcessor(**ocr_kwargs)
+
+
+def _ocr_page(task):
+    source, page, payload, dpi, content = task
+    if isinstance(payload, str):
+        image = render_pdf_page(payload, page, dpi)
+    else:
+        image = payload
+    result = _worker_ocr.process_image(image, content=content)
+    # EasyOCR boxes contain numpy types; keep the reply small and picklable
+    result.pop("details", None)
+    result["source"] = source
+    result["page"] = page
+    return result
+
+
+def split_problems(text):
+    """
+    Splits a page of OCR text into problems at numbering markers ("1.",
+    "2)", "Q3"). Text without markers is returned as a single problem.
+    """
+    parts = [part.strip() for part in PROBLEM_MARKER.split(text or "")]
+    parts = [part for part in parts if part]
+    return parts
+
+
+class BatchOCR:
+    """
+    OCR over many uploads at once: images and every page of PDFs.
+
+    Pages are handed to a spawn-based process pool in which each worker
+    holds its own EasyOCR reader. PDF pages are only rasterized inside the
+    worker that OCRs them, and at most two tasks per worker are queued, so
+    a long PDF is never rendered up front. Results are yielded as pages
+    finish, not in upload order.
+    """
+    def __init__(self, workers=None, dpi=PDF_DPI, **ocr_kwargs):
+        self.workers = workers or default_workers()
+        self.dpi = dpi
+        self.ocr_kwargs = ocr_kwargs
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            threads = worker_threads(self.workers)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.ocr_kwargs, threads)
+            )
+        return self._executor
+
+    def _tasks(self, files, tmpdir):
+        """
+        (source, page, payload, dpi, content) per page; payload is a PDF
+        path or image bytes. content identifies a PDF page for the media
+        cache (PDF hash, page, dpi); images are keyed on their own bytes.
+        """
+        for number, (name, data) in enumerate(files):
+            if is_pdf(name, data):
+                path = os.path.join(tmpdir, f"{number}.pdf")
+                with open(path, "wb") as file:
+                    file.write(data)
+                digest = hashlib.sha256(data).hexdigest()
+                for page in range(pdf_page_count(path)):
+                    yield name, page, path, self.dpi, f"pdf:{digest}:{page}:{self.dpi}".encode("utf-8")
+            else:
+                yield name, 0, data, self.dpi, None
+
+    def iter_results(self, files):
+        """
+        files: iterable of (name, bytes). Yields one OCR result dict per
+        page (text, confidence, source, page, or error) as each completes.
+        """
+        with tempfile.TemporaryDirectory(prefix="batch_ocr_") as tmpdir:
+            tasks = self._tasks(files, tmpdir)
+            pending = {}
+            max_pending = self.workers * 2
+
+            def submit_next():
+                task = next(tasks, None)
+                if task is not None:
+                    pending[self.executor.submit(_ocr_page, task)] = task
+                return task is not None
+
+            while len(pending) < max_pending and submit_next():
+                pass
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source, page = pending.pop(future)[:2]
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        yield {"text": "", "confidence": 0.0, "error": str(e), "source": source, "page": page}
+                    submit_next()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
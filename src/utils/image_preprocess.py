@@ -0,0 +1,160 @@
+import io
+import os
+import time
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# Median text line height (px) images are scaled towards; EasyOCR's CRAFT
+# detector does well on ~20-40px text.
+TARGET_TEXT_HEIGHT = int(os.getenv("OCR_TARGET_TEXT_HEIGHT", "32"))
+# Upper bound on the longest side after scaling, whatever the text height
+MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "1600"))
+# Fraction of a row/column's pixels that must be ink for it to count as text
+INK_FRACTION = 0.005
+# Never shrink below this factor on the line-height estimate alone; a
+# misread layout must not leave the text too small to recognize
+MIN_TEXT_SCALE = float(os.getenv("OCR_MIN_TEXT_SCALE", "0.35"))
+# Above this fraction of inked rows the lines run together (skewed or
+# rotated text) and their heights say nothing about the font size
+MAX_BAND_COVERAGE = 0.8
+
+
+def load_image(image_input):
+    """
+    PIL image from bytes, a file-like object or a PIL image, rotated per
+    its EXIF orientation (phone photos are usually stored sideways).
+    """
+    if isinstance(image_input, bytes):
+        image = Image.open(io.BytesIO(image_input))
+    elif isinstance(image_input, Image.Image):
+        image = image_input
+    else:
+        image = Image.open(image_input)
+    return ImageOps.exif_transpose(image)
+
+
+def otsu_threshold(gray):
+    """
+    Global Otsu threshold of a uint8 grayscale array.
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if not total:
+        return 128
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    mean_bg = np.cumsum(hist * levels)
+    mean_total = mean_bg[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mean_total * weight_bg / total - mean_bg) ** 2 / (weight_bg * weight_fg)
+    return int(np.nanargmax(between))
+
+
+def binarize(gray):
+    """
+    Dark text on a white background, whatever the original polarity.
+    """
+    ink = gray < otsu_threshold(gray)
+    # Light text on a dark board/screen: the "ink" is the majority class
+    if ink.mean() > 0.5:
+        ink = ~ink
+    return ink
+
+
+def text_bbox(ink, margin=0.02):
+    """
+    (left, top, right, bottom) around rows/columns carrying ink, padded by
+    margin (fraction of the side), or None if there is no ink.
+    """
+    rows = np.nonzero(ink.mean(axis=1) > INK_FRACTION)[0]
+    cols = np.nonzero(ink.mean(axis=0) > INK_FRACTION)[0]
+    if not len(rows) or not len(cols):
+        return None
+    height, width = ink.shape
+    pad_y, pad_x = int(height * margin), int(width * margin)
+    return (
+        max(cols[0] - pad_x, 0), max(rows[0] - pad_y, 0),
+        min(cols[-1] + 1 + pad_x, width), min(rows[-1] + 1 + pad_y, height)
+    )
+
+
+def text_line_height(ink):
+    """
+    Median height of the horizontal ink bands (text lines), or None when
+    the row projection shows no clear lines: fewer than two bands, or ink
+    in almost every row, as happens when skewed lines overlap.
+    """
+    active = ink.mean(axis=1) > INK_FRACTION
+    if not len(active) or active.mean() > MAX_BAND_COVERAGE:
+        return None
+    # Run lengths of consecutive active rows
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    starts, ends = np.nonzero(edges == 1)[0], np.nonzero(edges == -1)[0]
+    heights = ends - starts
+    heights = heights[heights >= 3]
+    return float(np.median(heights)) if len(heights) >= 2 else None
+
+
+class ImagePreprocessor:
+    """
+    Prepares photos for EasyOCR on CPU: EXIF rotation, grayscale, crop to
+    the text region, downscale so text lines are about target_text_height
+    pixels (never upscaling, and by at most min_text_scale unless max_side
+    requires more) and optional binarization.
+
+    Returns the processed uint8 array and what was done to it.
+    """
+    def __init__(self, target_text_height=TARGET_TEXT_HEIGHT, max_side=MAX_SIDE, crop=True, binary=None,
+                 min_text_scale=MIN_TEXT_SCALE):
+        self.target_text_height = target_text_height
+        self.max_side = max_side
+        self.min_text_scale = min_text_scale
+        self.crop = crop
+        self.binary = os.getenv("OCR_BINARIZE", "1") == "1" if binary is None else binary
+
+    def __call__(self, image_input):
+        start = time.perf_counter()
+        image = load_image(image_input)
+        original_size = image.size
+        gray_image = ImageOps.grayscale(image)
+
+        # Layout analysis on a small proxy; the crop and scale are then
+        # applied to the full-resolution grayscale image once.
+        proxy_scale = min(1.0, 1000 / max(gray_image.size))
+        proxy = gray_image.resize(
+            (max(1, round(gray_image.width * proxy_scale)), max(1, round(gray_image.height * proxy_scale))),
+            Image.BILINEAR
+        ) if proxy_scale < 1.0 else gray_image
+        ink = binarize(np.asarray(proxy))
+
+        box = text_bbox(ink) if self.crop else None
+        if box is not None:
+            full_box = tuple(round(v / proxy_scale) for v in box)
+            gray_image = gray_image.crop(full_box)
+            ink = ink[box[1]:box[3], box[0]:box[2]]
+
+        scale = 1.0
+        line_height = text_line_height(ink)
+        if line_height:
+            scale = min(scale, max(self.target_text_height / (line_height / proxy_scale), self.min_text_scale))
+        if self.max_side:
+            scale = min(scale, self.max_side / max(gray_image.size))
+        if scale < 1.0:
+            gray_image = gray_image.resize(
+                (max(1, round(gray_image.width * scale)), max(1, round(gray_image.height * scale))),
+                Image.LANCZOS
+            )
+
+        array = np.asarray(gray_image)
+        if self.binary:
+            array = np.where(binarize(array), 0, 255).astype(np.uint8)
+
+        return array, {
+            "original_size": original_size,
+            "size": (array.shape[1], array.shape[0]),
+            "cropped": box is not None,
+            "scale": round(scale, 4),
+            "seconds": round(time.perf_counter() - start, 4)
+        }
@@ -0,0 +1,180 @@
+import os
+import sys
+import threading
+
+# app.py imports this file as utils.inference (src/ is on its sys.path)
+# while the RAG code imports src.utils.inference. configure_threads'
+# once-per-process guard only holds if both names are one module, so any
+# other name is made an alias of the full one.
+if __name__ != "src.utils.inference":
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    import src.utils.inference
+    sys.modules[__name__] = src.utils.inference
+
+# Named CPU inference profiles. Individual env vars (WHISPER_MODEL,
+# WHISPER_AUTO_SIZES, WHISPER_QUANTIZE, OCR_QUANTIZE) override the preset.
+#  - whisper_model: a Whisper size, or "auto" to pick one per clip from
+#    whisper_sizes ("max seconds:size" rules, checked in order)
+#  - quantize_whisper: int8 dynamic quantization of Whisper's linear layers
+#  - quantize_ocr: EasyOCR's int8 dynamic quantization of its detector and
+#    recognizer (EasyOCR's own default on CPU)
+PROFILES = {
+    # The behaviour before profiles existed
+    "default": {
+        "whisper_model": "base",
+        "whisper_sizes": "30:small,120:base,inf:tiny",
+        "quantize_whisper": False,
+        "quantize_ocr": True,
+    },
+    "fast": {
+        "whisper_model": "auto",
+        "whisper_sizes": "30:base,inf:tiny",
+        "quantize_whisper": True,
+        "quantize_ocr": True,
+    },
+    "accurate": {
+        "whisper_model": "auto",
+        "whisper_sizes": "30:small,inf:base",
+        "quantize_whisper": False,
+        "quantize_ocr": False,
+    },
+}
+
+_threads_lock = threading.Lock()
+_threads_configured = None
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_threads():
+    """
+    This process's share of the cores: INFERENCE_WORKERS processes (e.g.
+    Streamlit workers) run on the same box.
+    """
+    workers = max(int(os.getenv("INFERENCE_WORKERS", "1")), 1)
+    return max(available_cores() // workers, 1)
+
+
+def parse_sizes(rules):
+    """
+    "30:small,120:base,inf:tiny" -> [(30.0, "small"), (120.0, "base"), (inf, "tiny")]
+    """
+    sizes = []
+    for rule in rules.split(","):
+        limit, _, size = rule.strip().partition(":")
+        if not size:
+            raise ValueError(f"Invalid Whisper size rule {rule!r}, expected 'seconds:size'")
+        sizes.append((float(limit), size.strip()))
+    return sizes
+
+
+def _flag(value, env, default):
+    if value is not None:
+        return value
+    configured = os.getenv(env)
+    if configured in (None, ""):
+        return default
+    return configured == "1"
+
+
+class InferenceProfile:
+    """
+    Thread counts, precision and Whisper model size for CPU inference.
+    """
+    def __init__(self, name=None, threads=None, interop_threads=None, whisper_model=None, whisper_sizes=None,
+                 quantize_whisper=None, quantize_ocr=None):
+        self.name = name or os.getenv("INFERENCE_PROFILE", "default")
+        if self.name not in PROFILES:
+            raise ValueError(f"Unknown inference profile {self.name!r}, expected one of {sorted(PROFILES)}")
+        preset = PROFILES[self.name]
+
+        self.threads = threads or int(os.getenv("INFERENCE_THREADS") or 0) or default_threads()
+        self.interop_threads = interop_threads or int(os.getenv("INFERENCE_INTEROP_THREADS") or 0) or 1
+        self.whisper_model = whisper_model or os.getenv("WHISPER_MODEL") or preset["whisper_model"]
+        self.whisper_sizes = whisper_sizes or os.getenv("WHISPER_AUTO_SIZES") or preset["whisper_sizes"]
+        self.sizes = parse_sizes(self.whisper_sizes)
+        self.quantize_whisper = _flag(quantize_whisper, "WHISPER_QUANTIZE", preset["quantize_whisper"])
+        self.quantize_ocr = _flag(quantize_ocr, "OCR_QUANTIZE", preset["quantize_ocr"])
+
+    def whisper_size(self, seconds):
+        """
+        Whisper model for a clip of this many seconds.
+        """
+        if self.whisper_model != "auto":
+            return self.whisper_model
+        for limit, size in self.sizes:
+            if seconds <= limit:
+                return size
+        return self.sizes[-1][1]
+
+    def apply(self):
+        return configure_threads(self.threads, self.interop_threads)
+
+    def __repr__(self):
+        return (f"InferenceProfile({self.name!r}, threads={self.threads}, interop={self.interop_threads}, "
+                f"whisper={self.whisper_model!r}, quantize_whisper={self.quantize_whisper}, "
+                f"quantize_ocr={self.quantize_ocr})")
+
+
+def configure_threads(threads, interop_threads=1):
+    """
+    Caps torch's intra-op and inter-op pools (and OpenCV's, used by
+    EasyOCR) for this process. Only the first call takes effect: torch
+    cannot resize its inter-op pool once it has been used. Returns the
+    (threads, interop_threads) in effect.
+    """
+    global _threads_configured
+    with _threads_lock:
+        if _threads_configured is not None:
+            return _threads_configured
+        # Read by OpenMP/MKL when their pools start, if torch has not yet
+        os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+        os.environ.setdefault("MKL_NUM_THREADS", str(threads))
+        try:
+            import torch
+            torch.set_num_threads(threads)
+            try:
+                torch.set_num_interop_threads(interop_threads)
+            except RuntimeError:
+                # Inter-op work already ran in this process
+                interop_threads = torch.get_num_interop_threads()
+        except ImportError:
+            pass
+        try:
+            import cv2
+            cv2.setNumThreads(threads)
+        except ImportError:
+            pass
+        _threads_configured = (threads, interop_threads)
+        return _threads_configured
+
+
+def quantize_linear(model):
+    """
+    int8 dynamic quantization of every linear layer (weights stored as
+    int8, activations quantized on the fly). CPU only.
+    """
+    import torch
+    # Whisper subclasses nn.Linear only to cast weights to the input dtype;
+    # quantize_dynamic matches exact types, so treat them as plain linears.
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+_profile = None
+_profile_lock = threading.Lock()
+
+
+def get_profile():
+    global _profile
+    with _profile_lock:
+        if _profile is None:
+            _profile = InferenceProfile()
+        return _profile
+
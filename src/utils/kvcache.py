@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class SQLiteKV:
+    """
+    Small persistent key/value store on SQLite.
+
+    Entries are evicted least-recently-used once max_entries (or max_bytes)
+    is exceeded, and expire after ttl seconds. The file can be shared by
+    several threads and processes (WAL mode), so it survives Streamlit
+    reruns, sessions and restarts. Hit/miss counters are per process.
+    """
+    def __init__(self, path, table="cache", max_entries=10000, max_bytes=None, ttl=None):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB, size INTEGER, created REAL, accessed REAL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        size = len(value)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def _evict(self):
+        if self.ttl is not None:
+            cur = self._conn.execute(f"DELETE FROM {self.table} WHERE created < ?", (time.time() - self.ttl,))
+            self.evictions += cur.rowcount
+
+        count, total = self._conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+        while (self.max_entries is not None and count > self.max_entries) or \
+                (self.max_bytes is not None and total > self.max_bytes and count > 1):
+            key, size = self._conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY accessed ASC LIMIT 1"
+            ).fetchone()
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self.evictions += 1
+            count -= 1
+            total -= size
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        with self._lock:
+            count, total = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions
+        }
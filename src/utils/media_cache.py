@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+
+from .kvcache import SQLiteKV
+
+MEDIA_CACHE_PATH = os.getenv("MEDIA_CACHE_PATH") or os.path.join(os.getcwd(), "data", "cache", "media.sqlite3")
+
+
+def media_cache_enabled():
+    return os.getenv("MEDIA_CACHE", "1") == "1"
+
+
+def content_key(data, settings):
+    """
+    sha256 of the raw upload bytes combined with the settings that affect
+    the result (model, languages, preprocessing), so changing any of them
+    misses instead of returning a stale result.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    config = hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f"{digest}:{config[:16]}"
+
+
+def to_jsonable(value):
+    """
+    Converts numpy scalars/arrays (EasyOCR boxes and scores) and tuples to
+    plain JSON types.
+    """
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
+
+
+class MediaCache:
+    """
+    Content-addressed cache of OCR / transcription results, one SQLite
+    table per processor, capped in bytes and evicted least-recently-used.
+    """
+    def __init__(self, table, path=MEDIA_CACHE_PATH, max_bytes=None, max_entries=None, ttl=None):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("MEDIA_CACHE_MAX_MB", "256")) * 1024 * 1024)
+        if max_entries is None:
+            max_entries = int(os.getenv("MEDIA_CACHE_MAX_ENTRIES", "50000"))
+        if ttl is None and os.getenv("MEDIA_CACHE_TTL_HOURS"):
+            ttl = float(os.getenv("MEDIA_CACHE_TTL_HOURS")) * 3600
+        self.store = SQLiteKV(path, table=table, max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+
+    def get(self, data, settings):
+        value = self.store.get(content_key(data, settings))
+        if value is None:
+            return None
+        result = json.loads(value)
+        result["cached"] = True
+        return result
+
+    def set(self, data, settings, result):
+        self.store.set(content_key(data, settings), json.dumps(to_jsonable(result)))
+
+    def stats(self):
+        return self.store.stats()
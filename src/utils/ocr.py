@@ -1,45 +1,102 @@
 import easyocr
-import io
-from PIL import Image
+import os
 import numpy as np
 
+from .image_preprocess import ImagePreprocessor, load_image
+from .inference import get_profile
+from .media_cache import MediaCache, media_cache_enabled
+
 class OCRProcessor:
-    def __init__(self, languages=['en']):
+    def __init__(self, languages=['en'], preprocess=None, canvas_size=None, mag_ratio=None, batch_size=None,
+                 cache=None, profile=None):
+        # Threads and precision come from the process's inference profile
+        self.profile = profile or get_profile()
+        self.profile.apply()
+        self.quantize = self.profile.quantize_ocr
+
         # Initialize EasyOCR reader
         # gpu=False to be safe on all environments, set True if available
-        self.reader = easyocr.Reader(languages, gpu=False)
+        self.reader = easyocr.Reader(languages, gpu=False, quantize=self.quantize)
+        self.languages = list(languages)
+
+        if preprocess is None:
+            preprocess = os.getenv("OCR_PREPROCESS", "1") == "1"
+        self.preprocessor = ImagePreprocessor() if preprocess is True else (preprocess or None)
+
+        # EasyOCR detector/recognizer settings. canvas_size caps the longest
+        # side the detector sees, mag_ratio magnifies before detection and
+        # batch_size is the number of text crops recognized at once.
+        self.readtext_options = {
+            "canvas_size": canvas_size or int(os.getenv("OCR_CANVAS_SIZE", "1600")),
+            "mag_ratio": mag_ratio or float(os.getenv("OCR_MAG_RATIO", "1.0")),
+            "batch_size": batch_size or int(os.getenv("OCR_BATCH_SIZE", "8")),
+        }
+
+        # Results for byte-identical uploads are served from disk
+        if cache is None:
+            cache = media_cache_enabled()
+        self.cache = MediaCache("ocr_results") if cache is True else (cache or None)
 
-    def process_image(self, image_input):
+    @property
+    def settings(self):
+        """
+        Everything besides the image bytes that changes the OCR output.
+        """
+        return {
+            "engine": f"easyocr-{getattr(easyocr, '__version__', 'unknown')}",
+            "languages": self.languages,
+            "quantize": self.quantize,
+            "preprocess": vars(self.preprocessor) if self.preprocessor is not None else None,
+            "readtext": self.readtext_options
+        }
+
+    def prepare(self, image_input):
+        """
+        Image array for EasyOCR plus preprocessing info (None if disabled).
+        """
+        if self.preprocessor is None:
+            return np.array(load_image(image_input).convert("RGB")), None
+        return self.preprocessor(image_input)
+
+    def process_image(self, image_input, content=None):
         """
         Process an image (PIL Image or bytes) and return extracted text.
+        content (bytes) identifies an image that is not a raw upload, such
+        as a rendered PDF page, so it can be cached too.
         """
+        # Raw uploads are content-addressed; other images only with content
+        if content is None and isinstance(image_input, bytes):
+            content = image_input
+        cacheable = self.cache is not None and content is not None
+        if cacheable:
+            cached = self.cache.get(content, self.settings)
+            if cached is not None:
+                return cached
+
         try:
-            if isinstance(image_input, bytes):
-                image = Image.open(io.BytesIO(image_input))
-            else:
-                image = image_input
+            image_np, preprocessing = self.prepare(image_input)
 
-            # Convert PIL image to numpy array for EasyOCR
-            image_np = np.array(image)
-            
-            # EasyOCR expects BGR or RGB? It handles standard numpy arrays (RGB usually fine)
             # Run inference
-            results = self.reader.readtext(image_np)
-            
+            results = self.reader.readtext(image_np, **self.readtext_options)
+
             # Join results
             extracted_text = " ".join([res[1] for res in results])
-            
+
             # Basic confidence check (average of confidence scores)
             if results:
                 avg_confidence = sum([res[2] for res in results]) / len(results)
             else:
                 avg_confidence = 0.0
-                
-            return {
+
+            result = {
                 "text": extracted_text,
                 "confidence": avg_confidence,
-                "details": results
+                "details": results,
+                "preprocessing": preprocessing
             }
+            if cacheable:
+                self.cache.set(content, self.settings, result)
+            return result
         except Exception as e:
             return {
                 "text": "",
@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+
+from .audio_decode import SAMPLE_RATE
+
+FRAME_SECONDS = 0.03
+# dB above the estimated noise floor a frame must reach to count as speech
+THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "12"))
+# Frames quieter than this (dBFS) are never speech, however quiet the room
+MIN_SPEECH_DBFS = -50.0
+# The noise floor is estimated from the quietest frames, but never above
+# this (dBFS): in a recording that is nearly all speech those frames are
+# speech too, and a floor taken from them would cut quieter speech
+MAX_NOISE_FLOOR_DBFS = float(os.getenv("VAD_MAX_NOISE_FLOOR_DBFS", "-48"))
+NOISE_PERCENTILE = 10
+# Shorter pauses are kept inside a segment; shorter blips are dropped
+MIN_SILENCE_SECONDS = float(os.getenv("VAD_MIN_SILENCE_SECONDS", "0.6"))
+MIN_SPEECH_SECONDS = 0.25
+PAD_SECONDS = 0.2
+# Silence left between joined segments
+JOIN_SECONDS = 0.1
+# Whisper decodes 30 s windows; chunks never exceed one
+MAX_CHUNK_SECONDS = float(os.getenv("VAD_MAX_CHUNK_SECONDS", "28"))
+
+
+def frame_energy_db(samples, frame=int(FRAME_SECONDS * SAMPLE_RATE)):
+    """
+    RMS level (dBFS) of consecutive non-overlapping frames.
+    """
+    count = len(samples) // frame
+    if not count:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def speech_segments(samples, sr=SAMPLE_RATE, threshold_db=THRESHOLD_DB):
+    """
+    [(start, end)] sample ranges containing speech. The noise floor is the
+    10th percentile frame level, capped at MAX_NOISE_FLOOR_DBFS, so the
+    threshold adapts to quiet rooms but never rises into speech levels.
+    """
+    frame = int(FRAME_SECONDS * sr)
+    energy = frame_energy_db(samples, frame)
+    if not len(energy):
+        return []
+    floor = min(np.percentile(energy, NOISE_PERCENTILE), MAX_NOISE_FLOOR_DBFS)
+    voiced = energy > max(floor + threshold_db, MIN_SPEECH_DBFS)
+
+    # Runs of voiced frames
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    runs = list(zip(np.nonzero(edges == 1)[0], np.nonzero(edges == -1)[0]))
+
+    # Bridge short pauses, then drop blips (clicks, coughs)
+    merged = []
+    gap = int(MIN_SILENCE_SECONDS / FRAME_SECONDS)
+    for start, end in runs:
+        if merged and start - merged[-1][1] <= gap:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    min_frames = int(MIN_SPEECH_SECONDS / FRAME_SECONDS)
+    pad = int(PAD_SECONDS * sr)
+    return [
+        (max(int(start * frame) - pad, 0), min(int(end * frame) + pad, len(samples)))
+        for start, end in merged if end - start >= min_frames
+    ]
+
+
+def speech_chunks(samples, sr=SAMPLE_RATE, max_seconds=MAX_CHUNK_SECONDS):
+    """
+    Groups speech segments into chunks of at most max_seconds of audio
+    (silence between segments is cut out), splitting over-long segments.
+    Yields (start, end, chunk samples) with start/end in seconds of the
+    original recording.
+    """
+    limit = int(max_seconds * sr)
+    pieces = []
+    for start, end in speech_segments(samples, sr):
+        for piece_start in range(start, end, limit):
+            pieces.append((piece_start, min(piece_start + limit, end)))
+
+    batch, length = [], 0
+    for start, end in pieces:
+        if batch and length + (end - start) > limit:
+            yield batch[0][0] / sr, batch[-1][1] / sr, _join(samples, batch, sr)
+            batch, length = [], 0
+        batch.append((start, end))
+        length += end - start + int(JOIN_SECONDS * sr)
+    if batch:
+        yield batch[0][0] / sr, batch[-1][1] / sr, _join(samples, batch, sr)
+
+
+def _join(samples, ranges, sr):
+    # A short gap keeps words from running together across cut silence
+    gap = np.zeros(int(JOIN_SECONDS * sr), dtype=samples.dtype)
+    parts = []
+    for start, end in ranges:
+        if parts:
+            parts.append(gap)
+        parts.append(samples[start:end])
+    return np.concatenate(parts)
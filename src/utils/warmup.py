@@ -0,0 +1,45 @@
+import threading
+import time
+
+
+class Warmup:
+    """
+    Loads heavy resources (models, agents) on daemon threads so they are
+    ready by the time they are first used. Each key is started at most
+    once per process; status() reports progress for the UI.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+
+    def start(self, key, load, prepare_thread=None):
+        """
+        Runs load() in the background unless key was already started.
+        prepare_thread(thread) is called before the thread starts (e.g. to
+        attach Streamlit's script context).
+        """
+        with self._lock:
+            if key in self._state:
+                return None
+            self._state[key] = {"status": "loading", "started": time.time()}
+
+        def run():
+            start = time.perf_counter()
+            try:
+                load()
+                status = {"status": "ready"}
+            except Exception as e:
+                status = {"status": "error", "error": str(e)}
+            status["seconds"] = round(time.perf_counter() - start, 2)
+            with self._lock:
+                self._state[key].update(status)
+
+        thread = threading.Thread(target=run, name=f"warmup-{key}", daemon=True)
+        if prepare_thread is not None:
+            prepare_thread(thread)
+        thread.start()
+        return thread
+
+    def status(self):
+        with self._lock:
+            return {key: dict(state) for key, state in self._state.items()}
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.utils import batch_ocr
+from src.utils.batch_ocr import PROBLEM_MARKER, split_problems, worker_threads
+
+
+@pytest.mark.parametrize("text, problems", [
+    ("1. Solve x + 1 = 2. 2. Find the derivative of x^2.", ["Solve x + 1 = 2.", "Find the derivative of x^2."]),
+    ("Problem 1: Solve x^2 = 4\nProblem 2: Integrate x", ["Solve x^2 = 4", "Integrate x"]),
+    ("Q1 Solve x^2 = 4\nQ2. Integrate x", ["Solve x^2 = 4", "Integrate x"]),
+    ("What is 2.5 times 4? 3) Simplify 6/8", ["What is 2.5 times 4?", "Simplify 6/8"]),
+    ("Solve x + 2 = 5", ["Solve x + 2 = 5"]),
+    ("", []),
+])
+def test_split_problems(text, problems):
+    assert split_problems(text) == problems
+
+
+@pytest.mark.parametrize("text", [
+    "Compute 3.5 + 2.1",          # decimals are not markers
+    "x = 1. 2 apples",            # no ")" or "." after the number
+    "Add the 2) values",          # mid-sentence
+])
+def test_marker_needs_a_numbered_start(text):
+    assert PROBLEM_MARKER.search(text) is None
+    assert split_problems(text) == [text]
+
+
+def test_worker_threads_respects_the_process_share(monkeypatch):
+    monkeypatch.setattr(batch_ocr, "THREADS_PER_WORKER", 2)
+    monkeypatch.setattr(batch_ocr, "default_threads", lambda: 8)
+    assert worker_threads(4) == 2
+    # OCR_WORKERS=1 still gets OCR_THREADS_PER_WORKER, not the whole share
+    assert worker_threads(1) == 2
+    assert worker_threads(16) == 1
+
+
+def test_pdf_pages_are_keyed_for_the_media_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_ocr, "pdf_page_count", lambda path: 2)
+    ocr = batch_ocr.BatchOCR(workers=1, dpi=150)
+    tasks = list(ocr._tasks([("sheet.pdf", b"%PDF-1.4 one"), ("photo.png", b"png")], str(tmp_path)))
+    contents = [task[4] for task in tasks]
+    assert len(set(contents[:2])) == 2 and all(b":150" in content for content in contents[:2])
+    # Images are keyed on their own bytes by OCRProcessor
+    assert tasks[2] == ("photo.png", 0, b"png", 150, None)
+
+    other = list(ocr._tasks([("sheet.pdf", b"%PDF-1.4 two")], str(tmp_path)))
+    assert other[0][4] != contents[0]
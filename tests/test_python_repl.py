@@ -0,0 +1,110 @@
+import ast
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+from src.tools.python_repl import PythonREPL, check_code
+
+IMPORT_MODULE_ESCAPE = (
+    "from sympy.external import import_module\n"
+    "import_module('subprocess').run(['id'], capture_output=True).stdout"
+)
+
+# Run in a child interpreter: isolates itself like a sandbox worker, then
+# tries what a snippet could do once past the in-process filters
+ISOLATED_ESCAPES = """
+import importlib, json, os, socket, sys
+sys.path.insert(0, sys.argv[1])
+from src.tools import python_repl
+try:
+    python_repl._isolate_network()
+    python_repl._isolate_filesystem(os.getcwd())
+except OSError as e:
+    print(json.dumps({"unsupported": str(e)}))
+    sys.exit()
+
+def attempt(action):
+    try:
+        action()
+        return "allowed"
+    except OSError as e:
+        return type(e).__name__
+
+def write_here():
+    with open("scratch.txt", "w") as file:
+        file.write("ok")
+
+print(json.dumps({
+    "exec": attempt(lambda: importlib.import_module("subprocess").run(["id"], capture_output=True)),
+    "list_project": attempt(lambda: os.listdir(sys.argv[1])),
+    "read_env": attempt(lambda: open(os.path.join(sys.argv[1], "requests.jsonl")).read()),
+    "list_root": attempt(lambda: os.listdir("/")),
+    "connect": attempt(lambda: socket.create_connection(("1.1.1.1", 53), timeout=2)),
+    "write_cwd": attempt(write_here),
+}))
+"""
+
+
+@pytest.mark.parametrize("code", [
+    "().__class__.__base__.__subclasses__()",
+    "f = lambda: 0\nf.__globals__",
+    "__builtins__",
+    "import sympy\nsympy.utilities.misc.os.system('id')",
+    "from numpy import load",
+    "from sympy.utilities.misc import os",
+    "np.loadtxt('/etc/passwd')",
+    "match x:\n    case object(__class__=c): pass",
+])
+def test_rejects_escapes(code):
+    with pytest.raises(PermissionError):
+        check_code(ast.parse(code))
+
+
+@pytest.mark.parametrize("code", [
+    "import sympy as sp\nx = sp.Symbol('x')\nsp.solve(x**2 - 4, x)",
+    "import numpy as np\nnp.linalg.det(np.eye(3))",
+    "from fractions import Fraction\nsum(Fraction(1, n) for n in range(1, 5))",
+])
+def test_allows_ordinary_snippets(code):
+    check_code(ast.parse(code))
+
+
+def test_rejects_import_module_escape():
+    with pytest.raises(PermissionError):
+        check_code(ast.parse(IMPORT_MODULE_ESCAPE))
+
+
+def test_isolation_holds_past_the_filters(tmp_path):
+    done = subprocess.run(
+        [sys.executable, "-c", ISOLATED_ESCAPES, ROOT], cwd=tmp_path, capture_output=True, text=True, timeout=60
+    )
+    results = json.loads(done.stdout.strip().splitlines()[-1])
+    if "unsupported" in results:
+        pytest.skip(results["unsupported"])
+    # Landlock denies TCP connect outright on newer kernels; otherwise the
+    # empty namespace makes it unreachable
+    assert results.pop("connect") != "allowed"
+    assert results == {
+        "exec": "PermissionError", "list_project": "PermissionError", "read_env": "PermissionError",
+        "list_root": "PermissionError", "write_cwd": "allowed",
+    }
+
+
+def test_repl_blocks_import_module_escape():
+    pytest.importorskip("sympy")
+    repl = PythonREPL(workers=1, timeout=30)
+    try:
+        reply = repl.run(IMPORT_MODULE_ESCAPE)
+        if repl.unavailable:
+            # Refusing to run at all is the other acceptable outcome
+            assert not reply["ok"] and "sandbox unavailable" in reply["error"]
+            return
+        assert not reply["ok"]
+        assert "uid=" not in reply["error"]
+    finally:
+        repl.close()
@@ -0,0 +1,101 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("sympy")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.agents.symbolic import SymbolicSolver, SymbolicVerifier, read_problem
+
+SIMPLE_ALGEBRA = {"category": "algebra", "complexity": "simple"}
+
+# Problems the reader must leave to the LLM: each asks for something other
+# than the plain solution/derivative of the expression it contains
+NOT_PLAIN = [
+    ("Find the derivative of x^2 at x = 3", "6"),
+    ("Find the second derivative of x^3", "6x"),
+    ("Find the area of a circle with radius r = 3", "9\\pi"),
+    ("If 3x = 12, what is 2x?", "8"),
+    ("If x + 5 = 9, find x^2", "16"),
+    ("Find the value of 2x + 1 when x = 3", "7"),
+    ("Solve |x - 2| = 3", "x = -1, x = 5"),
+]
+
+
+def problem(text, constraints=None):
+    return {"problem_text": text, "constraints": constraints or []}
+
+
+def boxed(answer):
+    return f"Work...\nFinal Answer: $\\boxed{{{answer}}}$"
+
+
+@pytest.mark.parametrize("text", [text for text, _ in NOT_PLAIN])
+def test_reader_defers_on_anything_but_a_plain_request(text):
+    assert read_problem(problem(text)) is None
+
+
+@pytest.mark.parametrize("text", [text for text, _ in NOT_PLAIN])
+def test_solver_falls_back_to_llm(text):
+    assert SymbolicSolver().solve(problem(text)) is None
+
+
+@pytest.mark.parametrize("text, answer", NOT_PLAIN)
+def test_verifier_gives_no_verdict(text, answer):
+    assert SymbolicVerifier().check(problem(text), boxed(answer)) is None
+
+
+def test_solver_filters_roots_by_constraints():
+    result = SymbolicSolver().solve(problem("Solve x^2 = 4 where x is positive", ["x > 0"]))
+    assert result["answer"] == "x = 2"
+
+
+def test_unparsed_constraint_in_text_defers():
+    assert SymbolicSolver().solve(problem("Solve x^2 = 4 where x is positive")) is None
+
+
+def test_verifier_accepts_constrained_answer():
+    checked = SymbolicVerifier().check(problem("Solve x^2 = 4 where x is positive", ["x > 0"]), boxed("x = 2"))
+    assert checked["is_correct"]
+
+
+@pytest.mark.parametrize("text, answer", [
+    ("Solve x^2 - 5x + 6 = 0", "x = 2, x = 3"),
+    ("Solve for x: 2x + 3 = 7", "x = 2"),
+    ("Find the derivative of x^3 + 2x with respect to x", "f'(x) = 3 x^{2} + 2"),
+    # Not simplify()'s sqrt(2) e^x sin(x + pi/4)
+    ("Find the derivative of e^x sin(x)", "f'(x) = \\left(\\sin{\\left(x \\right)} + \\cos{\\left(x \\right)}\\right) e^{x}"),
+    ("Find the derivative of sin(x)^2", "f'(x) = 2 \\sin{\\left(x \\right)} \\cos{\\left(x \\right)}"),
+    ("Evaluate the integral of x^2 from 0 to 3", "9"),
+    ("Find the limit of sin(x)/x as x approaches 0", "1"),
+])
+def test_plain_requests_are_solved_and_confirmed(text, answer):
+    result = SymbolicSolver().solve(problem(text))
+    assert result["answer"] == answer
+    assert SymbolicVerifier().check(problem(text), result["solution"])["is_correct"]
+
+
+def test_verifier_is_not_limited_to_simple_routes():
+    verifier = SymbolicVerifier()
+    for route in (SIMPLE_ALGEBRA, {"category": "algebra", "complexity": "hard"},
+                  {"category": "probability", "complexity": "simple"}, None):
+        assert verifier.accepts(route)
+
+
+def test_solver_only_runs_on_simple_routes():
+    solver = SymbolicSolver()
+    assert solver.accepts(SIMPLE_ALGEBRA)
+    assert not solver.accepts({"category": "algebra", "complexity": "hard"})
+    assert not solver.accepts(None)
+
+
+@pytest.mark.parametrize("answer, correct", [
+    ("x = -1, x = \\frac{3}{2}", True),
+    ("x = 1, x = \\frac{3}{2}", False),
+])
+def test_verifier_checks_llm_solutions(answer, correct):
+    # Written the way an LLM solution ends, not the symbolic solver's format
+    solution = f"Factoring gives (2x - 3)(x + 1) = 0.\n\n**Final Answer:** $\\boxed{{{answer}}}$"
+    checked = SymbolicVerifier().check(problem("Solve 2x^2 - x - 3 = 0"), solution)
+    assert checked["is_correct"] is correct
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.utils.vad import MAX_CHUNK_SECONDS, SAMPLE_RATE, speech_chunks, speech_segments
+
+
+def speech(seconds, dbfs, seed=0):
+    """
+    Noise with a syllable-rate envelope at the given RMS level.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = rng.normal(0, 1, len(t)) * (0.3 + 0.7 * np.abs(np.sin(2 * np.pi * 2 * t)))
+    return (signal / np.sqrt(np.mean(signal ** 2)) * 10 ** (dbfs / 20)).astype(np.float32)
+
+
+def silence(seconds, dbfs=-70, seed=1):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, 10 ** (dbfs / 20), int(seconds * SAMPLE_RATE)).astype(np.float32)
+
+
+def seconds_kept(samples):
+    return sum(end - start for start, end in speech_segments(samples)) / SAMPLE_RATE
+
+
+def test_continuous_speech_that_gets_quieter_is_kept():
+    # A student talking for a minute, 10 dB quieter after the first 20 s
+    samples = np.concatenate([speech(20, -20), speech(40, -30, seed=2)]) + silence(60)
+    assert seconds_kept(samples) > 59
+
+
+def test_pauses_are_cut():
+    samples = np.concatenate([silence(3), speech(4, -22), silence(5), speech(4, -22, seed=2), silence(3)])
+    segments = [(start / SAMPLE_RATE, end / SAMPLE_RATE) for start, end in speech_segments(samples)]
+    assert len(segments) == 2
+    (first_start, first_end), (second_start, second_end) = segments
+    assert abs(first_start - 3) < 0.5 and abs(first_end - 7) < 0.5
+    assert abs(second_start - 12) < 0.5 and abs(second_end - 16) < 0.5
+
+
+def test_silence_has_no_speech():
+    assert speech_segments(silence(10)) == []
+    assert list(speech_chunks(silence(10))) == []
+
+
+def test_chunks_fit_whisper_windows():
+    samples = np.concatenate([speech(45, -20), silence(2), speech(20, -20, seed=2)])
+    chunks = list(speech_chunks(samples))
+    assert len(chunks) >= 3
+    for start, end, chunk in chunks:
+        assert len(chunk) <= MAX_CHUNK_SECONDS * SAMPLE_RATE
+        assert 0 <= start < end <= len(samples) / SAMPLE_RATE
+    # No speech is lost, only the silence between segments
+    assert sum(len(chunk) for _, _, chunk in chunks) >= 65 * SAMPLE_RATE * 0.99